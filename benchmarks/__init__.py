@@ -0,0 +1,103 @@
+"""
+Benchmarks for the task manager.
+
+Each benchmark is a module that can be run from the repository root, for example:
+
+    python -m benchmarks.bench_id_index
+"""
+
+import datetime
+import random
+import time
+
+from task_manager.models import Task, TaskManager
+
+
+def make_tasks(count: int, start_id: int = 1) -> list[Task]:
+    """
+    Builds a list of synthetic tasks with unique, consecutive ids.
+
+    Args:
+        count: The number of tasks to build.
+        start_id: The id of the first task.
+
+    Returns:
+        A list of Task objects.
+    """
+    
+    now = datetime.datetime.now()
+    return [
+        Task(id, f"Task {id}", f"Description of task {id}", now - datetime.timedelta(seconds=id), now + datetime.timedelta(minutes=id), id % 3 == 0)
+        for id in range(start_id, start_id + count)
+    ]
+
+
+WORDS = (
+    "report", "invoice", "meeting", "review", "deploy", "call", "client", "budget", "draft", "email",
+    "plan", "fix", "test", "release", "design", "update", "order", "backup", "audit", "schedule",
+)
+
+
+def generate_tasks(count: int, seed: int = 0, start_id: int = 1) -> list[Task]:
+    """
+    Builds a list of synthetic tasks that look like real ones, reproducibly.
+
+    Titles have 1 to 4 words and descriptions 3 to 40, drawn from WORDS; tasks were created up to a
+    year ago, are due from a month ago to a year ahead, and about a third of them are completed.
+
+    Args:
+        count: The number of tasks to build.
+        seed: The seed of the random generator, so that runs compare the same data.
+        start_id: The id of the first task.
+
+    Returns:
+        A list of Task objects with unique, consecutive ids.
+    """
+    
+    generator = random.Random(seed)
+    now = datetime.datetime(2030, 1, 1)
+    tasks = []
+    for id in range(start_id, start_id + count):
+        tasks.append(Task(
+            id,
+            " ".join(generator.choices(WORDS, k=generator.randint(1, 4))).capitalize(),
+            " ".join(generator.choices(WORDS, k=generator.randint(3, 40))),
+            now - datetime.timedelta(seconds=generator.randrange(365 * 24 * 3600)),
+            now + datetime.timedelta(seconds=generator.randrange(-30 * 24 * 3600, 365 * 24 * 3600)),
+            generator.random() < 1 / 3,
+        ))
+    return tasks
+
+
+def make_manager(count: int) -> TaskManager:
+    """
+    Builds a TaskManager holding a given number of synthetic tasks.
+
+    Args:
+        count: The number of tasks in the manager.
+
+    Returns:
+        A TaskManager object.
+    """
+    
+    manager = TaskManager()
+    manager.task_list = make_tasks(count)
+    return manager
+
+
+def time_per_call(function, arguments: list) -> float:
+    """
+    Calls a function once per argument and measures the mean time per call.
+
+    Args:
+        function: The function to call.
+        arguments: The arguments to call the function with, one call per argument.
+
+    Returns:
+        The mean time per call in microseconds.
+    """
+    
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1_000_000
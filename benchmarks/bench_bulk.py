@@ -0,0 +1,76 @@
+"""
+Compares loading and saving a JSON database with load_from_file and save_to_file against the
+parallel import_bulk and export_bulk, in tasks per second.
+
+Every format is exported from the same tasks and imported into an empty TaskManager and an empty
+ColumnarTaskManager, which takes each parsed chunk as columns without building Task objects. Next
+to each import is the rate of its share of work left in the main process, adding the parsed chunks,
+which bounds what more workers can reach; on a single CPU the workers only add overhead.
+
+    python -m benchmarks.bench_bulk
+    python -m benchmarks.bench_bulk --size 1000000 --workers 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import generate_tasks
+from task_manager.bulk import FORMATS, read_chunks
+from task_manager.columnar import ColumnarTaskManager, TaskStore
+from task_manager.models import TaskManager
+
+
+def rate(function, count: int) -> float:
+    """Calls a function and returns how many tasks per second it handled, given it handled count tasks."""
+
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+
+def add_chunks(factory, chunks: list) -> None:
+    """Adds chunks parsed by read_chunks to a new task manager built by factory, as import_bulk would."""
+
+    manager = factory()
+    with manager.changes.batch():
+        for chunk in chunks:
+            manager.add_tasks(chunk if isinstance(manager.task_list, TaskStore) else chunk.to_tasks())
+
+
+def main() -> None:
+    """Runs the benchmark."""
+
+    parser = argparse.ArgumentParser(description="bulk import and export benchmark")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    args = parser.parse_args()
+
+    manager = TaskManager()
+    manager.task_list = generate_tasks(args.size)
+    print(f"{args.size} tasks, {args.workers or os.cpu_count()} workers")
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "database.json")
+        saved = rate(lambda: manager.save_to_file(database, sync=False), args.size)
+        print(f"{'save_to_file':<22} {saved:12.0f} tasks/s")
+        for format in FORMATS:
+            filename = os.path.join(directory, f"tasks.{format}")
+            exported = rate(lambda: manager.export_bulk(filename, format, args.workers), args.size)
+            print(f"{'export_bulk ' + format:<22} {exported:12.0f} tasks/s")
+
+        for factory in (TaskManager, ColumnarTaskManager):
+            loaded = rate(lambda: factory().load_from_file(database), args.size)
+            print(f"{factory.__name__:<20} {'load_from_file':<22} {loaded:12.0f} tasks/s")
+            for format in FORMATS:
+                filename = os.path.join(directory, f"tasks.{format}")
+                imported = rate(lambda: factory().import_bulk(filename, format, args.workers), args.size)
+                chunks = list(read_chunks(filename, format, 1))
+                ceiling = rate(lambda: add_chunks(factory, chunks), args.size)
+                print(f"{factory.__name__:<20} {'import_bulk ' + format:<22} {imported:12.0f} tasks/s  main process {ceiling:12.0f} tasks/s")
+            imported = rate(lambda: factory().import_bulk(database, "json", args.workers), args.size)
+            print(f"{factory.__name__:<20} {'import_bulk database':<22} {imported:12.0f} tasks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Stress test and throughput report for several processes sharing one JSON database.
+
+Every process repeatedly opens the database as the CLI does, creates a task of its own, renames an
+existing task and saves, redoing the operation when the save conflicts. Processes either rename a
+task of their own, so that their changes always merge, or all rename the same task, so that they
+keep conflicting. At the end every created task must be there, and the version of every renamed
+task must equal the number of times it was renamed: a lost update would leave it lower.
+
+    python -m benchmarks.bench_concurrency
+"""
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import tempfile
+import time
+
+from task_manager.locking import ConflictError
+from task_manager.storage import open_task_manager
+
+
+def worker(filename: str, number: int, operations: int, target: int) -> int:
+    """Runs one process's operations and returns how many saves conflicted and were redone."""
+
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    conflicts = 0
+    for operation in range(operations):
+        while True:
+            task_manager = open_task_manager("json", filename)
+            try:
+                task_manager.create_task(f"Worker {number} task {operation}", "Description", due_date)
+                task_manager.change_task(target, "title", f"Renamed by {number}.{operation}")
+                task_manager.save()
+                break
+            except ConflictError:
+                conflicts += 1
+            finally:
+                task_manager.close()
+    return conflicts
+
+
+def run(processes: int, operations: int, tasks: int, contended: bool) -> None:
+    """Runs the stress test once and prints its throughput, raising AssertionError if updates were lost."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "database.json")
+        task_manager = open_task_manager("json", filename)
+        due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+        task_manager.create_tasks([(f"Task {i}", "Description", due_date) for i in range(max(tasks, processes))])
+        task_manager.save()
+        task_manager.close()
+
+        # task ids start at 1
+        targets = [1 if contended else number + 1 for number in range(processes)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            conflicts = sum(pool.starmap(worker, [(filename, number, operations, targets[number]) for number in range(processes)]))
+        elapsed = time.perf_counter() - start
+
+        task_manager = open_task_manager("json", filename)
+        total = processes * operations
+        created = [task for task in task_manager.iter_tasks() if task.title.startswith("Worker ")]
+        assert len(created) == total, f"{total - len(created)} created tasks lost"
+        for target in set(targets):
+            renames = targets.count(target) * operations
+            assert task_manager.get_task_by_id(target).version == renames, f"{renames - task_manager.get_task_by_id(target).version} renames lost"
+        task_manager.close()
+    print(f"{processes:>3} processes | {'contended' if contended else ' disjoint'} | {tasks:>7} tasks | {total} operations in {elapsed:6.2f} s | {total / elapsed:8.1f} operations/s | {conflicts} conflicts redone | no lost updates")
+
+
+def main() -> None:
+    """Runs the stress test for every requested number of processes."""
+
+    parser = argparse.ArgumentParser(description="concurrent access stress test")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--operations", type=int, default=50, help="Operations per process")
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks in the database at the start")
+    args = parser.parse_args()
+    for processes in args.processes:
+        for contended in (False, True):
+            run(processes, args.operations, args.tasks, contended)
+
+
+if __name__ == "__main__":
+    main()
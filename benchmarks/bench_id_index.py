@@ -0,0 +1,64 @@
+"""
+Compares looking tasks up by id through the TaskManager id index against the linear scans
+TaskManager used before it had one.
+
+    python -m benchmarks.bench_id_index
+"""
+
+import argparse
+import random
+
+from benchmarks import make_manager, time_per_call
+
+
+def scan_get(manager, id):
+    """Looks a task up by scanning task_list, as get_task_by_id used to."""
+    
+    for task in manager.task_list:
+        if task.id == id:
+            return task
+    raise ValueError("Task with given ID does not exist.")
+
+
+def scan_delete(manager, id):
+    """Deletes a task by building a list of ids and popping, as delete_task used to."""
+    
+    index = [task.id for task in manager.task_list].index(id)
+    return manager.task_list.pop(index)
+
+
+def run(size: int, operations: int) -> None:
+    """Times indexed and linear get/delete at one dataset size and prints a line of results."""
+    
+    manager = make_manager(size)
+    ids = random.sample(range(1, size + 1), operations)
+    manager.get_task_by_id(ids[0])  # build the index outside of the timed section
+
+    indexed_get = time_per_call(manager.get_task_by_id, ids)
+    indexed_complete = time_per_call(manager.complete_task, ids)
+    indexed_delete = time_per_call(manager.delete_task, ids)
+
+    manager = make_manager(size)
+    scan_ids = ids[:max(1, operations // 100)]
+    linear_get = time_per_call(lambda id: scan_get(manager, id), scan_ids)
+    linear_delete = time_per_call(lambda id: scan_delete(manager, id), scan_ids)
+
+    print(f"{size:>9} tasks | get {linear_get:>10.1f} -> {indexed_get:6.2f} us"
+          f" | complete {indexed_complete:6.2f} us"
+          f" | delete {linear_delete:>10.1f} -> {indexed_delete:6.2f} us")
+
+
+def main() -> None:
+    """Runs the benchmark for every requested size."""
+    
+    parser = argparse.ArgumentParser(description="id index microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--operations", type=int, default=1000, help="Indexed operations per size")
+    args = parser.parse_args()
+    print("linear scan -> id index, mean time per operation")
+    for size in args.sizes:
+        run(size, min(args.operations, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures how fast list prints tasks in each output format, and how long reading one page of tasks
+takes depending on how far into the tasks it is.
+
+    python -m benchmarks.bench_list
+    python -m benchmarks.bench_list --size 1000000 --page-size 1000
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks import generate_tasks
+from task_manager.cli import LIST_FORMATS, write_tasks
+from task_manager.models import TaskManager, task_cursor
+
+
+def time_formats(manager: TaskManager) -> None:
+    """Prints every task in every format to the null device and reports the throughput."""
+
+    with open(os.devnull, "w") as output:
+        for format in LIST_FORMATS:
+            start = time.perf_counter()
+            write_tasks(manager.iter_tasks(), format, output)
+            elapsed = time.perf_counter() - start
+            print(f"{format:<8} {len(manager.task_list) / elapsed:12.0f} tasks/s")
+
+
+def time_pages(manager: TaskManager, page_size: int) -> None:
+    """Reads a page at the start, the middle and the end of the tasks, in both orders, and reports how long each took."""
+
+    size = len(manager.task_list)
+    for sort in ("id", "due"):
+        ordered = sorted(manager.task_list, key=(lambda task: task.id) if sort == "id" else (lambda task: (task.due_date, task.id)))
+        # build the indexes outside the timings
+        list(manager.page_tasks(sort, limit=1))
+        for where, position in (("first", None), ("middle", size // 2), ("last", size - page_size - 1)):
+            cursor = None if position is None else task_cursor(ordered[position], sort)
+            start = time.perf_counter()
+            page = list(manager.page_tasks(sort, cursor, page_size))
+            elapsed = time.perf_counter() - start
+            assert len(page) == page_size
+            print(f"sort {sort:<4} {where:<7} page {elapsed * 1_000_000:10.1f} us")
+
+
+def main() -> None:
+    """Runs the benchmark."""
+
+    parser = argparse.ArgumentParser(description="list output and pagination benchmark")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    manager = TaskManager()
+    manager.task_list = generate_tasks(args.size)
+    time_formats(manager)
+    time_pages(manager, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
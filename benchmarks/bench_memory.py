@@ -0,0 +1,65 @@
+"""
+Compares the memory taken by tasks held as Task objects with an instance __dict__ (the layout
+Task had before it used __slots__), as slotted Task objects, and as a columnar TaskStore.
+
+    python -m benchmarks.bench_memory
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks import make_tasks
+from task_manager.columnar import TaskStore
+
+
+class DictTask:
+    """A task with the attributes of Task but without __slots__."""
+    
+    def __init__(self, id, title, description, created_at, due_date, completed):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.created_at = created_at
+        self.due_date = due_date
+        self.completed = completed
+
+
+def measure(build) -> int:
+    """Returns the bytes still allocated by the object build() returns."""
+    
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def run(size: int) -> None:
+    """Measures every layout at one dataset size and prints a line of results."""
+    
+    dict_layout = measure(lambda: [
+        DictTask(task.id, task.title, task.description, task.created_at, task.due_date, task.completed)
+        for task in make_tasks(size)
+    ])
+    slots_layout = measure(lambda: make_tasks(size))
+    columnar_layout = measure(lambda: TaskStore(make_tasks(size)))
+    print(f"{size:>9} tasks | __dict__ {dict_layout / size:6.0f} B/task"
+          f" | __slots__ {slots_layout / size:6.0f} B/task"
+          f" | TaskStore {columnar_layout / size:6.0f} B/task")
+
+
+def main() -> None:
+    """Runs the benchmark for every requested size."""
+    
+    parser = argparse.ArgumentParser(description="task memory layout benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares dashboard queries computed by iterating over Task objects with the same queries run by
+TaskQuery, in plain Python and, when NumPy is installed, vectorized.
+
+The queries are the counts of completed, open and overdue tasks, overdue tasks per day of their due
+date, and the ids of all tasks ordered by due date then creation time. Taking the snapshot is
+timed separately, both from a list of Task objects and from a ColumnarTaskManager's columns.
+
+    python -m benchmarks.bench_query                 # 1M tasks
+    python -m benchmarks.bench_query --size 100000
+"""
+
+import argparse
+import datetime
+import time
+
+from benchmarks import generate_tasks
+from task_manager.columnar import TaskStore
+from task_manager.query import TaskQuery, numpy
+
+
+def timed(function):
+    """Calls a function and returns its result and how many milliseconds it took."""
+
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def with_objects(tasks: list, now: datetime.datetime) -> dict:
+    """Answers the queries by iterating over the Task objects, as dashboards did before TaskQuery."""
+
+    completed = sum(1 for task in tasks if task.completed)
+    overdue = [task for task in tasks if not task.completed and task.due_date < now]
+    per_day = {}
+    for task in overdue:
+        per_day[task.due_date.date()] = per_day.get(task.due_date.date(), 0) + 1
+    return {
+        "summary": {"total": len(tasks), "completed": completed, "open": len(tasks) - completed, "overdue": len(overdue)},
+        "overdue_per_day": dict(sorted(per_day.items())),
+        "sorted": [task.id for task in sorted(tasks, key=lambda task: (task.due_date, task.created_at, task.id))],
+    }
+
+
+def with_query(query: TaskQuery) -> dict:
+    """Answers the queries with TaskQuery."""
+
+    return {
+        "summary": query.summary(),
+        "overdue_per_day": query.group_by("due_day", overdue=True),
+        "sorted": query.sort_by("due_date", "created_at"),
+    }
+
+
+def main() -> None:
+    """Runs the benchmark and checks that every way gives the same answers."""
+
+    parser = argparse.ArgumentParser(description="aggregation query benchmark")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tasks = generate_tasks(args.size)
+    store = TaskStore(tasks)
+    # halfway through the due dates, so that about half the open tasks are overdue
+    now = sorted(task.due_date for task in tasks[:1000])[500]
+
+    expected, elapsed = timed(lambda: with_objects(tasks, now))
+    print(f"{'Task objects':<24} {'-':>12} {elapsed:12.1f} ms")
+    for vectorized in (False, True) if numpy is not None else (False,):
+        name = "TaskQuery, NumPy" if vectorized else "TaskQuery, Python"
+        for source, items in (("tasks", tasks), ("columns", store)):
+            query, built = timed(lambda: TaskQuery(items, now, vectorized))
+            results, elapsed = timed(lambda: with_query(query))
+            assert results == expected, f"{name} from {source} disagrees"
+            print(f"{name + ' from ' + source:<32} snapshot {built:9.1f} ms queries {elapsed:9.1f} ms")
+    if numpy is None:
+        print("NumPy is not installed, the vectorized queries were skipped")
+
+
+if __name__ == "__main__":
+    main()
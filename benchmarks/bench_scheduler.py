@@ -0,0 +1,86 @@
+"""
+Compares finding the tasks to remind of by scanning every task once a minute, as a cron job running
+list would, with ReminderScheduler's heap of reminder times.
+
+It times building the scheduler over every open task, changing due dates with and without a
+scheduler following the changes, and a day of one-minute ticks, checking that both ways remind of
+the same tasks on the ticks where the scan is timed.
+
+    python -m benchmarks.bench_scheduler                 # 1M tasks
+    python -m benchmarks.bench_scheduler --size 100000
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+from benchmarks import generate_tasks
+from task_manager.models import TaskManager
+from task_manager.scheduler import ReminderScheduler
+
+
+LEAD = datetime.timedelta(hours=1)
+TICK = datetime.timedelta(minutes=1)
+
+
+def scan(tasks: list, now: datetime.datetime) -> list[int]:
+    """Finds the tasks whose reminder falls in the minute before now by going through every task."""
+
+    return sorted(task.id for task in tasks if not task.completed and now - TICK < task.due_date - LEAD <= now)
+
+
+def change_due_dates(manager: TaskManager, ids: list[int], now: datetime.datetime) -> float:
+    """Moves the due date of each task by up to a day and returns how many microseconds each change took."""
+
+    generator = random.Random(1)
+    start = time.perf_counter()
+    for id in ids:
+        manager.change_task(id, "due_date", now + datetime.timedelta(minutes=generator.randrange(24 * 60)))
+    return (time.perf_counter() - start) * 1_000_000 / len(ids)
+
+
+def main() -> None:
+    """Runs the benchmark."""
+
+    parser = argparse.ArgumentParser(description="reminder scheduler benchmark")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--changes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    manager = TaskManager()
+    manager.task_list = generate_tasks(args.size)
+    # the tasks are due from a month before to a year after this
+    clock = [datetime.datetime(2030, 1, 1)]
+    open_ids = [task.id for task in manager.task_list if not task.completed]
+    changed = random.Random(0).sample(open_ids, min(args.changes, len(open_ids)))
+
+    without = change_due_dates(manager, changed, clock[0])
+    start = time.perf_counter()
+    scheduler = ReminderScheduler(manager, LEAD, clock=lambda: clock[0])
+    built = time.perf_counter() - start
+    with_scheduler = change_due_dates(manager, changed, clock[0])
+    print(f"build over {len(scheduler)} pending tasks {built * 1000:10.1f} ms")
+    print(f"change_due_date without scheduler {without:10.2f} us with {with_scheduler:10.2f} us")
+
+    # tasks already within the lead of their due date are reminded of at once, which a scan never catches up on
+    print(f"reminded at once {len(scheduler.fire_due()):10}")
+    ticks, reminded, fire_time, scan_time = 24 * 60, 0, 0.0, 0.0
+    for tick in range(ticks):
+        clock[0] += TICK
+        start = time.perf_counter()
+        fired = scheduler.fire_due()
+        fire_time += time.perf_counter() - start
+        reminded += len(fired)
+        # scanning is slow, so it is only timed and checked on every 60th tick
+        if tick % 60 == 0:
+            start = time.perf_counter()
+            expected = scan(manager.task_list, clock[0])
+            scan_time += time.perf_counter() - start
+            assert sorted(id for id, _ in fired) == expected, f"the scheduler disagrees with the scan at tick {tick}"
+    print(f"scan per tick {scan_time / (ticks // 60) * 1000:10.2f} ms")
+    print(f"heap per tick {fire_time / ticks * 1000:10.3f} ms ({reminded} reminders over {ticks} ticks)")
+
+
+if __name__ == "__main__":
+    main()
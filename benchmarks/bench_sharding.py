@@ -0,0 +1,92 @@
+"""
+Compares a single JSON database with ShardedTaskManager, partitioned by id and by month.
+
+For each layout it times loading every task, saving after a single change, which rewrites the whole
+file but only one shard, looking one task up right after opening the database, and the overdue and
+search queries that span every shard.
+
+    python -m benchmarks.bench_sharding
+    python -m benchmarks.bench_sharding --size 1000000 --shards 32
+"""
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from benchmarks import generate_tasks
+from task_manager.models import TaskManager
+from task_manager.sharding import ShardedTaskManager
+from task_manager.storage import JsonStorage
+
+
+def timed(function):
+    """Calls a function and returns its result and how many milliseconds it took."""
+
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(name: str, open_manager, id: int, now: datetime.datetime) -> None:
+    """Times one layout, opening its task manager with open_manager."""
+
+    manager, opened = timed(open_manager)
+    _, looked_up = timed(lambda: manager.get_task_by_id(id))
+    manager = open_manager()
+    _, loaded = timed(lambda: list(manager.iter_tasks()))
+    manager.change_task(id, "title", "Changed")
+    _, saved = timed(manager.save)
+    overdue, overdue_time = timed(lambda: manager.overdue(now))
+    found, search_time = timed(lambda: manager.search("invoice report"))
+    print(
+        f"{name:<18} open+get {opened + looked_up:9.1f} ms  load all {loaded:9.1f} ms  save one change {saved:9.1f} ms  "
+        f"overdue {overdue_time:8.1f} ms ({len(overdue)})  search {search_time:8.1f} ms ({len(found)})"
+    )
+    if hasattr(manager, "close"):
+        manager.close()
+
+
+def main() -> None:
+    """Runs the benchmark."""
+
+    parser = argparse.ArgumentParser(description="sharded storage benchmark")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    tasks = generate_tasks(args.size)
+    now = datetime.datetime(2030, 1, 1)
+    id = args.size // 2
+    with tempfile.TemporaryDirectory() as directory:
+        single = os.path.join(directory, "database.json")
+        manager = TaskManager(JsonStorage(single))
+        manager.task_list = tasks
+        manager.save()
+
+        def open_single():
+            manager = TaskManager(JsonStorage(single))
+            manager.load()
+            return manager
+
+        run("single file", open_single, id, now)
+        for scheme in ("id", "month"):
+            filename = os.path.join(directory, f"database.{scheme}")
+            manager = ShardedTaskManager(filename, args.shards, scheme)
+            manager.load()
+            for task in generate_tasks(args.size):
+                manager.add_task(task)
+            manager.save()
+            manager.close()
+
+            def open_sharded(filename=filename):
+                manager = ShardedTaskManager(filename)
+                manager.load()
+                return manager
+
+            run(f"sharded by {scheme}", open_sharded, id, now)
+
+
+if __name__ == "__main__":
+    main()
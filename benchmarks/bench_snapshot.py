@@ -0,0 +1,58 @@
+"""
+Compares saving and loading a database as indented JSON and as a binary snapshot, and the time
+a LazyTaskManager takes to open the binary snapshot and look up one task.
+
+    python -m benchmarks.bench_snapshot
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import make_manager
+from task_manager.lazy import LazyTaskManager
+from task_manager.models import TaskManager
+
+
+def measure(directory: str, filename: str, manager: TaskManager) -> tuple[float, float, int]:
+    """Returns the seconds taken to save and to load the manager's tasks, and the size of the file."""
+    
+    path = os.path.join(directory, filename)
+    start = time.perf_counter()
+    manager.save_to_file(path)
+    saved = time.perf_counter()
+    TaskManager().load_from_file(path)
+    loaded = time.perf_counter()
+    return saved - start, loaded - saved, os.path.getsize(path)
+
+
+def run(size: int) -> None:
+    """Measures both formats at one dataset size and prints a line of results per format."""
+    
+    manager = make_manager(size)
+    with tempfile.TemporaryDirectory() as directory:
+        for label, filename in (("JSON", "database.json"), ("binary", "database.bin")):
+            save, load, file_size = measure(directory, filename, manager)
+            print(f"{size:>9} tasks | {label:>6} | save {save:7.2f} s | load {load:7.2f} s | {file_size / 1_000_000:8.1f} MB")
+        start = time.perf_counter()
+        lazy = LazyTaskManager(os.path.join(directory, "database.bin"))
+        lazy.load()
+        lazy.get_task_by_id(size // 2)
+        opened = time.perf_counter()
+        lazy.close()
+        print(f"{size:>9} tasks |   lazy | open and get one task {(opened - start) * 1000:7.2f} ms")
+
+
+def main() -> None:
+    """Runs the benchmark for every requested size."""
+    
+    parser = argparse.ArgumentParser(description="snapshot format benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
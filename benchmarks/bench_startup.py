@@ -0,0 +1,86 @@
+"""
+Measures how long the CLI takes to start, and guards against slow imports creeping back into it.
+
+For each command it runs a fresh interpreter several times and reports the fastest wall-clock time,
+then runs it once more under python -X importtime to find the modules it imports. Answering --help,
+or rejecting a mistyped command, must not import the task models, the storage backends, the JSON
+decoder or the socket module; the suite exits with status 1 if one of them is imported, or if a
+startup takes longer than --max-ms.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --max-ms 150
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import generate_tasks
+from task_manager.models import TaskManager
+
+
+# Modules that starting the CLI without running a command must not import
+HEAVY_MODULES = ("task_manager.models", "task_manager.storage", "task_manager.locking", "task_manager.indexes", "json", "socket")
+
+
+def commands(database: str) -> dict:
+    """Returns the command lines to time by name; the first two run no command."""
+
+    return {
+        "--help": ["--help"],
+        "invalid command": ["frobnicate"],
+        "show": ["--database", database, "--no-daemon", "show", "1"],
+        "list": ["--database", database, "--no-daemon", "list"],
+        "complete": ["--database", database, "--no-daemon", "complete", "1"],
+    }
+
+
+def start(argv: list[str], importtime: bool = False) -> tuple[float, str]:
+    """Runs the CLI in a fresh interpreter and returns its wall-clock time in seconds and its standard error."""
+
+    options = ["-X", "importtime"] if importtime else []
+    begin = time.perf_counter()
+    finished = subprocess.run([sys.executable, *options, "-m", "task_manager.cli", *argv], capture_output=True, text=True)
+    return time.perf_counter() - begin, finished.stderr
+
+
+def imported_modules(stderr: str) -> set[str]:
+    """Returns the modules listed in the output of python -X importtime."""
+
+    return {line.rsplit("|", 1)[1].strip() for line in stderr.splitlines() if line.startswith("import time:") and "|" in line}
+
+
+def main() -> None:
+    """Times every command and checks the imports of the ones that run no command."""
+
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command, the fastest of which is reported")
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks in the database the commands run on")
+    parser.add_argument("--max-ms", type=float, help="Fail if a command takes longer than this many milliseconds")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "database.json")
+        manager = TaskManager()
+        manager.task_list = generate_tasks(args.tasks)
+        manager.save_to_file(database)
+        for number, (name, argv) in enumerate(commands(database).items()):
+            elapsed = min(start(argv)[0] for _ in range(args.runs))
+            modules = imported_modules(start(argv, importtime=True)[1])
+            print(f"{name:<16} {elapsed * 1000:8.1f} ms {len(modules):5} modules")
+            if args.max_ms is not None and elapsed * 1000 > args.max_ms:
+                failures.append(f"{name} took {elapsed * 1000:.1f} ms")
+            if number < 2:
+                failures.extend(f"{name} imported {module}" for module in HEAVY_MODULES if module in modules)
+    for failure in failures:
+        print(f"Regression: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
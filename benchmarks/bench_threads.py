@@ -0,0 +1,100 @@
+"""
+Measures the throughput of a ThreadSafeTaskManager used by several threads at once, for several
+mixes of readers and writers, against a TaskManager behind a single mutex.
+
+Readers look tasks up by id and, one time in ten, query the next tasks due; writers rename tasks
+and create and delete tasks. At the end the id index must still find every task.
+
+    python -m benchmarks.bench_threads
+"""
+
+import argparse
+import datetime
+import random
+import threading
+import time
+
+from benchmarks import make_tasks
+from task_manager.locking import ThreadSafeTaskManager
+from task_manager.models import TaskManager
+
+
+class MutexTaskManager(TaskManager):
+    """A TaskManager whose every operation used here runs under one mutex, the baseline."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.mutex = threading.RLock()
+
+    def get_task_by_id(self, id: int):
+        with self.mutex:
+            return super().get_task_by_id(id)
+
+    def next_due(self, count: int, now: datetime.datetime | None = None):
+        with self.mutex:
+            return super().next_due(count, now)
+
+    def change_task(self, task_id: int, selected_task_aspect: str, *args) -> None:
+        with self.mutex:
+            super().change_task(task_id, selected_task_aspect, *args)
+
+    def create_task(self, title: str, description: str, due_date):
+        with self.mutex:
+            return super().create_task(title, description, due_date)
+
+    def delete_task(self, id: int):
+        with self.mutex:
+            return super().delete_task(id)
+
+
+def work(manager: TaskManager, size: int, read_ratio: float, operations: int, seed: int) -> None:
+    """Runs one thread's mix of operations."""
+
+    generator = random.Random(seed)
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for operation in range(operations):
+        if generator.random() < read_ratio:
+            if operation % 10:
+                manager.get_task_by_id(generator.randint(1, size))
+            else:
+                manager.next_due(10)
+        elif operation % 2:
+            manager.change_task(generator.randint(1, size), "title", f"Renamed {operation}")
+        else:
+            manager.delete_task(manager.create_task("Temporary", "Created and deleted", due_date).id)
+
+
+def run(factory, size: int, threads: int, read_ratio: float, operations: int) -> float:
+    """Runs the mix on a fresh task manager and returns the operations per second."""
+
+    manager = factory()
+    manager.task_list = manager.task_list_factory(make_tasks(size))
+    workers = [threading.Thread(target=work, args=(manager, size, read_ratio, operations, seed)) for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    assert all(manager.get_task_by_id(id).id == id for id in range(1, size + 1)), "id index out of sync"
+    return threads * operations / elapsed
+
+
+def main() -> None:
+    """Runs the benchmark for every mix and number of threads."""
+
+    parser = argparse.ArgumentParser(description="thread-safe task manager benchmark")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--read-ratios", type=float, nargs="+", default=[0.5, 0.9, 0.99])
+    parser.add_argument("--operations", type=int, default=20_000, help="Operations per thread")
+    args = parser.parse_args()
+    for read_ratio in args.read_ratios:
+        for threads in args.threads:
+            mutex = run(MutexTaskManager, args.size, threads, read_ratio, args.operations)
+            read_write = run(ThreadSafeTaskManager, args.size, threads, read_ratio, args.operations)
+            print(f"{read_ratio:4.0%} reads | {threads} threads | mutex {mutex:10.0f} ops/s | read-write lock {read_write:10.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark suite for the TaskManager and persistence hot paths, with baselines to catch regressions.
+
+For every dataset size it builds synthetic tasks with generate_tasks and measures create_task,
+get_task_by_id, change_task and delete_task, and save_to_file and load_from_file both as JSON and
+as a binary snapshot. Each case is timed over several rounds, with garbage collection paused as
+timeit does, and reports from its fastest round the throughput in calls per second and the 50th,
+95th and 99th percentiles of its latency, then the peak memory it allocates, measured in one more
+run under tracemalloc so that tracing does not slow down the timed ones.
+
+    python -m benchmarks.suite                                  # 1k, 10k and 100k tasks
+    python -m benchmarks.suite --sizes 1000 1000000             # up to 1M tasks
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+
+With --baseline, the results are compared with a saved run, and the suite exits with status 1 if a
+case got slower, or allocated more memory, by more than the threshold. Baselines only compare
+runs on the same machine; benchmarks/baseline.json holds one for the default sizes.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import generate_tasks
+from task_manager.models import TaskManager
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(latencies: list[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of sorted latencies."""
+
+    return latencies[min(len(latencies) - 1, max(0, round(percent / 100 * len(latencies)) - 1))]
+
+
+def fresh_manager(tasks: list) -> TaskManager:
+    """Returns a TaskManager holding the tasks, with its id index built."""
+
+    manager = TaskManager()
+    manager.task_list = list(tasks)
+    manager.mark_clean()
+    return manager
+
+
+def cases(tasks: list, operations: int, directory: str) -> dict:
+    """
+    Builds the benchmark cases for one dataset.
+
+    Every case is a function that, given a fresh setup, returns the list of calls to time; calls
+    are functions without arguments. Setting up, such as building a task manager or writing the
+    file to load, is not timed.
+    """
+
+    size = len(tasks)
+    ids = random.Random(1).sample(range(1, size + 1), min(operations, size))
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=30)).isoformat()
+    # whole-file cases are repeated fewer times on larger datasets
+    repetitions = max(1, min(5, 100_000 // size))
+
+    def per_task(call):
+        def setup():
+            manager = fresh_manager(tasks)
+            return [lambda id=id: call(manager, id) for id in ids]
+        return setup
+
+    def save(extension):
+        def setup():
+            manager = fresh_manager(tasks)
+            filename = os.path.join(directory, f"save{extension}")
+            return [lambda: manager.save_to_file(filename, sync=False)] * repetitions
+        return setup
+
+    def load(extension):
+        def setup():
+            filename = os.path.join(directory, f"load{extension}")
+            fresh_manager(tasks).save_to_file(filename, sync=False)
+            return [lambda: TaskManager().load_from_file(filename)] * repetitions
+        return setup
+
+    return {
+        "create_task": per_task(lambda manager, id: manager.create_task("New task", "Created by the benchmark", due_date)),
+        "get_task_by_id": per_task(lambda manager, id: manager.get_task_by_id(id)),
+        "change_task": per_task(lambda manager, id: manager.change_task(id, "title", "Renamed task")),
+        "delete_task": per_task(lambda manager, id: manager.delete_task(id)),
+        "save_to_file.json": save(".json"),
+        "load_from_file.json": load(".json"),
+        "save_to_file.bin": save(".bin"),
+        "load_from_file.bin": load(".bin"),
+    }
+
+
+def measure(setup, rounds: int) -> dict:
+    """Times one case over several rounds, then runs it again under tracemalloc, and returns its results."""
+
+    latencies = None
+    for _ in range(rounds):
+        calls = setup()
+        round_latencies = []
+        gc.disable()
+        try:
+            for call in calls:
+                start = time.perf_counter()
+                call()
+                round_latencies.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        if latencies is None or sum(round_latencies) < sum(latencies):
+            latencies = round_latencies
+    latencies.sort()
+
+    calls = setup()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for call in calls:
+        call()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    result = {"ops_per_second": len(latencies) / sum(latencies)}
+    for percent in PERCENTILES:
+        result[f"p{percent}_us"] = percentile(latencies, percent) * 1_000_000
+    result["peak_memory_bytes"] = peak
+    return result
+
+
+def run(sizes: list[int], operations: int, rounds: int) -> dict:
+    """Runs every case at every size, printing a line per case, and returns the results by "case@size"."""
+
+    results = {}
+    print(f"{'case':<22} {'tasks':>9} {'ops/s':>12} {'p50 us':>11} {'p95 us':>11} {'p99 us':>11} {'peak MB':>9}")
+    for size in sizes:
+        tasks = generate_tasks(size)
+        with tempfile.TemporaryDirectory() as directory:
+            for name, setup in cases(tasks, operations, directory).items():
+                result = results[f"{name}@{size}"] = measure(setup, rounds)
+                print(
+                    f"{name:<22} {size:>9} {result['ops_per_second']:>12.1f}"
+                    + "".join(f" {result[f'p{percent}_us']:>11.1f}" for percent in PERCENTILES)
+                    + f" {result['peak_memory_bytes'] / 1_000_000:>9.1f}"
+                )
+    return results
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares results with a baseline.
+
+    A case regressed if its throughput fell, or its peak memory grew, by more than threshold, a
+    fraction of the baseline value. Cases missing from either side are not compared. Peak memory
+    below 64 kB is too small to compare meaningfully and is ignored.
+    """
+
+    found = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if result["ops_per_second"] < before["ops_per_second"] * (1 - threshold):
+            found.append(f"{key}: {result['ops_per_second']:.1f} ops/s, baseline {before['ops_per_second']:.1f} ops/s")
+        if max(result["peak_memory_bytes"], before["peak_memory_bytes"]) >= 64 * 1024 and result["peak_memory_bytes"] > before["peak_memory_bytes"] * (1 + threshold):
+            found.append(f"{key}: {result['peak_memory_bytes']} bytes peak, baseline {before['peak_memory_bytes']} bytes")
+    return found
+
+
+def main() -> None:
+    """Runs the suite, then saves the results as a baseline or compares them with one."""
+
+    parser = argparse.ArgumentParser(description="TaskManager benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=1000, help="Calls timed per single-task case")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per case, the fastest of which is reported")
+    parser.add_argument("--save-baseline", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", type=str, help="Compare the results with this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tolerated slowdown or memory growth, as a fraction")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.operations, args.rounds)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+        print(f"Saved the baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        found = regressions(results, baseline, args.threshold)
+        for regression in found:
+            print(f"Regression: {regression}")
+        if found:
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
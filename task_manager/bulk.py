@@ -0,0 +1,327 @@
+import collections
+import concurrent.futures
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+
+from task_manager.columnar import TaskStore
+from task_manager.models import RECORD_END, Task, replace_atomically, to_epoch_microseconds
+
+
+# The formats tasks can be imported from and exported to
+FORMATS = ("json", "ndjson", "csv")
+# The format of a file by its extension; any other file is taken to be JSON
+EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+# The columns of a CSV file, in the order they are exported
+CSV_FIELDS = ("id", "title", "description", "created_at", "due_date", "completed", "version")
+# How many chunks each worker process is given ahead, bounding how many are held at once
+CHUNKS_PER_WORKER = 2
+
+
+def guess_format(filename, format: str | None = None) -> str:
+    """
+    Picks the format of a file, from its extension unless it is given.
+
+    Args:
+        filename: The name of the file, or a stream, which is taken to be JSON.
+        format: The format, if given.
+
+    Returns:
+        "json", "ndjson" or "csv".
+
+    Raises:
+        ValueError: If the format is not one of FORMATS.
+    """
+
+    if format is None:
+        extension = os.path.splitext(filename)[1].lower() if isinstance(filename, str) else ""
+        format = EXTENSIONS.get(extension, "json")
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+    return format
+
+
+def record_boundary(text: str, format: str) -> int:
+    """
+    Finds where the last complete record of a piece of a file ends.
+
+    Args:
+        text: The piece of the file, starting at the start of a record.
+        format: The format of the file.
+
+    Returns:
+        The offset just after the last complete record, or 0 if there is none.
+    """
+
+    if format == "ndjson":
+        return text.rfind("\n") + 1
+    if format == "csv":
+        # a newline inside a quoted field is preceded by an odd number of quotes
+        quotes = text.count('"')
+        end = len(text)
+        while (newline := text.rfind("\n", 0, end)) >= 0:
+            quotes -= text.count('"', newline, end)
+            if not quotes % 2:
+                return newline + 1
+            end = newline
+        return 0
+    window = 4096
+    while True:
+        start = max(0, len(text) - window)
+        last = None
+        for last in RECORD_END.finditer(text, start):
+            pass
+        if last is not None:
+            return last.end()
+        if start == 0:
+            return 0
+        window *= 16
+
+
+def split_file(file, format: str, chunk_size: int = 1024 * 1024):
+    """
+    Reads a file in chunks of whole records.
+
+    Args:
+        file: The file, opened for reading text, positioned at the first record.
+        format: The format of the file.
+        chunk_size: How many characters to read at once. A chunk is cut at the last record that
+            ends in what was read, and holds a single record if that is longer.
+
+    Yields:
+        The character offset of each chunk, relative to where reading started, and its text.
+    """
+
+    rest = ""
+    offset = 0
+    while block := file.read(chunk_size):
+        text = rest + block
+        cut = record_boundary(text, format)
+        if cut:
+            yield offset, text[:cut]
+            offset += cut
+        rest = text[cut:]
+    if rest.strip():
+        yield offset, rest
+
+
+def _csv_record(header: list[str], row: list[str]) -> dict:
+    """
+    Converts a CSV row to a task dictionary, as from Task.to_dict.
+
+    Args:
+        header: The column names.
+        row: The fields of the row.
+
+    Returns:
+        The dictionary.
+
+    Raises:
+        KeyError: If a column is missing.
+        ValueError: If a field is not valid.
+    """
+
+    data = dict(zip(header, row))
+    data["id"] = int(data["id"])
+    data["completed"] = data["completed"].lower() in ("true", "1")
+    data["version"] = int(data.get("version") or 0)
+    return data
+
+
+def parse_chunk(text: str, format: str, offset: int = 0, header: list[str] | None = None) -> TaskStore:
+    """
+    Parses a chunk of whole records, as cut by split_file, into columns. Runs in a worker process.
+
+    Args:
+        text: The chunk.
+        format: The format of the file.
+        offset: The character offset of the chunk, for error messages.
+        header: The column names of a CSV file.
+
+    Returns:
+        A TaskStore holding the chunk's tasks, in order.
+
+    Raises:
+        ValueError: If a record is not a valid task.
+    """
+
+    try:
+        if format == "ndjson":
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        elif format == "csv":
+            records = [_csv_record(header, row) for row in csv.reader(io.StringIO(text)) if row]
+        else:
+            # the chunk holds the records of the array, maybe with its brackets, separated by commas
+            body = text.strip("[], \t\r\n")
+            records = json.loads(f"[{body}]")
+    except (KeyError, ValueError) as error:
+        raise ValueError(f"Invalid record in the chunk at offset {offset}: {error}") from error
+    try:
+        return TaskStore.from_columns(
+            [data["id"] for data in records],
+            [data["title"] for data in records],
+            [data["description"] for data in records],
+            [to_epoch_microseconds(datetime.datetime.fromisoformat(data["created_at"])) for data in records],
+            [to_epoch_microseconds(datetime.datetime.fromisoformat(data["due_date"])) for data in records],
+            [data["completed"] for data in records],
+            [data.get("version", 0) for data in records],
+        )
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        failure = error
+    # the columns are built a whole chunk at a time, so the invalid record is looked for one record at a time
+    for number, data in enumerate(records):
+        try:
+            TaskStore([Task.from_dict(data)])
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Invalid task {number + 1} of the chunk at offset {offset}: {error!r}") from error
+    raise ValueError(f"Invalid tasks in the chunk at offset {offset}: {failure!r}") from failure
+
+
+def format_chunk(store: TaskStore, format: str) -> str:
+    """
+    Formats a chunk of tasks. Runs in a worker process.
+
+    Args:
+        store: The tasks.
+        format: The format to write them in.
+
+    Returns:
+        One record per line; JSON records are separated by commas, without one after the last.
+    """
+
+    tasks = store.to_tasks()
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(
+            (task.id, task.title, task.description, task.created_at.isoformat(), task.due_date.isoformat(), "true" if task.completed else "false", task.version)
+            for task in tasks
+        )
+        return buffer.getvalue()
+    lines = [json.dumps(task.to_dict()) for task in tasks]
+    if format == "ndjson":
+        return "".join(f"{line}\n" for line in lines)
+    return ",\n".join(lines)
+
+
+def map_in_order(function, arguments, workers: int | None = None):
+    """
+    Calls a function with each tuple of arguments in worker processes, a few calls ahead of the caller.
+
+    At most CHUNKS_PER_WORKER calls per worker are submitted before their results are taken, so a
+    slow caller does not let results pile up.
+
+    Args:
+        function: A module-level function, so that it can be sent to the workers.
+        arguments: An iterable of argument tuples.
+        workers: How many worker processes to start, one per CPU by default; with 1 the function is
+            called in this process.
+
+    Yields:
+        The results, in the order of the arguments.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for args in arguments:
+            yield function(*args)
+        return
+    executor = concurrent.futures.ProcessPoolExecutor(workers)
+    try:
+        pending = collections.deque()
+        for args in arguments:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= CHUNKS_PER_WORKER * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def read_chunks(filename: str, format: str | None = None, workers: int | None = None, chunk_size: int = 1024 * 1024):
+    """
+    Reads the tasks of a JSON, NDJSON or CSV file, parsing chunks of it in worker processes.
+
+    A JSON file must hold an array of task objects with a line break somewhere after each of them,
+    as save_to_file and export write them; one written on a single line is parsed as one chunk.
+    A CSV file starts with a header naming its columns, see CSV_FIELDS.
+
+    Args:
+        filename: The name of the file.
+        format: The format of the file, guessed from its extension by default.
+        workers: How many worker processes to parse with, see map_in_order.
+        chunk_size: About how many characters make a chunk.
+
+    Yields:
+        A TaskStore per chunk, in the order of the file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If a record is not a valid task.
+    """
+
+    format = guess_format(filename, format)
+    with open(filename, "r", newline="") as file:
+        header = None
+        if format == "csv":
+            header = next(csv.reader([file.readline()]), None)
+            if header is None:
+                return
+        chunks = ((text, format, offset, header) for offset, text in split_file(file, format, chunk_size))
+        yield from map_in_order(parse_chunk, chunks, workers)
+
+
+def write_chunks(tasks, filename, format: str | None = None, workers: int | None = None, chunk_size: int = 10_000) -> int:
+    """
+    Writes tasks to a JSON, NDJSON or CSV file, formatting chunks of them in worker processes.
+
+    A file is written under a temporary name and replaces the previous one once it is complete.
+
+    Args:
+        tasks: An iterable of Task objects.
+        filename: The name of the file, or a text stream to write to.
+        format: The format to write, guessed from the file's extension by default.
+        workers: How many worker processes to format with, see map_in_order.
+        chunk_size: How many tasks make a chunk.
+
+    Returns:
+        The number of tasks written.
+    """
+
+    format = guess_format(filename, format)
+    count = 0
+
+    def chunks():
+        nonlocal count
+        iterator = iter(tasks)
+        while chunk := list(itertools.islice(iterator, chunk_size)):
+            count += len(chunk)
+            yield TaskStore(chunk), format
+
+    def write(file) -> None:
+        if format == "csv":
+            csv.writer(file, lineterminator="\n").writerow(CSV_FIELDS)
+        elif format == "json":
+            file.write("[\n")
+        separator = ""
+        for text in map_in_order(format_chunk, chunks(), workers):
+            if format == "json":
+                file.write(separator)
+                separator = ",\n"
+            file.write(text)
+        if format == "json":
+            file.write("\n]\n" if separator else "]\n")
+
+    if not isinstance(filename, str):
+        write(filename)
+        return count
+
+    def write_file(temporary_filename: str) -> None:
+        with open(temporary_filename, "w", newline="") as file:
+            write(file)
+
+    replace_atomically(filename, write_file)
+    return count
@@ -1,61 +1,589 @@
 import argparse
-from models import TaskManager
+import datetime
+import io
+import itertools
+import os
+import sys
+import time
+# Only what parsing the command line needs is imported up front: the task models, the storage
+# backends and the daemon client are imported once a command needs them, which keeps --help and
+# mistyped commands fast
+from task_manager.paths import DATABASE, SNAPSHOT_DATABASE, SQLITE_DATABASE, STORAGES, daemon_socket_path
 
-task_manager = TaskManager()
-parser = argparse.ArgumentParser(description="Task Manager CLI")
+# Commands that change the tasks, and so have to be saved
+CHANGES = ("add", "remove", "edit", "complete", "migrate", "rebalance", "batch", "import")
+# How many times a change is tried when other processes keep saving conflicting changes
+CONFLICT_RETRIES = 5
+# The ways list can print tasks
+LIST_FORMATS = ("full", "table", "ndjson", "count")
+# The orders list can page through tasks in, as task_manager.models.SORT_ORDERS, which is not imported to keep startup fast
+SORT_ORDERS = ("id", "due")
+# How many lines list formats before writing them out at once
+WRITE_BUFFER_LINES = 1024
+# The formats import and export read and write, as task_manager.bulk.FORMATS, which is not imported to keep startup fast
+BULK_FORMATS = ("json", "ndjson", "csv")
 
-task_manager.load_from_file()
 
-subparsers = parser.add_subparsers(dest="command")
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser.
 
-# ----------------ADD--------------
-add_parser = subparsers.add_parser("add", help="Add a new task")
-add_parser.add_argument("title", type=str, help="Title of the task")
-add_parser.add_argument("description", type=str, help="Description of the task")
-add_parser.add_argument("due_date", type=str, help="Due date in format YYYY-MM-DD")
+    Returns:
+        The ArgumentParser for the CLI.
+    """
 
+    parser = argparse.ArgumentParser(description="Task Manager CLI")
+    parser.add_argument("--storage", choices=STORAGES, default="json", help="Storage backend: json rewrites the whole file on every command, log appends each change to a log, sqlite keeps tasks in an SQLite database, lazy reads tasks from a binary snapshot only as they are needed, sharded partitions tasks across several JSON files")
+    parser.add_argument("--database", type=str, help=f"Path of the database file, {DATABASE}, {SQLITE_DATABASE} or {SNAPSHOT_DATABASE} by default")
+    parser.add_argument("--no-daemon", action="store_true", help="Run the command in this process even if a daemon is serving the database")
+    parser.add_argument("--profile", action="store_true", help="Run the command in this process and print to standard error where its time went: loading, the command itself and saving")
 
-# ------------REMOVE---------------
-remove_parser = subparsers.add_parser("remove", help="Remove a task")
-remove_parser.add_argument("id", type=int, help="ID of the task to remove")
+    subparsers = parser.add_subparsers(dest="command")
 
+    # ----------------ADD--------------
+    add_parser = subparsers.add_parser("add", help="Add a new task")
+    add_parser.add_argument("title", type=str, help="Title of the task")
+    add_parser.add_argument("description", type=str, help="Description of the task")
+    add_parser.add_argument("due_date", type=str, help="Due date in format YYYY-MM-DD")
 
-# ------------EDIT-----------------
-edit_parser = subparsers.add_parser("edit", help="Edit an existing task")
-edit_parser.add_argument("id", type=int, help="ID of the task to edit")
-edit_parser.add_argument("--aspect", type=str, help="Which setting of a task to change for example: cli.py edit 6 'title' ...")
-edit_parser.add_argument("--title", type=str, help="New title of the task")
-edit_parser.add_argument("--description", type=str, help="New description of the task")
-edit_parser.add_argument("--due_date", type=str, help="New due date in format YYYY-MM-DD")
 
-# ------------LIST-----------------
-list_parser = subparsers.add_parser("list", help="List all tasks")
+    # ------------REMOVE---------------
+    remove_parser = subparsers.add_parser("remove", help="Remove a task")
+    remove_parser.add_argument("id", type=int, help="ID of the task to remove")
 
 
-# -----------COMPLETE---------------
-complete_parser = subparsers.add_parser("complete", help="Complete a task")
-complete_parser.add_argument("id", type=int, help="ID of the task to mark as complete")
+    # ------------EDIT-----------------
+    edit_parser = subparsers.add_parser("edit", help="Edit an existing task")
+    edit_parser.add_argument("id", type=int, help="ID of the task to edit")
+    edit_parser.add_argument("--title", type=str, help="New title of the task")
+    edit_parser.add_argument("--description", type=str, help="New description of the task")
+    edit_parser.add_argument("--due_date", type=str, help="New due date in format YYYY-MM-DD")
 
+    # ------------LIST-----------------
+    list_parser = subparsers.add_parser("list", help="List all tasks")
+    list_parser.add_argument("--due-before", type=datetime.datetime.fromisoformat, help="Only list tasks due before this date, in format YYYY-MM-DD")
+    list_parser.add_argument("--due-after", type=datetime.datetime.fromisoformat, help="Only list tasks due on or after this date, in format YYYY-MM-DD")
+    list_parser.add_argument("--overdue", action="store_true", help="Only list tasks that are past their due date and not completed")
+    list_parser.add_argument("--format", choices=LIST_FORMATS, default="full", help="full prints every field of every task, table one line per task, ndjson one JSON object per task, count only the number of tasks")
+    list_parser.add_argument("--sort", choices=SORT_ORDERS, help="List tasks by id or by due date, in pages that --cursor resumes; by id, or by due date when filtering by due date, if --limit or --cursor is given")
+    list_parser.add_argument("--limit", type=int, help="List at most this many tasks, then the cursor of the next page")
+    list_parser.add_argument("--cursor", type=str, help="Resume listing after the last task of a previous page")
 
-args = parser.parse_args()
 
+    # ------------SHOW-----------------
+    show_parser = subparsers.add_parser("show", help="Show a single task")
+    show_parser.add_argument("id", type=int, help="ID of the task to show")
 
-# -----------LOGIC-------------------
-if args.command == "add":
-    # Call the function to add a task
-    task_manager.create_task(args.title, args.description, args.due_date)
-elif args.command == "remove":
-    # Call the function to remove a task
-    task_manager.delete_task(args.id)
-elif args.command == "edit":
-    # Call the function to edit a task
-    task_manager.change_task(args.id,args.aspect, args.title, args.description, args.due_date)
-elif args.command == "list":
-    # Call the function to list all tasks
-    task_manager.list_tasks()
-elif args.command == "complete":
-    # Call the function to complete a task
-    task_manager.complete_task(args.id)
 
+    # ------------SEARCH---------------
+    search_parser = subparsers.add_parser("search", help="Search the titles and descriptions of tasks")
+    search_parser.add_argument("query", type=str, help="Words to look for, for example: cli.py search 'invoice* OR report'")
 
-task_manager.save_to_file()
+
+    # -----------COMPLETE---------------
+    complete_parser = subparsers.add_parser("complete", help="Complete a task")
+    complete_parser.add_argument("id", type=int, help="ID of the task to mark as complete")
+
+
+    # -----------MIGRATE----------------
+    migrate_parser = subparsers.add_parser("migrate", help="Copy the tasks of a JSON database into the SQLite database")
+    migrate_parser.add_argument("source", type=str, nargs="?", default=DATABASE, help="JSON database to copy the tasks from")
+
+
+    # -----------REBALANCE--------------
+    rebalance_parser = subparsers.add_parser("rebalance", help="Move the tasks of a sharded database to another number of shards or partitioning")
+    rebalance_parser.add_argument("--shards", type=int, default=8, help="Number of shards to partition tasks into by id")
+    rebalance_parser.add_argument("--by", choices=("id", "month"), default="id", help="Partition tasks by id, or by the month they are due in")
+
+
+    # -----------BATCH------------------
+    batch_parser = subparsers.add_parser("batch", help="Apply operations read as JSON lines, saving once at the end")
+    batch_parser.add_argument("file", type=str, nargs="?", default="-", help='File to read the operations from, standard input by default; one per line, for example: {"op": "add", "title": ..., "description": ..., "due_date": ...}, {"op": "edit", "id": 3, "title": ...}, {"op": "complete", "id": 3} or {"op": "remove", "id": 3}')
+
+
+    # -----------IMPORT-----------------
+    import_parser = subparsers.add_parser("import", help="Add the tasks of a JSON, NDJSON or CSV file, parsing it in parallel")
+    import_parser.add_argument("file", type=str, help="File to read the tasks from; tasks keep their ids")
+    import_parser.add_argument("--format", choices=BULK_FORMATS, help="Format of the file, guessed from its extension by default")
+    import_parser.add_argument("--workers", type=int, help="Number of processes parsing the file, one per CPU by default")
+    import_parser.add_argument("--chunk-size", type=int, default=1024 * 1024, help="Number of characters of the file each process parses at once")
+
+
+    # -----------EXPORT-----------------
+    export_parser = subparsers.add_parser("export", help="Write every task to a JSON, NDJSON or CSV file, formatting them in parallel")
+    export_parser.add_argument("file", type=str, nargs="?", default="-", help="File to write the tasks to, standard output by default")
+    export_parser.add_argument("--format", choices=BULK_FORMATS, help="Format of the file, guessed from its extension by default, json for standard output")
+    export_parser.add_argument("--workers", type=int, help="Number of processes formatting the tasks, one per CPU by default")
+    export_parser.add_argument("--chunk-size", type=int, default=10_000, help="Number of tasks each process formats at once")
+
+    return parser
+
+
+def list_filter(args: argparse.Namespace, now: datetime.datetime):
+    """
+    Builds the predicate selecting the tasks a list command asks for.
+
+    Args:
+        args: The parsed list command.
+        now: The current datetime, for --overdue.
+
+    Returns:
+        A function taking a Task object and returning whether to list it.
+    """
+
+    def matches(task):
+        return ((args.due_after is None or task.due_date >= args.due_after)
+                and (args.due_before is None or task.due_date < args.due_before)
+                and (not args.overdue or (not task.completed and task.due_date < now)))
+
+    return matches
+
+
+def write_tasks(tasks, format: str = "full", output=None):
+    """
+    Prints tasks in one of LIST_FORMATS, formatting them a buffer of lines at a time.
+
+    Args:
+        tasks: An iterable of Task objects.
+        format: "full" for str(task), "table" for one line per task, "ndjson" for one JSON object per
+            line, "count" for just the number of tasks.
+        output: The stream to write to, standard output by default.
+
+    Returns:
+        The number of tasks and the last one, or None if there were none.
+    """
+
+    output = output or sys.stdout
+    count, last = 0, None
+    if format == "count":
+        for last in tasks:
+            count += 1
+        output.write(f"{count}\n")
+        return count, last
+    if format == "ndjson":
+        import json
+
+        def line(task):
+            return json.dumps(task.to_dict()) + "\n"
+    elif format == "table":
+        output.write(f"{'id':>8}  {'due':<16}  done  title\n")
+
+        def line(task):
+            return f"{task.id:>8}  {task.due_date.isoformat(' ', 'minutes')}  {'yes ' if task.completed else 'no  '}  {task.title}\n"
+    else:
+        def line(task):
+            return f"{task}\n"
+    lines = []
+    for last in tasks:
+        lines.append(line(last))
+        if len(lines) == WRITE_BUFFER_LINES:
+            count += len(lines)
+            output.write("".join(lines))
+            lines.clear()
+    count += len(lines)
+    output.write("".join(lines))
+    return count, last
+
+
+def list_tasks(task_manager, args: argparse.Namespace, output=None) -> None:
+    """
+    Runs a list command against a task manager.
+
+    Without --limit, --cursor or --sort the tasks come in the order the task manager keeps them, or
+    by due date when filtering by due date. Otherwise they are listed a page at a time through
+    TaskManager.page_tasks, and when more tasks follow the page the cursor resuming after it is
+    printed last, as "Next page: --cursor <cursor>", or as {"next_cursor": <cursor>} in NDJSON. One
+    task more than the limit is read to tell, so the last page has no cursor even when it is full.
+
+    Args:
+        task_manager: The TaskManager to list the tasks of.
+        args: The parsed list command.
+        output: The stream to write to, standard output by default.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+
+    output = output or sys.stdout
+    now = datetime.datetime.now()
+    filtered = args.overdue or args.due_before or args.due_after
+    if args.limit is None and args.cursor is None and args.sort is None:
+        # Call the function to list all tasks, going through the due date index when filtering by due date
+        if args.overdue:
+            tasks = filter(list_filter(args, now), task_manager.overdue(now))
+        elif filtered:
+            tasks = task_manager.tasks_due_between(args.due_after, args.due_before)
+        else:
+            tasks = task_manager.iter_tasks()
+        write_tasks(tasks, args.format, output)
+        return
+    sort = args.sort or ("due" if filtered else "id")
+    due_before = min(args.due_before or now, now) if args.overdue else args.due_before
+    limit = None if args.limit is None else args.limit + 1
+    tasks = iter(task_manager.page_tasks(sort, args.cursor, limit, args.due_after, due_before, False if args.overdue else None))
+    count, last = write_tasks(itertools.islice(tasks, args.limit), args.format, output)
+    if args.limit is not None and next(tasks, None) is not None and last is not None and args.format != "count":
+        from task_manager.models import task_cursor
+
+        cursor = task_cursor(last, sort)
+        if args.format == "ndjson":
+            import json
+
+            output.write(json.dumps({"next_cursor": cursor}) + "\n")
+        else:
+            output.write(f"Next page: --cursor {cursor}\n")
+
+
+def edit_task(task_manager, id: int, title: str | None = None, description: str | None = None, due_date: str | None = None, completed: bool | None = None) -> None:
+    """
+    Changes the given aspects of a task, leaving the others as they are.
+
+    Args:
+        task_manager: The TaskManager holding the task.
+        id: The ID of the task to edit.
+        title: The new title, if it changes.
+        description: The new description, if it changes.
+        due_date: The new due date in ISO format, if it changes.
+        completed: The new completion state, if it changes.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the task does not exist or a new value is invalid.
+    """
+
+    from task_manager.models import check_change
+
+    changes = [("title", title), ("description", description), ("due_date", due_date), ("complete_task", completed)]
+    changes = [(aspect, value) for aspect, value in changes if value is not None]
+    # every new value is checked before the task is changed, so that a bad one leaves it as it was
+    task_manager.get_task_by_id(id)
+    changes = [(aspect, datetime.datetime.fromisoformat(value) if aspect == "due_date" else value) for aspect, value in changes]
+    for aspect, value in changes:
+        check_change(aspect, value)
+    for aspect, value in changes:
+        task_manager.change_task(id, aspect, value)
+
+
+def parse_batch_line(line: str) -> dict:
+    """
+    Decodes and checks one line of a batch.
+
+    Args:
+        line: The JSON line.
+
+    Returns:
+        The operation, a dictionary with an "op" key. The due date of an "add" is parsed into a datetime.
+
+    Raises:
+        ValueError: If the line is not a valid operation, or a field has the wrong type.
+    """
+
+    import json
+
+    try:
+        operation = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid JSON: {error}")
+    if not isinstance(operation, dict):
+        raise ValueError("Expected a JSON object")
+    op = operation.get("op")
+    if op == "add":
+        for field in ("title", "description", "due_date"):
+            if not isinstance(operation.get(field), str):
+                raise ValueError(f"add needs a string {field}")
+        operation["due_date"] = datetime.datetime.fromisoformat(operation["due_date"])
+        if operation["due_date"] < datetime.datetime.now():
+            raise ValueError("Due time cannot be set to the past")
+    elif op in ("edit", "complete", "remove"):
+        if not isinstance(operation.get("id"), int) or isinstance(operation["id"], bool):
+            raise ValueError(f"{op} needs an integer id")
+        if op == "edit":
+            for field in ("title", "description", "due_date"):
+                if operation.get(field) is not None and not isinstance(operation[field], str):
+                    raise ValueError(f"edit needs a string {field}")
+            if operation.get("completed") is not None and not isinstance(operation["completed"], bool):
+                raise ValueError("edit needs a boolean completed")
+            if operation.get("due_date") is not None:
+                datetime.datetime.fromisoformat(operation["due_date"])
+    else:
+        raise ValueError(f"Unknown op {op!r}")
+    return operation
+
+
+def run_batch(task_manager, lines, output=None) -> int:
+    """
+    Applies operations given as JSON lines to a task manager. Does not save the task manager.
+
+    A line that is invalid or fails is reported to output with its line number and skipped, and the
+    rest of the batch is still applied. Runs of consecutive adds are created together with
+    TaskManager.create_tasks.
+
+    Args:
+        task_manager: The TaskManager to apply the operations to.
+        lines: An iterable of JSON lines, such as an open file.
+        output: The stream errors and the summary are written to, standard output by default.
+
+    Returns:
+        The number of operations applied.
+    """
+
+    output = output or sys.stdout
+    applied = total = 0
+    adds = []
+
+    def create_pending():
+        nonlocal applied
+        if adds:
+            applied += len(task_manager.create_tasks(adds))
+            adds.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        total += 1
+        try:
+            operation = parse_batch_line(line)
+            if operation["op"] == "add":
+                adds.append((operation["title"], operation["description"], operation["due_date"]))
+                continue
+            create_pending()
+            if operation["op"] == "edit":
+                edit_task(task_manager, operation["id"], operation.get("title"), operation.get("description"), operation.get("due_date"), operation.get("completed"))
+            elif operation["op"] == "complete":
+                task_manager.complete_task(operation["id"])
+            else:
+                task_manager.delete_task(operation["id"])
+            applied += 1
+        except ValueError as error:
+            print(f"Line {line_number}: {error}", file=output)
+    create_pending()
+    print(f"Applied {applied} of {total} operations", file=output)
+    return applied
+
+
+def run(task_manager, args: argparse.Namespace, output=None, input=None) -> None:
+    """
+    Runs one parsed command against a task manager. Does not save the task manager.
+
+    Args:
+        task_manager: The TaskManager to run the command against.
+        args: The parsed command line.
+        output: The stream the command's output is written to, standard output by default.
+        input: The stream a batch reads from instead of a file, standard input by default.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the command fails, for example because a task does not exist.
+    """
+
+    output = output or sys.stdout
+    if args.command == "add":
+        # Call the function to add a task
+        task_manager.create_task(args.title, args.description, args.due_date)
+    elif args.command == "remove":
+        # Call the function to remove a task
+        task_manager.delete_task(args.id)
+    elif args.command == "edit":
+        # Call the function to edit a task
+        edit_task(task_manager, args.id, args.title, args.description, args.due_date)
+    elif args.command == "list":
+        # Call the function to list tasks, in the chosen format and page
+        list_tasks(task_manager, args, output)
+    elif args.command == "show":
+        # Call the function to look a task up
+        print(task_manager.get_task_by_id(args.id), file=output)
+    elif args.command == "search":
+        # Call the function to search tasks
+        for task in task_manager.search(args.query):
+            print(task, file=output)
+    elif args.command == "complete":
+        # Call the function to complete a task
+        task_manager.complete_task(args.id)
+    elif args.command == "migrate":
+        # Copy a JSON database into the SQLite database
+        if not hasattr(task_manager, "import_json"):
+            raise ValueError("migrate needs --storage sqlite")
+        print(f"Imported {task_manager.import_json(args.source)} tasks from {args.source}", file=output)
+    elif args.command == "rebalance":
+        # Move the tasks of a sharded database to a new layout
+        if not hasattr(task_manager, "rebalance"):
+            raise ValueError("rebalance needs --storage sharded")
+        layout = f"{args.shards} shards by id" if args.by == "id" else "shards by month"
+        print(f"Moved {task_manager.rebalance(args.shards, args.by)} tasks to {layout}", file=output)
+    elif args.command == "import":
+        # Add the tasks of a file, then let the caller save once
+        start = time.perf_counter()
+        count = task_manager.import_bulk(args.file, args.format, args.workers, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"Imported {count} tasks from {args.file} in {elapsed:.2f} s ({count / elapsed if elapsed else 0:.0f} tasks/s)", file=output)
+    elif args.command == "export":
+        # Write every task to a file, or to the output
+        start = time.perf_counter()
+        count = task_manager.export_bulk(output if args.file == "-" else args.file, args.format, args.workers, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        # the tasks themselves may be on the output
+        target = "standard output" if args.file == "-" else args.file
+        print(f"Exported {count} tasks to {target} in {elapsed:.2f} s ({count / elapsed if elapsed else 0:.0f} tasks/s)", file=sys.stderr if args.file == "-" else output)
+    elif args.command == "batch":
+        # Apply every operation of the batch, then let the caller save once
+        if args.file == "-":
+            run_batch(task_manager, input or sys.stdin, output)
+        else:
+            with open(args.file, "r") as file:
+                run_batch(task_manager, file, output)
+
+
+def send_to_daemon(path: str, argv: list[str], input: str | None = None) -> dict | None:
+    """
+    Sends a command line to the daemon listening on a Unix socket and waits for its reply.
+
+    Args:
+        path: The path of the daemon's socket.
+        argv: The command line arguments, as given to the CLI.
+        input: The input of a batch command, if any, which the daemon reads instead of its file.
+
+    Returns:
+        The daemon's reply, with "status", "output" and "error", or None if no daemon is listening.
+        Once connected, the command is never run again here: if the connection fails while sending it
+        or waiting for the reply, the daemon may have run it, so the reply is an error saying so.
+    """
+
+    if not os.path.exists(path):
+        return None
+    import json
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            connection.connect(path)
+        except OSError:
+            return None
+        request = {"argv": argv} if input is None else {"argv": argv, "input": input}
+        try:
+            connection.sendall(json.dumps(request).encode() + b"\n")
+            with connection.makefile("rb") as reply:
+                line = reply.readline()
+            return json.loads(line)
+        except OSError as error:
+            failure = str(error)
+        except ValueError:
+            failure = "it closed the connection" if not line else "its reply is not valid JSON"
+    finally:
+        connection.close()
+    return {"status": 1, "output": "", "error": f"Lost the daemon at {path} after sending the command, which may or may not have run: {failure}"}
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Runs the CLI.
+
+    The command is forwarded to the daemon serving the database if one is running, see
+    task_manager.daemon, and is otherwise run in this process, loading and saving the database. If
+    another process saved a conflicting change in between, the command is run again on its result.
+
+    Args:
+        argv: The command line arguments, sys.argv[1:] by default.
+
+    Returns:
+        None
+    """
+
+    parser = build_parser()
+    if argv is None:
+        argv = sys.argv[1:]
+    args = parser.parse_args(argv)
+
+    if not (args.no_daemon or args.profile):
+        path = daemon_socket_path(args.storage, args.database)
+        input = None
+        if args.command == "batch" and os.path.exists(path):
+            # the daemon may not see the same files, and cannot see our standard input
+            if args.file == "-":
+                input = sys.stdin.read()
+            else:
+                with open(args.file, "r") as file:
+                    input = file.read()
+        if args.command in ("import", "export") and args.file != "-":
+            # the daemon resolves paths from its own working directory
+            argv = [os.path.abspath(arg) if arg == args.file else arg for arg in argv]
+        reply = send_to_daemon(path, argv, input)
+        if reply is None and input is not None and args.file == "-":
+            sys.stdin = io.StringIO(input)
+        if reply is not None:
+            sys.stdout.write(reply["output"])
+            if reply["status"]:
+                parser.exit(reply["status"], f"{reply['error']}\n")
+            return
+
+    if args.command == "migrate" and args.storage != "sqlite":
+        parser.error("migrate needs --storage sqlite")
+    if args.command == "rebalance" and args.storage != "sharded":
+        parser.error("rebalance needs --storage sharded")
+
+    paging = args.command == "list" and (args.limit is not None or args.cursor is not None or args.sort is not None)
+    if args.command in ("list", "show") and args.storage == "json" and not args.profile and not paging:
+        # Stream the tasks straight from the file, printing each one as soon as it is read, without
+        # building a task manager and its indexes; show stops at the task it looks for. Pages need
+        # the indexes, so they are listed by the task manager
+        from task_manager.models import iter_tasks_from_file
+        from task_manager.snapshot import is_snapshot, iter_snapshot
+
+        matches = list_filter(args, datetime.datetime.now()) if args.command == "list" else lambda task: task.id == args.id
+        filename = args.database or DATABASE
+        task = None
+        try:
+            tasks = filter(matches, iter_snapshot(filename) if is_snapshot(filename) else iter_tasks_from_file(filename))
+            if args.command == "list":
+                write_tasks(tasks, args.format)
+            else:
+                task = next(tasks, None)
+        except FileNotFoundError:
+            print(f"No file named {filename} found.")
+        if args.command == "show":
+            if task is None:
+                raise ValueError("Task with given ID does not exist.")
+            print(task)
+        return
+
+    import contextlib
+    from task_manager.locking import ConflictError
+    from task_manager.storage import open_task_manager
+
+    # A change that conflicts with one another process saved in the meantime is redone on the saved
+    # tasks, so its output is held back until it is saved and a batch's input is read only once
+    output = io.StringIO() if args.command in CHANGES else None
+    input = sys.stdin.read() if args.command == "batch" and args.file == "-" else None
+    for attempt in range(CONFLICT_RETRIES):
+        task_manager = open_task_manager(args.storage, args.database, instrument=args.profile)
+        try:
+            if output is not None:
+                output.seek(0)
+                output.truncate()
+            with task_manager.instrumentation.timer("command") if args.profile else contextlib.nullcontext():
+                run(task_manager, args, output, None if input is None else io.StringIO(input))
+            # only writes if the command changed something
+            task_manager.save()
+            break
+        except ConflictError:
+            if attempt == CONFLICT_RETRIES - 1:
+                raise
+        finally:
+            task_manager.close()
+            if args.profile:
+                print(task_manager.instrumentation.report(), file=sys.stderr)
+    if output is not None:
+        sys.stdout.write(output.getvalue())
+
+
+if __name__ == "__main__":
+    main()
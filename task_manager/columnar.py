@@ -0,0 +1,539 @@
+import itertools
+from array import array
+
+from task_manager.models import Task, TaskManager, from_epoch_microseconds, to_epoch_microseconds
+
+
+# The share of the string heap that strings no row refers to any more may take up before a save compacts it
+COMPACT_RATIO = 0.5
+
+class TaskStore:
+    """
+    Stores tasks column by column instead of as one object per task.
+
+    Ids and timestamps are kept in parallel int64 arrays, timestamps as microseconds since the epoch,
+    and completion flags in a bytearray. Titles and descriptions are kept UTF-8 encoded in a single
+    string heap and referenced by offset and length, and are decoded only when read. A task then takes
+    about 65 bytes plus the encoded length of its strings, instead of a Task object holding two str and
+    two datetime objects.
+
+    The store behaves like a list of tasks: indexing it or iterating over it gives TaskView objects
+    that read and write the columns of one row. A view refers to a row, not a task, so it should not
+    be kept across deletions, which move the last row into the freed one. Strings replaced by a
+    change or left by a deletion stay in the heap until compact rebuilds it.
+
+    Attributes:
+        ids: The task ids.
+        created_at: The creation times, in microseconds since the epoch.
+        due_dates: The due dates, in microseconds since the epoch.
+        completed: The completion flags, one byte per task.
+        versions: The task versions.
+        titles: The offset of each task's title in strings.
+        title_lengths: The encoded length of each task's title.
+        descriptions: The offset of each task's description in strings.
+        description_lengths: The encoded length of each task's description.
+        strings: The string heap.
+        dead_bytes: How many bytes of the heap no row refers to any more.
+        edits: The count of changes made through the Task methods of views, a one-item list shared
+            with the TaskManager holding the store, or None.
+    """
+
+
+    def __init__(self, tasks=()) -> None:
+        """
+        Initializes a TaskStore object, optionally filled with tasks.
+
+        Args:
+            tasks: An iterable of Task objects to store.
+
+        Returns:
+            None
+        """
+
+        self.ids = array("q")
+        self.created_at = array("q")
+        self.due_dates = array("q")
+        self.completed = bytearray()
+        self.versions = array("q")
+        self.titles = array("q")
+        self.title_lengths = array("l")
+        self.descriptions = array("q")
+        self.description_lengths = array("l")
+        self.strings = bytearray()
+        self.dead_bytes = 0
+        self.edits = None
+        self.extend(tasks)
+
+    @classmethod
+    def from_columns(cls, ids, titles, descriptions, created_at, due_dates, completed, versions) -> "TaskStore":
+        """
+        Builds a TaskStore from whole columns at once, without a Task object per row.
+
+        Args:
+            ids: The task ids.
+            titles: The titles.
+            descriptions: The descriptions.
+            created_at: The creation times, in microseconds since the epoch.
+            due_dates: The due dates, in microseconds since the epoch.
+            completed: The completion flags.
+            versions: The task versions.
+
+        Returns:
+            The TaskStore, with a row per task.
+        """
+
+        store = cls()
+        store.ids = array("q", ids)
+        store.created_at = array("q", created_at)
+        store.due_dates = array("q", due_dates)
+        store.completed = bytearray(completed)
+        store.versions = array("q", versions)
+        titles = [title.encode() for title in titles]
+        descriptions = [description.encode() for description in descriptions]
+        store.title_lengths = array("l", map(len, titles))
+        store.description_lengths = array("l", map(len, descriptions))
+        # the heap holds each row's title followed by its description
+        strings = [string for pair in zip(titles, descriptions) for string in pair]
+        offsets = array("q", itertools.accumulate(map(len, strings), initial=0))
+        store.titles = offsets[0:-1:2]
+        store.descriptions = offsets[1::2]
+        store.strings = bytearray(b"".join(strings))
+        return store
+
+    def store_string(self, string: str) -> tuple[int, int]:
+        """
+        Adds a string to the string heap.
+
+        Args:
+            string: The string to add.
+
+        Returns:
+            The offset and encoded length of the string in the heap.
+        """
+
+        encoded = string.encode()
+        offset = len(self.strings)
+        self.strings += encoded
+        return offset, len(encoded)
+
+    def compact(self, ratio: float = 0.0) -> bool:
+        """
+        Rebuilds the string heap with only the strings the rows refer to, if more than the given share
+        of it is dead.
+
+        Views stay valid, as they read the offsets from the columns.
+
+        Args:
+            ratio: The share of the heap that may be dead without compacting it.
+
+        Returns:
+            True if the heap was rebuilt.
+        """
+
+        if not self.dead_bytes or self.dead_bytes <= len(self.strings) * ratio:
+            return False
+        strings = memoryview(self.strings)
+        parts = []
+        titles = array("q")
+        descriptions = array("q")
+        offset = 0
+        for title, title_length, description, description_length in zip(self.titles, self.title_lengths, self.descriptions, self.description_lengths):
+            parts.append(strings[title:title + title_length])
+            titles.append(offset)
+            offset += title_length
+            parts.append(strings[description:description + description_length])
+            descriptions.append(offset)
+            offset += description_length
+        heap = bytearray(b"".join(parts))
+        strings.release()
+        self.strings = heap
+        self.titles = titles
+        self.descriptions = descriptions
+        self.dead_bytes = 0
+        return True
+
+    def load_string(self, offset: int, length: int) -> str:
+        """
+        Decodes a string from the string heap.
+
+        Args:
+            offset: The offset of the string in the heap.
+            length: The encoded length of the string.
+
+        Returns:
+            The string.
+        """
+
+        return self.strings[offset:offset + length].decode()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of stored tasks.
+
+        Returns:
+            The number of rows.
+        """
+
+        return len(self.ids)
+
+    def _row(self, row: int) -> int:
+        """
+        Checks a row number, resolving negative ones from the end.
+
+        Args:
+            row: The row number.
+
+        Returns:
+            The non-negative row number.
+
+        Raises:
+            IndexError: If there is no such row.
+        """
+
+        if row < 0:
+            row += len(self.ids)
+        if not 0 <= row < len(self.ids):
+            raise IndexError("TaskStore index out of range")
+        return row
+
+    def __getitem__(self, row: int) -> "TaskView":
+        """
+        Returns a view of one row.
+
+        Args:
+            row: The row number.
+
+        Returns:
+            A TaskView of the row.
+        """
+
+        return TaskView(self, self._row(row))
+
+    def __setitem__(self, row: int, task: Task) -> None:
+        """
+        Overwrites one row with the values of a task.
+
+        Args:
+            row: The row number.
+            task: The Task object whose values to store.
+
+        Returns:
+            None
+        """
+
+        row = self._row(row)
+        self.dead_bytes += self.title_lengths[row] + self.description_lengths[row]
+        self.ids[row] = task.id
+        self.titles[row], self.title_lengths[row] = self.store_string(task.title)
+        self.descriptions[row], self.description_lengths[row] = self.store_string(task.description)
+        self.created_at[row] = to_epoch_microseconds(task.created_at)
+        self.due_dates[row] = to_epoch_microseconds(task.due_date)
+        self.completed[row] = task.completed
+        self.versions[row] = task.version
+
+    def __iter__(self):
+        """
+        Iterates over views of every row, in order.
+
+        Yields:
+            A TaskView per row.
+        """
+
+        for row in range(len(self.ids)):
+            yield TaskView(self, row)
+
+    def append(self, task: Task) -> None:
+        """
+        Adds a task as a new last row.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            None
+        """
+
+        title, title_length = self.store_string(task.title)
+        description, description_length = self.store_string(task.description)
+        self.ids.append(task.id)
+        self.titles.append(title)
+        self.title_lengths.append(title_length)
+        self.descriptions.append(description)
+        self.description_lengths.append(description_length)
+        self.created_at.append(to_epoch_microseconds(task.created_at))
+        self.due_dates.append(to_epoch_microseconds(task.due_date))
+        self.completed.append(task.completed)
+        self.versions.append(task.version)
+
+    def extend(self, tasks) -> None:
+        """
+        Adds tasks as new rows.
+
+        Another TaskStore is added column by column, without going through a Task object per row.
+
+        Args:
+            tasks: An iterable of Task objects to add, or a TaskStore.
+
+        Returns:
+            None
+        """
+
+        if not isinstance(tasks, TaskStore):
+            for task in tasks:
+                self.append(task)
+            return
+        # the other store's strings are appended to this heap, so their offsets move by its length
+        shift = len(self.strings)
+        self.strings += tasks.strings
+        self.dead_bytes += tasks.dead_bytes
+        self.titles.extend(map(shift.__add__, tasks.titles))
+        self.descriptions.extend(map(shift.__add__, tasks.descriptions))
+        self.ids += tasks.ids
+        self.title_lengths += tasks.title_lengths
+        self.description_lengths += tasks.description_lengths
+        self.created_at += tasks.created_at
+        self.due_dates += tasks.due_dates
+        self.completed += tasks.completed
+        self.versions += tasks.versions
+
+    def task(self, row: int) -> Task:
+        """
+        Copies a row into a standalone Task object.
+
+        Args:
+            row: The row number.
+
+        Returns:
+            A Task object with the row's values, not connected to the store.
+        """
+
+        row = self._row(row)
+        return Task(
+            self.ids[row],
+            self.load_string(self.titles[row], self.title_lengths[row]),
+            self.load_string(self.descriptions[row], self.description_lengths[row]),
+            from_epoch_microseconds(self.created_at[row]),
+            from_epoch_microseconds(self.due_dates[row]),
+            bool(self.completed[row]),
+            self.versions[row],
+        )
+
+    def to_tasks(self) -> list[Task]:
+        """
+        Copies every row into a standalone Task object, a column at a time.
+
+        Returns:
+            The Task objects, in row order.
+        """
+
+        return list(map(
+            Task,
+            self.ids,
+            map(self.load_string, self.titles, self.title_lengths),
+            map(self.load_string, self.descriptions, self.description_lengths),
+            map(from_epoch_microseconds, self.created_at),
+            map(from_epoch_microseconds, self.due_dates),
+            map(bool, self.completed),
+            self.versions,
+        ))
+
+    def pop(self, row: int = -1) -> Task:
+        """
+        Removes a row, moving the last row into its place.
+
+        Args:
+            row: The row number to remove, the last one by default.
+
+        Returns:
+            A standalone Task object with the removed row's values.
+        """
+
+        row = self._row(row)
+        task = self.task(row)
+        self.dead_bytes += self.title_lengths[row] + self.description_lengths[row]
+        last = len(self.ids) - 1
+        columns = (self.ids, self.titles, self.title_lengths, self.descriptions, self.description_lengths, self.created_at, self.due_dates, self.completed, self.versions)
+        for column in columns:
+            column[row] = column[last]
+            del column[last]
+        return task
+
+
+def _column(name: str, doc: str, load=None, store=None) -> property:
+    """
+    Builds a TaskView property that reads and writes one column of the view's row.
+
+    Args:
+        name: The name of the TaskStore column.
+        doc: The docstring of the property.
+        load: Converts a stored value to the attribute value, if given.
+        store: Converts an attribute value to the stored value, if given.
+
+    Returns:
+        The property.
+    """
+
+    def getter(view):
+        value = getattr(view._store, name)[view._row]
+        return load(value) if load else value
+
+    def setter(view, value):
+        getattr(view._store, name)[view._row] = store(value) if store else value
+
+    return property(getter, setter, doc=doc)
+
+
+def _string_column(name: str, lengths: str, doc: str) -> property:
+    """
+    Builds a TaskView property that reads and writes a string kept in the string heap.
+
+    Args:
+        name: The name of the TaskStore column holding the string offsets.
+        lengths: The name of the TaskStore column holding the string lengths.
+        doc: The docstring of the property.
+
+    Returns:
+        The property.
+    """
+
+    def getter(view):
+        store = view._store
+        return store.load_string(getattr(store, name)[view._row], getattr(store, lengths)[view._row])
+
+    def setter(view, value):
+        store = view._store
+        store.dead_bytes += getattr(store, lengths)[view._row]
+        getattr(store, name)[view._row], getattr(store, lengths)[view._row] = store.store_string(value)
+
+    return property(getter, setter, doc=doc)
+
+
+class TaskView(Task):
+    """
+    A Task whose attributes live in one row of a TaskStore.
+
+    Reading an attribute decodes it from the store and assigning one writes it back, so every Task
+    method works on a view as it would on a Task object.
+    """
+
+    __slots__ = ("_store", "_row")
+
+
+    def __init__(self, store: TaskStore, row: int) -> None:
+        """
+        Initializes a TaskView object.
+
+        Args:
+            store: The TaskStore holding the task.
+            row: The row of the task in the store.
+
+        Returns:
+            None
+        """
+
+        self._store = store
+        self._row = row
+
+    @property
+    def _edits(self):
+        """The count of changes made through Task methods, kept by the store for all of its rows."""
+
+        return self._store.edits
+
+    @_edits.setter
+    def _edits(self, edits) -> None:
+        self._store.edits = edits
+
+    id = _column("ids", "The unique identifier of the task.")
+    title = _string_column("titles", "title_lengths", "The title of the task.")
+    description = _string_column("descriptions", "description_lengths", "The description of the task.")
+    created_at = _column("created_at", "The datetime when the task was created.", from_epoch_microseconds, to_epoch_microseconds)
+    due_date = _column("due_dates", "The datetime when the task is due.", from_epoch_microseconds, to_epoch_microseconds)
+    completed = _column("completed", "A boolean indicating if the task is completed.", bool)
+    version = _column("versions", "How many times the task was changed through a TaskManager.")
+
+
+class ColumnarTaskManager(TaskManager):
+    """
+    A TaskManager that keeps its tasks in a TaskStore instead of a list of Task objects.
+
+    Methods return TaskView objects, which behave like Task objects but are only valid until the next deletion.
+    """
+
+    task_list_factory = TaskStore
+
+
+    def __init__(self, storage=None, group_commit=None) -> None:
+        """
+        Initializes a ColumnarTaskManager object with an empty task store.
+
+        Args:
+            storage: An optional storage backend, such as task_manager.storage.JsonStorage.
+            group_commit: An optional GroupCommit policy for save.
+
+        Returns:
+            None
+        """
+
+        super().__init__(storage, group_commit)
+        self.task_list.edits = self._edits
+
+    def _build_positions(self) -> dict:
+        """
+        Maps every id to its first position from the store's id column, without a view per row, and
+        makes the store count the changes made through Task methods in the task manager.
+
+        Returns:
+            The id index, a dictionary from id to position.
+        """
+
+        positions = {}
+        for position, id in enumerate(self.task_list.ids):
+            positions.setdefault(id, position)
+        self.task_list.edits = self._edits
+        return positions
+
+    def save(self) -> None:
+        """
+        Compacts the string heap of the store once more than COMPACT_RATIO of it is dead, then saves
+        as TaskManager.save does.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the task manager has no storage backend.
+        """
+
+        self.task_list.compact(COMPACT_RATIO)
+        super().save()
+
+    def delete_task(self, id: int) -> Task:
+        """
+        Deletes a task by its ID.
+
+        The last row of the store is moved into the freed row.
+
+        Args:
+            id: The ID of the task to delete.
+
+        Returns:
+            A standalone Task object with the deleted task's values.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        position = self._find(id)
+        if position is None:
+            raise ValueError("Task with given ID does not exist.")
+        task_to_delete = self.task_list.pop(position)
+        del self._positions[id]
+        if position < len(self.task_list):
+            moved_id = self.task_list.ids[position]
+            if self._positions.get(moved_id) == len(self.task_list):
+                self._positions[moved_id] = position
+        self._indexed_length = len(self.task_list)
+        self._unindex_task(task_to_delete)
+        self._record("delete", task_to_delete)
+        return task_to_delete
@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import logging
+import os
+import signal
+import socket
+
+from task_manager.cli import CHANGES, build_parser, run
+from task_manager.locking import ConflictError
+from task_manager.models import TaskManager
+from task_manager.paths import STORAGES, daemon_socket_path
+from task_manager.storage import open_task_manager
+
+
+logger = logging.getLogger(__name__)
+
+class Daemon:
+    """
+    Keeps a TaskManager loaded and runs CLI commands against it, received over a Unix socket.
+
+    A client sends one JSON line {"argv": [...]} holding the CLI arguments, plus "input" holding the
+    operations of a batch command, and gets back one JSON line
+    {"status": ..., "output": ..., "error": ...}; cli.main does this whenever a daemon is listening on
+    the database's socket, so a command costs a round trip instead of loading and saving the database.
+
+    Commands run one at a time on the event loop, so they never interleave. Saves are coalesced: the
+    first command changing the tasks schedules a save flush_delay seconds later, and every change made
+    until then is saved together. The save runs in a worker thread, so the loop keeps accepting
+    connections and reading requests meanwhile, but no command runs until it is done; a save that fails
+    is logged and tried again flush_delay seconds later, or, if it raised ConflictError, the tasks are
+    loaded again. A command that fails in any way is answered
+    with its error instead of dropping the connection.
+
+    Attributes:
+        task_manager: The TaskManager commands are run against.
+        path: The path of the Unix socket.
+        flush_delay: How many seconds to wait after a change before saving.
+        remind: How long before their due date tasks are reminded of, or None not to remind of them.
+    """
+
+
+    def __init__(self, task_manager: TaskManager, path: str, flush_delay: float = 1.0, remind: datetime.timedelta | None = None) -> None:
+        """
+        Initializes a Daemon object.
+
+        Args:
+            task_manager: The TaskManager to run commands against.
+            path: The path of the Unix socket to listen on.
+            flush_delay: How many seconds to wait after a change before saving.
+            remind: How long before their due date to remind of tasks, by printing a line, if given.
+
+        Returns:
+            None
+        """
+
+        self.task_manager = task_manager
+        self.path = path
+        self.flush_delay = flush_delay
+        self.remind = remind
+        self.parser = build_parser()
+        self._save_handle: asyncio.TimerHandle | None = None
+        self._save_task: asyncio.Task | None = None
+        # held while a background save runs, and by every command, so commands wait for the save
+        self._save_lock = asyncio.Lock()
+
+    def execute(self, argv: list[str], input: str | None = None) -> dict:
+        """
+        Runs one command line.
+
+        Args:
+            argv: The CLI arguments.
+            input: The operations of a batch command, read instead of its file, if given.
+
+        Returns:
+            The reply: the exit status, the command's output and an error message.
+        """
+
+        try:
+            args = self.parser.parse_args(argv)
+        except SystemExit:
+            return {"status": 2, "output": "", "error": f"Invalid command: {' '.join(argv)}"}
+        if args.command == "batch":
+            if input is None:
+                return {"status": 2, "output": "", "error": "batch needs its operations sent as input"}
+            args.file = "-"
+        output = io.StringIO()
+        try:
+            run(self.task_manager, args, output, None if input is None else io.StringIO(input))
+        except (ValueError, TypeError) as error:
+            return {"status": 1, "output": output.getvalue(), "error": str(error)}
+        except Exception as error:
+            logger.exception("Command %s failed", argv)
+            return {"status": 1, "output": output.getvalue(), "error": f"{type(error).__name__}: {error}"}
+        finally:
+            # a failed command may have made some of its changes, such as the operations of a batch before the failing one
+            if args.command in CHANGES:
+                self._schedule_save()
+        return {"status": 0, "output": output.getvalue(), "error": ""}
+
+    def _schedule_save(self) -> None:
+        """
+        Saves the task manager flush_delay seconds after the first change not saved yet.
+
+        Returns:
+            None
+        """
+
+        if self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(self.flush_delay, self._start_save)
+
+    def _start_save(self) -> None:
+        """
+        Starts saving the task manager in the background.
+
+        Returns:
+            None
+        """
+
+        self._save_handle = None
+        self._save_task = asyncio.ensure_future(self._save_in_background())
+
+    async def _save_in_background(self) -> None:
+        """
+        Saves the task manager in a worker thread, while no command runs. A save that fails is logged
+        and tried again flush_delay seconds later, unless it conflicts with changes another process
+        saved, which never clears: the tasks are then loaded again, dropping the changes not saved.
+
+        Returns:
+            None
+        """
+
+        async with self._save_lock:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.task_manager.save)
+            except ConflictError as error:
+                # saving again can never succeed: the tasks saved by the other process win
+                logger.error("Saving the tasks failed: %s. Reloading them, which drops the changes not saved", error)
+                await loop.run_in_executor(None, self.task_manager.load)
+            except Exception:
+                logger.exception("Saving the tasks failed, trying again in %s seconds", self.flush_delay)
+                self._schedule_save()
+
+    async def flush(self) -> None:
+        """
+        Waits for a background save to finish, then saves the changes not saved yet.
+
+        Returns:
+            None
+        """
+
+        async with self._save_lock:
+            self.save()
+
+    def save(self) -> None:
+        """
+        Saves the task manager now, cancelling any pending save.
+
+        Returns:
+            None
+        """
+
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self.task_manager.save()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers every command sent over one client connection.
+
+        Args:
+            reader: The connection's reader.
+            writer: The connection's writer.
+
+        Returns:
+            None
+        """
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    argv, input = request["argv"], request.get("input")
+                    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv) or not isinstance(input, (str, type(None))):
+                        raise TypeError("argv must be a list of strings and input a string")
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    reply = {"status": 2, "output": "", "error": "Malformed request"}
+                else:
+                    async with self._save_lock:
+                        reply = self.execute(argv, input)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> asyncio.Server:
+        """
+        Starts listening on the socket, replacing a stale socket file left by a daemon that died.
+
+        Returns:
+            The listening asyncio.Server.
+
+        Raises:
+            ValueError: If another daemon is already listening on the socket.
+        """
+
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except ConnectionRefusedError:
+                os.remove(self.path)
+            else:
+                raise ValueError(f"A daemon is already listening on {self.path}")
+            finally:
+                probe.close()
+        return await asyncio.start_unix_server(self.handle_connection, self.path)
+
+    def _print_reminder(self, id: int, due_date: datetime.datetime) -> None:
+        """
+        Prints a reminder that a task is about to become due.
+
+        Args:
+            id: The ID of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            None
+        """
+
+        task = self.task_manager.get_task_by_id(id)
+        print(f"Reminder: task {id} \"{task.title}\" is due at {due_date.isoformat(' ', 'minutes')}", flush=True)
+
+    async def serve(self) -> None:
+        """
+        Serves commands until SIGINT or SIGTERM, then saves the task manager and removes the socket.
+        Reminds of tasks meanwhile, if remind is set.
+
+        Returns:
+            None
+        """
+
+        server = await self.start()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, stopped.set)
+        reminders = None if self.remind is None else self.task_manager.reminders(self.remind, [self._print_reminder])
+        reminding = None if reminders is None else asyncio.create_task(reminders.run())
+        print(f"Serving tasks on {self.path}")
+        try:
+            async with server:
+                await stopped.wait()
+        finally:
+            if reminders is not None:
+                reminding.cancel()
+                reminders.close()
+            await self.flush()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def main() -> None:
+    """
+    Runs the daemon from the command line.
+
+    Returns:
+        None
+    """
+
+    parser = argparse.ArgumentParser(description="Task Manager daemon: keeps the tasks loaded and serves the CLI")
+    parser.add_argument("--storage", choices=STORAGES, default="json", help="Storage backend")
+    parser.add_argument("--database", type=str, help="Path of the database file")
+    parser.add_argument("--flush-delay", type=float, default=1.0, help="Seconds to wait after a change before saving")
+    parser.add_argument("--remind", type=float, metavar="MINUTES", help="Print a reminder this many minutes before each task is due")
+    args = parser.parse_args()
+    task_manager = open_task_manager(args.storage, args.database)
+    try:
+        remind = None if args.remind is None else datetime.timedelta(minutes=args.remind)
+        daemon = Daemon(task_manager, daemon_socket_path(args.storage, args.database), args.flush_delay, remind)
+        asyncio.run(daemon.serve())
+    finally:
+        task_manager.close()
+
+
+if __name__ == "__main__":
+    main()
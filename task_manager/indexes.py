@@ -0,0 +1,319 @@
+import bisect
+import datetime
+import json
+import re
+
+
+class DueDateIndex:
+    """
+    Keeps task ids sorted by due date, so tasks due in a range can be found by binary search.
+
+    The index holds two parallel lists, due dates in ascending order and the id of the task due at
+    each of them, with ties ordered by id. Finding the tasks due in a range costs O(log n + k) for k
+    results. Adding or removing a task is a binary search plus a list insertion or deletion, which
+    moves memory but does not compare or allocate per element.
+    """
+
+
+    def __init__(self, tasks=()) -> None:
+        """
+        Initializes a DueDateIndex object, optionally filled with tasks.
+
+        Args:
+            tasks: An iterable of Task objects to index.
+
+        Returns:
+            None
+        """
+
+        entries = sorted((task.due_date, task.id) for task in tasks)
+        self._due_dates: list[datetime.datetime] = [due_date for due_date, _ in entries]
+        self._ids: list[int] = [id for _, id in entries]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed tasks.
+
+        Returns:
+            The number of entries in the index.
+        """
+
+        return len(self._ids)
+
+    def _position(self, id: int, due_date: datetime.datetime) -> int:
+        """
+        Finds where an entry is, or would be inserted, in the index.
+
+        Args:
+            id: The id of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            The position of the entry.
+        """
+
+        low = bisect.bisect_left(self._due_dates, due_date)
+        high = bisect.bisect_right(self._due_dates, due_date, low)
+        return bisect.bisect_left(self._ids, id, low, high)
+
+    def add(self, id: int, due_date: datetime.datetime) -> None:
+        """
+        Adds a task to the index.
+
+        Args:
+            id: The id of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            None
+        """
+
+        position = self._position(id, due_date)
+        self._due_dates.insert(position, due_date)
+        self._ids.insert(position, id)
+
+    def remove(self, id: int, due_date: datetime.datetime) -> None:
+        """
+        Removes a task from the index. Does nothing if the task is not indexed under the given due date.
+
+        Args:
+            id: The id of the task.
+            due_date: The due date the task was indexed under.
+
+        Returns:
+            None
+        """
+
+        position = self._position(id, due_date)
+        if position < len(self._ids) and self._ids[position] == id and self._due_dates[position] == due_date:
+            del self._due_dates[position]
+            del self._ids[position]
+
+    def between(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None) -> list[int]:
+        """
+        Finds the tasks due in a range, in order of due date.
+
+        Args:
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+
+        Returns:
+            The ids of the tasks due in the range.
+        """
+
+        low = 0 if start is None else bisect.bisect_left(self._due_dates, start)
+        high = len(self._due_dates) if end is None else bisect.bisect_left(self._due_dates, end, low)
+        return self._ids[low:high]
+
+    def first(self, count: int, start: datetime.datetime | None = None) -> list[int]:
+        """
+        Finds the tasks due soonest, in order of due date.
+
+        Args:
+            count: The maximum number of tasks to find.
+            start: Only tasks due at or after this datetime are considered, if given.
+
+        Returns:
+            The ids of up to count tasks.
+        """
+
+        low = 0 if start is None else bisect.bisect_left(self._due_dates, start)
+        return self._ids[low:low + count]
+
+    def iter_after(self, after: tuple[datetime.datetime, int] | None = None, start: datetime.datetime | None = None, end: datetime.datetime | None = None, chunk_size: int = 256):
+        """
+        Iterates over the tasks due in a range, in order of due date then id, from a given entry on.
+
+        The entries are read a chunk at a time, so stopping early costs O(log n + k) for k tasks
+        read, however many tasks there are in the range.
+
+        Args:
+            after: Only entries after this (due date, id) pair are yielded, if given.
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+            chunk_size: How many entries to read at a time.
+
+        Yields:
+            The ids of the tasks.
+        """
+
+        low = 0 if start is None else bisect.bisect_left(self._due_dates, start)
+        if after is not None:
+            due_date, id = after
+            first = bisect.bisect_left(self._due_dates, due_date)
+            last = bisect.bisect_right(self._due_dates, due_date, first)
+            low = max(low, bisect.bisect_right(self._ids, id, first, last))
+        high = len(self._due_dates) if end is None else bisect.bisect_left(self._due_dates, end, low)
+        for chunk in range(low, high, chunk_size):
+            yield from self._ids[chunk:min(chunk + chunk_size, high)]
+
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> set[str]:
+    """
+    Splits text into the lowercase words it is indexed and searched by.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        The set of words in the text.
+    """
+
+    return set(TOKEN.findall(text.lower()))
+
+
+class SearchIndex:
+    """
+    An inverted index from the words of task titles and descriptions to the ids of the tasks using them.
+
+    Queries are made of words, all of which a task has to contain, and can be combined with OR:
+    "invoice urgent OR report" finds tasks containing both "invoice" and "urgent", or "report".
+    A word ending in "*" matches every word starting with it. Matching is case-insensitive.
+
+    The index can be saved to and loaded from a JSON file together with a signature of the data it
+    was built from, so it does not have to be rebuilt when that data has not changed.
+    """
+
+
+    def __init__(self, tasks=()) -> None:
+        """
+        Initializes a SearchIndex object, optionally filled with tasks.
+
+        Args:
+            tasks: An iterable of Task objects to index.
+
+        Returns:
+            None
+        """
+
+        self._postings: dict[str, set[int]] = {}
+        self._sorted_words: list[str] | None = None
+        for task in tasks:
+            self.add(task.id, task.title, task.description)
+
+    def add(self, id: int, title: str, description: str) -> None:
+        """
+        Adds a task to the index.
+
+        Args:
+            id: The id of the task.
+            title: The title of the task.
+            description: The description of the task.
+
+        Returns:
+            None
+        """
+
+        for word in tokenize(title) | tokenize(description):
+            ids = self._postings.get(word)
+            if ids is None:
+                self._postings[word] = ids = set()
+                self._sorted_words = None
+            ids.add(id)
+
+    def remove(self, id: int, title: str, description: str) -> None:
+        """
+        Removes a task from the index.
+
+        Args:
+            id: The id of the task.
+            title: The title the task was indexed with.
+            description: The description the task was indexed with.
+
+        Returns:
+            None
+        """
+
+        for word in tokenize(title) | tokenize(description):
+            ids = self._postings.get(word)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self._postings[word]
+                    self._sorted_words = None
+
+    def _matches(self, term: str) -> set[int]:
+        """
+        Finds the tasks matching one query term.
+
+        Args:
+            term: A lowercase word, or a prefix followed by "*".
+
+        Returns:
+            The ids of the matching tasks.
+        """
+
+        if not term.endswith("*"):
+            return self._postings.get(term, set())
+        prefix = term[:-1]
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._postings)
+        ids = set()
+        for position in range(bisect.bisect_left(self._sorted_words, prefix), len(self._sorted_words)):
+            word = self._sorted_words[position]
+            if not word.startswith(prefix):
+                break
+            ids |= self._postings[word]
+        return ids
+
+    def search(self, query: str) -> set[int]:
+        """
+        Finds the tasks matching a query.
+
+        Args:
+            query: Words to look for, optionally ending in "*" and combined with OR.
+
+        Returns:
+            The ids of the matching tasks.
+        """
+
+        found = set()
+        for alternative in re.split(r"\s+OR\s+", query.strip()):
+            terms = re.findall(r"\w+\*?", alternative.lower())
+            if not terms:
+                continue
+            matches = sorted((self._matches(term) for term in terms), key=len)
+            found |= matches[0].intersection(*matches[1:])
+        return found
+
+    def save(self, filename: str, signature: list) -> None:
+        """
+        Saves the index to a JSON file.
+
+        Args:
+            filename: The name of the file to save the index to.
+            signature: Identifies the data the index was built from; load only accepts a matching one.
+
+        Returns:
+            None
+        """
+
+        with open(filename, "w") as file:
+            json.dump({"signature": signature, "postings": {word: list(ids) for word, ids in self._postings.items()}}, file)
+
+    @classmethod
+    def load(cls, filename: str, signature: list):
+        """
+        Loads an index saved with save, if it was built from the expected data.
+
+        Args:
+            filename: The name of the file to load the index from.
+            signature: The signature the index must have been saved with.
+
+        Returns:
+            The loaded SearchIndex object, or None if the file is missing, unreadable or stale.
+        """
+
+        try:
+            with open(filename, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("signature") != signature:
+            return None
+        index = cls()
+        index._postings = {word: set(ids) for word, ids in data["postings"].items()}
+        return index
@@ -0,0 +1,252 @@
+import collections
+import contextlib
+import functools
+import threading
+import time
+
+
+# The TaskManager methods timed by Instrumentation.attach, when the task manager has them
+OPERATIONS = (
+    "create_task", "create_tasks", "add_task", "add_tasks", "get_task_by_id", "change_task", "complete_task", "delete_task",
+    "tasks_due_between", "overdue", "next_due", "search", "load", "save", "load_from_file", "save_to_file",
+    "import_bulk", "export_bulk",
+)
+# The operations that read or write files, whose bytes Instrumentation.attach counts as well; counting
+# them costs a read of IO_COUNTERS before and after each call, too much for the operations in memory
+IO_OPERATIONS = ("load", "save", "load_from_file", "save_to_file", "import_bulk", "export_bulk")
+# The storage backend methods timed by Instrumentation.attach, reported as "storage.<name>", with their bytes counted
+STORAGE_OPERATIONS = ("load", "append", "save")
+# How many of the latest latencies of each operation the percentiles are computed over
+SAMPLES = 1024
+PERCENTILES = (50, 95, 99)
+
+
+# The kernel's count of the bytes the calling thread read and wrote, on Linux
+IO_COUNTERS = "/proc/thread-self/io"
+
+
+def io_counters() -> tuple[int, int, int] | None:
+    """
+    Returns how many bytes the calling thread has read and written through system calls so far.
+
+    Returns:
+        The bytes read and written, and the size of the counters file, whose own reading the next
+        call counts as read, or None where the kernel does not count them.
+    """
+
+    try:
+        with open(IO_COUNTERS, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    counters = dict(line.split(b":", 1) for line in data.splitlines() if b":" in line)
+    try:
+        return int(counters[b"rchar"]), int(counters[b"wchar"]), len(data)
+    except (KeyError, ValueError):
+        return None
+
+
+class OperationStats:
+    """
+    The statistics recorded for one operation.
+
+    Attributes:
+        count: How many times the operation ran.
+        total: How many seconds it took in all.
+        latencies: The latest SAMPLES latencies, in seconds.
+        bytes_read: How many bytes it read from database files.
+        bytes_written: How many bytes it wrote to database files.
+    """
+
+
+    def __init__(self) -> None:
+        """
+        Initializes an OperationStats object with nothing recorded.
+
+        Returns:
+            None
+        """
+
+        self.count = 0
+        self.total = 0.0
+        self.latencies = collections.deque(maxlen=SAMPLES)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def to_dict(self) -> dict:
+        """
+        Summarizes the statistics.
+
+        Returns:
+            The count, the cumulative and mean latency, the percentiles of the latest latencies,
+            and the bytes read and written; latencies are in microseconds.
+        """
+
+        latencies = sorted(self.latencies)
+        summary = {
+            "count": self.count,
+            "total_us": self.total * 1_000_000,
+            "mean_us": self.total / self.count * 1_000_000 if self.count else 0.0,
+        }
+        for percent in PERCENTILES:
+            position = min(len(latencies) - 1, max(0, round(percent / 100 * len(latencies)) - 1))
+            summary[f"p{percent}_us"] = latencies[position] * 1_000_000 if latencies else 0.0
+        summary["bytes_read"] = self.bytes_read
+        summary["bytes_written"] = self.bytes_written
+        return summary
+
+
+class Instrumentation:
+    """
+    Records how often TaskManager operations run, how long they take, and how many bytes they read and write.
+
+    Instrumentation is opt-in and costs nothing until it is attached: attach replaces the timed methods
+    of one task manager, and of its storage backend, with wrappers on that instance only, so other task
+    managers and the classes themselves are untouched. Operations are recorded by name, and calls
+    made from within other calls are recorded too, so the time of save includes that of storage.save.
+    Bytes read and written are counted for the operations that load and save tasks, and for the storage
+    backend, from the kernel's count of the bytes the calling thread read and wrote during the call, so
+    a save that has nothing to write counts none. Where the kernel does not count them, as outside
+    Linux, no bytes are recorded and report leaves their columns out.
+
+    Code can time its own steps with timer, such as the CLI timing a whole command.
+    """
+
+
+    def __init__(self) -> None:
+        """
+        Initializes an Instrumentation object with nothing recorded.
+
+        Returns:
+            None
+        """
+
+        self.operations: dict[str, OperationStats] = {}
+        self.counts_bytes = io_counters() is not None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        """
+        Records one run of an operation.
+
+        Args:
+            name: The name of the operation.
+            seconds: How long it took.
+            bytes_read: How many bytes it read.
+            bytes_written: How many bytes it wrote.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.latencies.append(seconds)
+            stats.bytes_read += bytes_read
+            stats.bytes_written += bytes_written
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """
+        Times a with block as one run of an operation.
+
+        Args:
+            name: The name of the operation.
+
+        Yields:
+            None
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, name: str, function, io: bool = False):
+        """
+        Wraps a function so that every call is recorded as a run of an operation.
+
+        Args:
+            name: The name of the operation.
+            function: The function to wrap.
+            io: Whether the function reads or writes files, whose bytes are then counted.
+
+        Returns:
+            The wrapper.
+        """
+
+        record = self.record
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            before = io_counters() if io else None
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                after = io_counters() if before is not None else None
+                if after is None:
+                    record(name, elapsed)
+                else:
+                    # reading the counters before the call is counted as read by the call
+                    record(name, elapsed, max(0, after[0] - before[0] - before[2]), after[1] - before[1])
+
+        return timed
+
+    def attach(self, manager) -> None:
+        """
+        Starts recording the operations of a task manager and of its storage backend.
+
+        Args:
+            manager: The TaskManager to instrument.
+
+        Returns:
+            None
+        """
+
+        manager.instrumentation = self
+        for name in OPERATIONS:
+            method = getattr(manager, name, None)
+            if method is None:
+                continue
+            setattr(manager, name, self.wrap(name, method, name in IO_OPERATIONS))
+        storage = manager.storage
+        if storage is not None:
+            for name in STORAGE_OPERATIONS:
+                setattr(storage, name, self.wrap(f"storage.{name}", getattr(storage, name), True))
+
+    def stats(self) -> dict:
+        """
+        Summarizes what has been recorded.
+
+        Returns:
+            OperationStats.to_dict for every operation that ran, by name.
+        """
+
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self.operations.items())}
+
+    def report(self) -> str:
+        """
+        Formats what has been recorded as a table, slowest operations first.
+
+        Returns:
+            One line per operation, with a header.
+        """
+
+        bytes_header = f" {'read':>10} {'written':>10}" if self.counts_bytes else ""
+        lines = [f"{'operation':<22} {'calls':>7} {'total ms':>10} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}{bytes_header}"]
+        for name, stats in sorted(self.stats().items(), key=lambda item: -item[1]["total_us"]):
+            bytes_columns = f" {stats['bytes_read']:>10} {stats['bytes_written']:>10}" if self.counts_bytes else ""
+            lines.append(
+                f"{name:<22} {stats['count']:>7} {stats['total_us'] / 1000:>10.2f} {stats['mean_us']:>10.1f}"
+                f" {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f}{bytes_columns}"
+            )
+        return "\n".join(lines)
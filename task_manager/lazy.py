@@ -0,0 +1,453 @@
+import bisect
+import datetime
+import heapq
+import os
+
+from task_manager.indexes import SearchIndex
+from task_manager.models import GroupCommit, Task, TaskManager, load_high_water_mark, replace_atomically, save_high_water_mark, to_epoch_microseconds
+from task_manager.snapshot import MUTABLE_FIELDS, MUTABLE_FIELDS_OFFSET, SnapshotReader, write_snapshot
+
+
+class LazyTaskManager(TaskManager):
+    """
+    A TaskManager that reads its tasks from a binary snapshot on demand instead of loading them all.
+
+    Loading only maps the snapshot into memory and checks its header, so it takes the same time
+    whatever the number of tasks. A task is decoded into a Task object when it is looked up by id,
+    through the id index stored at the end of the snapshot, or when it is reached by iteration.
+    Looked up tasks are kept, so changes made to them through the task manager are not lost; tasks
+    reached by iteration are not, so iterating over every task does not keep them all in memory.
+    Queries by due date scan the fixed-width part of the records and decode only the matching tasks.
+    Searches decode every task.
+
+    Saving writes back as little as the format allows: when only due dates, completion flags and
+    versions have changed, just those fields are overwritten in place; creating or deleting a task, or changing a
+    title or description, rewrites the snapshot.
+
+    Attributes:
+        filename: The name of the snapshot file.
+    """
+
+
+    def __init__(self, filename: str = "data/database.bin", group_commit: GroupCommit | None = None) -> None:
+        """
+        Initializes a LazyTaskManager object. The snapshot is opened by load.
+
+        Args:
+            filename: The name of the snapshot file.
+            group_commit: An optional GroupCommit policy for save.
+
+        Returns:
+            None
+        """
+
+        super().__init__(group_commit=group_commit)
+        self.filename = filename
+        self._reader: SnapshotReader | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Forgets every task decoded or changed since the snapshot was opened.
+
+        Returns:
+            None
+        """
+
+        self._tasks: dict[int, Task] = {}
+        self._created: dict[int, Task] = {}
+        self._deleted: set[int] = set()
+        self._patched: set[int] = set()
+        self._rewrite = False
+
+    def load(self) -> None:
+        """
+        Opens the snapshot, discarding any unsaved change.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the snapshot cannot be read, such as one cut short; the task manager is left
+                as it was, so that a save cannot overwrite the snapshot.
+        """
+
+        try:
+            reader = SnapshotReader(self.filename)
+        except FileNotFoundError:
+            reader = None
+        except ValueError as error:
+            raise ValueError(f"Cannot read the snapshot {self.filename}: {error}") from error
+        self._unmap()
+        self._reset()
+        self.changes.publish("reload")
+        self.id_allocator.observe(load_high_water_mark(self.filename))
+        if reader is None:
+            print(f"No file named {self.filename} found. Starting with an empty task manager.")
+            return
+        self._reader = reader
+        if len(self._reader):
+            # the index is sorted by id, so its last entry holds the highest id
+            self.id_allocator.observe(self._reader.index_entry(len(self._reader) - 1)[0])
+
+    def _stored_offset(self, id: int) -> int | None:
+        """
+        Finds the record of a task in the snapshot, unless the task has been deleted since.
+
+        Args:
+            id: The ID of the task.
+
+        Returns:
+            The offset of the task's record, or None.
+        """
+
+        if self._reader is None or id in self._deleted:
+            return None
+        return self._reader.find(id)
+
+    def get_task_by_id(self, id: int) -> Task:
+        """
+        Retrieves a task by its unique identifier, decoding it from the snapshot if needed.
+
+        Args:
+            id: The unique identifier of the task to retrieve.
+
+        Returns:
+            The Task object with the specified ID.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        task = self._tasks.get(id)
+        if task is None:
+            offset = self._stored_offset(id)
+            if offset is None:
+                raise ValueError("Task with given ID does not exist.")
+            task = self._tasks[id] = self._reader.task(offset)
+        return task
+
+    def _append(self, task: Task) -> None:
+        """
+        Adds a new task, to be written to the snapshot by the next save.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            None
+        """
+
+        self._tasks[task.id] = task
+        self._created[task.id] = task
+        self._rewrite = True
+
+    def add_task(self, task: Task) -> Task:
+        """
+        Adds an existing Task object, keeping its id.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            The added Task object.
+
+        Raises:
+            ValueError: If a task with the same ID already exists.
+        """
+
+        if task.id in self._tasks or self._stored_offset(task.id) is not None:
+            raise ValueError("Task with given ID already exists.")
+        self._append(task)
+        self.id_allocator.observe(task.id)
+        self._record("create", task)
+        return task
+
+    def add_tasks(self, tasks) -> list[Task]:
+        """
+        Adds many existing Task objects at once, keeping their ids.
+
+        Args:
+            tasks: An iterable of Task objects.
+
+        Returns:
+            The added Task objects, in order.
+
+        Raises:
+            ValueError: If a task has the ID of an existing task, or of another of the tasks. No task is added then.
+        """
+
+        tasks = list(tasks)
+        ids = {task.id for task in tasks}
+        if len(ids) != len(tasks) or any(id in self._tasks or self._stored_offset(id) is not None for id in ids):
+            raise ValueError("Task with given ID already exists.")
+        for task in tasks:
+            self._append(task)
+            self._record("create", task)
+        if ids:
+            self.id_allocator.observe(max(ids))
+        return tasks
+
+    def delete_task(self, id: int) -> Task:
+        """
+        Deletes a task by its ID.
+
+        Args:
+            id: The ID of the task to delete.
+
+        Returns:
+            The deleted Task object.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        task = self.get_task_by_id(id)
+        del self._tasks[id]
+        if self._created.pop(id, None) is None:
+            self._deleted.add(id)
+        self._patched.discard(id)
+        self._rewrite = True
+        self._record("delete", task)
+        return task
+
+    def _record(self, op: str, task: Task) -> None:
+        """
+        Notes how a changed task has to be written back: in place if only its due date, completion
+        flag or version differ from the snapshot, by rewriting the snapshot otherwise.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+        if op in ("change", "complete") and task.id not in self._created:
+            stored = self._reader.task(self._reader.find(task.id))
+            if (stored.title, stored.description, stored.created_at) == (task.title, task.description, task.created_at):
+                self._patched.add(task.id)
+            else:
+                self._rewrite = True
+        super()._record(op, task)
+
+    def iter_tasks(self):
+        """
+        Iterates over all tasks, decoding those not decoded yet without keeping them.
+
+        Yields:
+            Every Task object, those in the snapshot in their stored order, then the new ones.
+        """
+
+        if self._reader is not None:
+            for offset in self._reader.offsets():
+                id = self._reader.record(offset)[0]
+                if id in self._deleted:
+                    continue
+                task = self._tasks.get(id)
+                yield task if task is not None else self._reader.task(offset)
+        yield from self._created.values()
+
+    def _scan(self, keep):
+        """
+        Finds the tasks whose due date and completion flag satisfy a condition, decoding only those.
+
+        Args:
+            keep: Called as keep(due_date, completed) with the due date in microseconds since the epoch.
+
+        Yields:
+            The matching Task objects.
+        """
+
+        if self._reader is not None:
+            for offset in self._reader.offsets():
+                id, _, due_date, completed, _, _, _ = self._reader.record(offset)
+                if id in self._deleted:
+                    continue
+                task = self._tasks.get(id)
+                if task is not None:
+                    if keep(to_epoch_microseconds(task.due_date), task.completed):
+                        yield task
+                elif keep(due_date, completed):
+                    yield self._reader.task(offset)
+        for task in self._created.values():
+            if keep(to_epoch_microseconds(task.due_date), task.completed):
+                yield task
+
+    def _tasks_by_id(self, after: int):
+        """
+        Iterates over the tasks by id, from the id index stored in the snapshot merged with the new tasks.
+
+        Args:
+            after: Only tasks with a higher id are yielded.
+
+        Yields:
+            The Task objects, ordered by ID.
+        """
+
+        stored = ()
+        if self._reader is not None:
+            # the index is sorted by id, so the first entry past after is found by binary search
+            low, high = 0, len(self._reader)
+            while low < high:
+                middle = (low + high) // 2
+                if self._reader.index_entry(middle)[0] <= after:
+                    low = middle + 1
+                else:
+                    high = middle
+            stored = (self._reader.index_entry(position) for position in range(low, len(self._reader)))
+        created = sorted((id, None) for id in self._created if id > after)
+        for id, offset in heapq.merge(stored, created):
+            if id in self._deleted:
+                continue
+            task = self._tasks.get(id)
+            yield task if task is not None else self._reader.task(offset)
+
+    def _tasks_by_due_date(self, after: tuple[datetime.datetime, int] | None, start: datetime.datetime | None, end: datetime.datetime | None, open_only: bool):
+        """
+        Iterates over the tasks by due date, scanning the records and sorting the ones in range.
+
+        Args:
+            after: Only tasks after this (due date, id) pair are yielded, if given.
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+            open_only: Whether only tasks that are not completed are wanted.
+
+        Yields:
+            The Task objects, ordered by due date then id.
+        """
+
+        low = None if start is None else to_epoch_microseconds(start)
+        high = None if end is None else to_epoch_microseconds(end)
+        tasks = self._scan(lambda due_date, completed: not (open_only and completed) and (low is None or due_date >= low) and (high is None or due_date < high))
+        tasks = sorted(tasks, key=lambda task: (task.due_date, task.id))
+        first = 0 if after is None else bisect.bisect_right(tasks, after, key=lambda task: (task.due_date, task.id))
+        yield from tasks[first:]
+
+    def tasks_due_between(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks due in a range of time, scanning the records.
+
+        Args:
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+
+        Returns:
+            The Task objects due in the range, ordered by due date.
+        """
+
+        low = None if start is None else to_epoch_microseconds(start)
+        high = None if end is None else to_epoch_microseconds(end)
+        tasks = self._scan(lambda due_date, completed: (low is None or due_date >= low) and (high is None or due_date < high))
+        return sorted(tasks, key=lambda task: (task.due_date, task.id))
+
+    def overdue(self, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks that are past their due date and not completed, scanning the records.
+
+        Args:
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            The overdue Task objects, ordered by due date.
+        """
+
+        moment = to_epoch_microseconds(now or datetime.datetime.now())
+        tasks = self._scan(lambda due_date, completed: not completed and due_date < moment)
+        return sorted(tasks, key=lambda task: (task.due_date, task.id))
+
+    def next_due(self, count: int, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the open tasks that will become due next, scanning the records.
+
+        Args:
+            count: The maximum number of tasks to find.
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            Up to count Task objects that are not completed and not yet due, ordered by due date.
+        """
+
+        moment = to_epoch_microseconds(now or datetime.datetime.now())
+        tasks = self._scan(lambda due_date, completed: not completed and due_date >= moment)
+        return heapq.nsmallest(count, tasks, key=lambda task: (task.due_date, task.id))
+
+    def search(self, query: str) -> list[Task]:
+        """
+        Finds the tasks whose title or description contain the words of a query, decoding every task.
+
+        Args:
+            query: The words to look for, as for TaskManager.search.
+
+        Returns:
+            The matching Task objects, ordered by ID.
+        """
+
+        return [self.get_task_by_id(id) for id in sorted(SearchIndex(self.iter_tasks()).search(query))]
+
+    def save(self) -> None:
+        """
+        Writes the changes made since the snapshot was opened back to it, unless the group commit
+        policy, if there is one, holds them back.
+
+        Returns:
+            None
+        """
+
+        if not (self._rewrite or self._patched):
+            return
+        if self.group_commit is not None and not self.group_commit.request():
+            return
+        self._commit()
+
+    def _commit(self) -> None:
+        """
+        Writes the changes made since the snapshot was opened back to it.
+
+        Returns:
+            None
+        """
+
+        save_high_water_mark(self.filename, self.id_allocator.high_water_mark)
+        if self._rewrite:
+            replace_atomically(self.filename, lambda temporary_filename: write_snapshot(temporary_filename, self.iter_tasks()))
+            self._unmap()
+            self._reset()
+            self._reader = SnapshotReader(self.filename)
+        else:
+            with open(self.filename, "r+b") as file:
+                for id in self._patched:
+                    task = self._tasks[id]
+                    file.seek(self._reader.find(id) + MUTABLE_FIELDS_OFFSET)
+                    file.write(MUTABLE_FIELDS.pack(to_epoch_microseconds(task.due_date), task.completed, task.version))
+                file.flush()
+                os.fsync(file.fileno())
+            self._patched.clear()
+        self.mark_clean()
+
+    def close(self) -> None:
+        """
+        Writes the changes held back by the group commit policy, if any, and unmaps the snapshot.
+        Until it is loaded again, the task manager only holds the tasks decoded so far.
+
+        Returns:
+            None
+        """
+
+        if self.group_commit is not None and self.group_commit.pending and (self._rewrite or self._patched):
+            self.group_commit.pending = 0
+            self._commit()
+        self._unmap()
+
+    def _unmap(self) -> None:
+        """
+        Unmaps the snapshot, if it is open.
+
+        Returns:
+            None
+        """
+
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
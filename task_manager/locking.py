@@ -0,0 +1,720 @@
+import contextlib
+import datetime
+import functools
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from task_manager.models import GroupCommit, IdAllocator, Task, TaskManager, load_high_water_mark, save_high_water_mark
+from task_manager.storage import JsonStorage
+
+
+class FileLock:
+    """
+    An advisory lock on a database file, shared by every process that opens the file through it.
+
+    The lock is taken with flock on a "<filename>.lock" file next to the database file rather than on
+    the database file itself, because saves replace the database file with a new one and a lock on the
+    replaced file would not exclude anybody any more. A shared lock only excludes exclusive ones, an
+    exclusive lock excludes every other lock. Locks are advisory: they only exclude processes that take
+    them too. They belong to the open lock file, so a process taking the same lock twice without
+    releasing it in between blocks itself.
+
+    Where fcntl is not available, as on Windows, locking does nothing.
+
+    Attributes:
+        filename: The name of the database file.
+        shared: Whether the lock is shared rather than exclusive.
+        timeout: How many seconds acquire waits for the lock at most, or None to wait forever.
+    """
+
+
+    def __init__(self, filename: str, shared: bool = False, timeout: float | None = None) -> None:
+        """
+        Initializes a FileLock object. The lock is taken by acquire, or by entering a with block.
+
+        Args:
+            filename: The name of the database file.
+            shared: Whether to take a shared lock rather than an exclusive one.
+            timeout: How many seconds acquire waits for the lock at most, or None to wait forever.
+
+        Returns:
+            None
+        """
+
+        self.filename = filename
+        self.shared = shared
+        self.timeout = timeout
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        """
+        Takes the lock, waiting until no other process holds a conflicting one.
+
+        Returns:
+            None
+
+        Raises:
+            TimeoutError: If the lock could not be taken within the timeout.
+        """
+
+        if fcntl is None:
+            return
+        fd = os.open(f"{self.filename}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+        operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        try:
+            if self.timeout is None:
+                fcntl.flock(fd, operation)
+            else:
+                deadline = time.monotonic() + self.timeout
+                while True:
+                    try:
+                        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(f"Timed out waiting for the lock on {self.filename}")
+                        time.sleep(0.005)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        """
+        Releases the lock, if it is held.
+
+        Returns:
+            None
+        """
+
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        """
+        Takes the lock at the start of a with block.
+
+        Returns:
+            The FileLock object.
+        """
+
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Releases the lock at the end of a with block.
+
+        Returns:
+            None
+        """
+
+        self.release()
+
+
+class ConflictError(ValueError):
+    """
+    Raised when a save would overwrite changes another process saved since the tasks were loaded.
+
+    Attributes:
+        ids: The IDs of the tasks changed or deleted both here and by the other process.
+    """
+
+
+    def __init__(self, ids: list[int]) -> None:
+        """
+        Initializes a ConflictError object.
+
+        Args:
+            ids: The IDs of the conflicting tasks.
+
+        Returns:
+            None
+        """
+
+        super().__init__(f"Tasks {', '.join(map(str, ids))} were changed by another process; load them again and retry")
+        self.ids = ids
+
+
+class SharedIdAllocator(IdAllocator):
+    """
+    An IdAllocator whose blocks are reserved from the high-water mark saved next to a database file,
+    so that processes creating tasks in the same file concurrently never hand out the same id.
+
+    Each reservation reads and saves "<filename>.meta" under an exclusive FileLock. A larger block_size
+    takes the lock less often, at the cost of skipping the ids left in a block when the process exits.
+
+    Attributes:
+        filename: The name of the database file.
+    """
+
+
+    def __init__(self, filename: str, high_water_mark: int = 0, block_size: int = 1) -> None:
+        """
+        Initializes a SharedIdAllocator object.
+
+        Args:
+            filename: The name of the database file.
+            high_water_mark: The highest id already in use or reserved.
+            block_size: How many ids to reserve at once when the current block runs out.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the block size is smaller than 1.
+        """
+
+        super().__init__(high_water_mark, block_size)
+        self.filename = filename
+
+    def _reserve_block(self, count: int) -> int:
+        """
+        Reserves a block of consecutive ids past both this allocator's and the saved high-water mark.
+
+        Args:
+            count: The number of ids to reserve.
+
+        Returns:
+            The first id of the reserved block.
+        """
+
+        with FileLock(self.filename):
+            start = max(load_high_water_mark(self.filename), self.high_water_mark) + 1
+            self.high_water_mark = start + count - 1
+            save_high_water_mark(self.filename, self.high_water_mark)
+        return start
+
+
+class SharedStorage(JsonStorage):
+    """
+    Stores tasks in a single JSON file, or binary snapshot, that several processes load and save concurrently.
+
+    Loads and saves run under a FileLock held only while the file is read or written, never while the
+    tasks are being worked on. Concurrency is optimistic: every task carries a version that the task
+    manager bumps on each change, and the storage remembers the version of each task it sees changed
+    or deleted. If the file was saved by another process since it was loaded, save reads it again and
+    merges: tasks created here are added, and tasks changed or deleted here replace or remove the saved
+    ones, as long as the other process left them at the version remembered. Changes to different tasks
+    therefore never block or overwrite each other. If the other process changed or deleted one of the
+    same tasks, save raises ConflictError and writes nothing; loading again and redoing the change
+    resolves it.
+
+    Only changes made through the task manager are merged; changes made through Task methods
+    directly are saved only when nobody else saved in between. New ids come from a SharedIdAllocator.
+
+    Attributes:
+        filename: The name of the database file.
+        id_block_size: How many ids the task manager's allocator reserves at once.
+    """
+
+
+    def __init__(self, filename: str = "data/database.json", id_block_size: int = 1) -> None:
+        """
+        Initializes a SharedStorage object.
+
+        Args:
+            filename: The name of the database file.
+            id_block_size: How many ids the task manager's allocator reserves at once.
+
+        Returns:
+            None
+        """
+
+        super().__init__(filename)
+        self.id_block_size = id_block_size
+        self._signature = None
+        self._forget()
+
+    def _forget(self) -> None:
+        """
+        Forgets the changes recorded since the last load or save.
+
+        Returns:
+            None
+        """
+
+        self._created: set[int] = set()
+        self._changed: set[int] = set()
+        self._deleted: set[int] = set()
+        self._versions: dict[int, int] = {}
+
+    def _current_signature(self) -> tuple | None:
+        """
+        Identifies the file as last saved. Every save replaces the file, so a new save gives a new signature.
+
+        Returns:
+            The inode, size and modification time of the file, or None if it does not exist.
+        """
+
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def load(self, manager: TaskManager) -> None:
+        """
+        Loads the file into a task manager under a shared lock, and gives it a SharedIdAllocator.
+
+        Args:
+            manager: The TaskManager to load the tasks into.
+
+        Returns:
+            None
+        """
+
+        manager.id_allocator = SharedIdAllocator(self.filename, block_size=self.id_block_size)
+        with FileLock(self.filename, shared=True):
+            manager.load_from_file(self.filename)
+            self._signature = self._current_signature()
+        self._forget()
+
+    def append(self, op: str, task: Task) -> None:
+        """
+        Records which task was changed, and its version before the first change since the last load or save.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+        if op == "create":
+            self._created.add(task.id)
+            return
+        if task.id in self._created:
+            if op == "delete":
+                self._created.discard(task.id)
+            return
+        # the task manager bumps the version of a changed task before telling the storage
+        self._versions.setdefault(task.id, task.version if op == "delete" else task.version - 1)
+        if op == "delete":
+            self._changed.discard(task.id)
+            self._deleted.add(task.id)
+        else:
+            self._changed.add(task.id)
+
+    def save(self, manager: TaskManager) -> None:
+        """
+        Saves a task manager under an exclusive lock, merging in the tasks another process saved since
+        the last load or save. The task manager then holds the merged tasks.
+
+        Args:
+            manager: The TaskManager to save.
+
+        Returns:
+            None
+
+        Raises:
+            ConflictError: If another process changed or deleted a task changed or deleted here.
+        """
+
+        with FileLock(self.filename):
+            if self._current_signature() != self._signature:
+                self._merge(manager)
+            saved_high_water_mark = load_high_water_mark(self.filename)
+            if saved_high_water_mark > manager.id_allocator.high_water_mark:
+                # do not lower the high-water mark past ids other processes have reserved
+                manager.id_allocator.observe(saved_high_water_mark)
+            manager.save_to_file(self.filename)
+            self._signature = self._current_signature()
+        self._forget()
+
+    def _merge(self, manager: TaskManager) -> None:
+        """
+        Replaces the tasks of a task manager with those saved in the file plus the changes recorded here.
+
+        Args:
+            manager: The TaskManager to merge into.
+
+        Returns:
+            None
+
+        Raises:
+            ConflictError: If a task changed or deleted here was changed or deleted in the file too.
+                The task manager is left as it was.
+        """
+
+        saved = TaskManager()
+        saved.load_from_file(self.filename)
+        conflicts = []
+        for id in sorted(self._changed | self._deleted):
+            try:
+                task = saved.get_task_by_id(id)
+            except ValueError:
+                if id in self._changed:
+                    conflicts.append(id)
+                continue
+            if task.version != self._versions[id]:
+                conflicts.append(id)
+        if conflicts:
+            raise ConflictError(conflicts)
+        for id in self._deleted:
+            try:
+                saved.delete_task(id)
+            except ValueError:
+                pass
+        for id in self._changed:
+            saved.delete_task(id)
+            saved.add_task(manager.get_task_by_id(id))
+        for id in sorted(self._created):
+            saved.add_task(manager.get_task_by_id(id))
+        manager.task_list = manager.task_list_factory(saved.task_list)
+        manager._reindex()
+        # the changes another process made are not known one by one
+        manager.changes.publish("reload")
+
+
+class ReadWriteLock:
+    """
+    A lock that many threads can hold for reading at once, or one thread for writing.
+
+    Writers are preferred: once a writer waits, new readers wait too, so a steady stream of readers
+    cannot starve it. The lock is reentrant: a thread holding it for writing can take it again for
+    reading or writing, and a thread holding it for reading can take it again for reading, without
+    touching the shared state. A thread holding it only for reading cannot take it for writing, since
+    two such threads would wait for each other forever.
+
+    The lock also counts writes, like a sequence lock: generation is odd while a writer holds the lock
+    and grows with every write, so a reader can read without the lock and then check that generation
+    was even and has not changed, instead of paying for taking the lock.
+
+    Attributes:
+        generation: Twice the number of writes so far, plus one while a writer holds the lock.
+    """
+
+
+    def __init__(self) -> None:
+        """
+        Initializes a ReadWriteLock object, not held by anybody.
+
+        Returns:
+            None
+        """
+
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        self.generation = 0
+        # how many times the current thread holds the lock for reading and for writing
+        self._held = threading.local()
+
+    def acquire_read(self) -> None:
+        """
+        Takes the lock for reading, waiting while a writer holds it or waits for it.
+
+        Returns:
+            None
+        """
+
+        held = self._held
+        reads = getattr(held, "reads", 0)
+        if reads or getattr(held, "writes", 0):
+            held.reads = reads + 1
+            return
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        held.reads = 1
+
+    def release_read(self) -> None:
+        """
+        Releases the lock taken by acquire_read.
+
+        Returns:
+            None
+        """
+
+        held = self._held
+        held.reads -= 1
+        if held.reads or getattr(held, "writes", 0):
+            return
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Takes the lock for writing, waiting until no other thread holds it.
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: If the thread holds the lock for reading only.
+        """
+
+        held = self._held
+        writes = getattr(held, "writes", 0)
+        if writes:
+            held.writes = writes + 1
+            return
+        if getattr(held, "reads", 0):
+            raise RuntimeError("Cannot take a read lock for writing")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+        self.generation += 1
+        held.writes = 1
+
+    def release_write(self) -> None:
+        """
+        Releases the lock taken by acquire_write.
+
+        Returns:
+            None
+        """
+
+        held = self._held
+        held.writes -= 1
+        if held.writes:
+            return
+        self.generation += 1
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def read(self):
+        """
+        Holds the lock for reading for the duration of a with block.
+
+        Yields:
+            None
+        """
+
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write(self):
+        """
+        Holds the lock for writing for the duration of a with block.
+
+        Yields:
+            None
+        """
+
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def _synchronized(name: str, write: bool):
+    """
+    Builds a ThreadSafeTaskManager method that runs the TaskManager method of the same name under its lock.
+
+    Args:
+        name: The name of the method.
+        write: Whether the method changes the task manager, and so needs the lock for writing.
+
+    Returns:
+        The method.
+    """
+
+    if write:
+        @functools.wraps(getattr(TaskManager, name))
+        def method(self, *args, **kwargs):
+            lock = self.lock
+            lock.acquire_write()
+            try:
+                return getattr(super(ThreadSafeTaskManager, self), name)(*args, **kwargs)
+            finally:
+                lock.release_write()
+    else:
+        @functools.wraps(getattr(TaskManager, name))
+        def method(self, *args, **kwargs):
+            lock = self.lock
+            lock.acquire_read()
+            try:
+                return getattr(super(ThreadSafeTaskManager, self), name)(*args, **kwargs)
+            finally:
+                lock.release_read()
+
+    return method
+
+
+class ThreadSafeTaskManager(TaskManager):
+    """
+    A TaskManager that threads can use concurrently, for example from the handlers of a threaded server.
+
+    Every method runs under a ReadWriteLock: lookups and queries hold it for reading, so any number of
+    them run together, while methods that create, change, delete, load or save tasks hold it for
+    writing, so they never see or leave task_list and its indexes half updated. The id and due date
+    indexes are built lazily by whichever query needs them first; queries running together take turns
+    to build them, under a separate mutex, so each is built once.
+
+    get_task_by_id, the most frequent call, first looks the task up without taking the lock and only
+    takes it if the lock's generation shows that a write ran meanwhile, or if the task is not found.
+
+    iter_tasks yields from a copy of task_list taken under the lock, and page_tasks returns an iterator
+    over a page read whole under the lock, so that the lock is not held while the caller consumes them.
+    query and reminders take their snapshot of the tasks under the lock, so no write lands between the
+    snapshot and the reminders following the change feed. export_bulk holds the lock for reading until
+    the file is written, and import_bulk holds it for writing until every chunk is added. Tasks must
+    not be changed through Task methods or task_list directly by one thread while others use the task
+    manager.
+
+    Attributes:
+        lock: The ReadWriteLock guarding the tasks.
+    """
+
+
+    def __init__(self, storage=None, group_commit: GroupCommit | None = None) -> None:
+        """
+        Initializes a ThreadSafeTaskManager object with an empty task list.
+
+        Args:
+            storage: An optional storage backend, such as task_manager.storage.JsonStorage.
+            group_commit: An optional GroupCommit policy for save.
+
+        Returns:
+            None
+        """
+
+        self.lock = ReadWriteLock()
+        self._build_lock = threading.RLock()
+        super().__init__(storage, group_commit)
+
+    def _reindex(self) -> None:
+        """
+        Rebuilds the id index from task_list, one thread at a time.
+
+        Returns:
+            None
+        """
+
+        with self._build_lock:
+            super()._reindex()
+
+    def _due_date_indexes(self):
+        """
+        Returns the due date indexes, building them if needed, one thread at a time.
+
+        Returns:
+            The index over all tasks and the index over tasks that are not completed.
+        """
+
+        with self._build_lock:
+            return super()._due_date_indexes()
+
+    def _search_index_for_tasks(self):
+        """
+        Returns the search index, building it if needed, one thread at a time.
+
+        Returns:
+            The SearchIndex over all tasks.
+        """
+
+        with self._build_lock:
+            return super()._search_index_for_tasks()
+
+    def get_task_by_id(self, id: int) -> Task:
+        """
+        Retrieves a task by its unique identifier.
+
+        Args:
+            id: The unique identifier of the task to retrieve.
+
+        Returns:
+            The Task object with the specified ID.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        generation = self.lock.generation
+        if not generation % 2:
+            position = self._positions.get(id)
+            try:
+                task = self.task_list[position] if position is not None else None
+            except IndexError:
+                task = None
+            if task is not None and task.id == id and self.lock.generation == generation:
+                return task
+        self.lock.acquire_read()
+        try:
+            return super().get_task_by_id(id)
+        finally:
+            self.lock.release_read()
+
+    def iter_tasks(self):
+        """
+        Iterates over a copy of the tasks taken when the iteration starts.
+
+        Yields:
+            Every Task object, in task_list order.
+        """
+
+        with self.lock.read():
+            tasks = list(self.task_list)
+        yield from tasks
+
+    def page_tasks(self, sort: str = "id", cursor: str | None = None, limit: int | None = None, due_after: datetime.datetime | None = None, due_before: datetime.datetime | None = None, completed: bool | None = None):
+        """
+        Lists tasks a page at a time, reading the whole page under the lock, see TaskManager.page_tasks.
+
+        Args:
+            sort: "id" to list tasks by id, "due" to list them by due date then id.
+            cursor: Only tasks after the one this cursor was built from are listed, if given.
+            limit: The maximum number of tasks to list, all of them by default.
+            due_after: Only tasks due at or after this datetime are listed, if given.
+            due_before: Only tasks due before this datetime are listed, if given.
+            completed: Only completed tasks are listed if True, only open ones if False.
+
+        Returns:
+            An iterator over the Task objects.
+
+        Raises:
+            ValueError: If the order or the cursor is invalid, or the limit is negative.
+        """
+
+        with self.lock.read():
+            page = list(super().page_tasks(sort, cursor, limit, due_after, due_before, completed))
+        return iter(page)
+
+    tasks_due_between = _synchronized("tasks_due_between", write=False)
+    overdue = _synchronized("overdue", write=False)
+    next_due = _synchronized("next_due", write=False)
+    search = _synchronized("search", write=False)
+    query = _synchronized("query", write=False)
+    reminders = _synchronized("reminders", write=False)
+    export_bulk = _synchronized("export_bulk", write=False)
+    import_bulk = _synchronized("import_bulk", write=True)
+    create_task = _synchronized("create_task", write=True)
+    create_tasks = _synchronized("create_tasks", write=True)
+    add_task = _synchronized("add_task", write=True)
+    add_tasks = _synchronized("add_tasks", write=True)
+    change_task = _synchronized("change_task", write=True)
+    complete_task = _synchronized("complete_task", write=True)
+    delete_task = _synchronized("delete_task", write=True)
+    mark_clean = _synchronized("mark_clean", write=True)
+    save = _synchronized("save", write=True)
+    load = _synchronized("load", write=True)
+    close = _synchronized("close", write=True)
+    save_to_file = _synchronized("save_to_file", write=True)
+    load_from_file = _synchronized("load_from_file", write=True)
@@ -1,6 +1,52 @@
+import collections
+import contextlib
 import datetime
+import itertools
 import json
-import random
+import os
+import re
+import threading
+import time
+
+from task_manager.indexes import DueDateIndex, SearchIndex
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+# The orders TaskManager.page_tasks can list tasks in
+SORT_ORDERS = ("id", "due")
+# The end of a JSON record: tasks are flat objects and strings cannot span lines, so a line ending in
+# a closing brace, and maybe a comma, ends a record
+RECORD_END = re.compile(r"\}[ \t\r]*,?[ \t\r]*\n")
+
+
+def to_epoch_microseconds(moment: datetime.datetime) -> int:
+    """
+    Converts a naive datetime to the number of microseconds since EPOCH.
+
+    Args:
+        moment: The datetime to convert.
+
+    Returns:
+        The number of microseconds since 1970-01-01 00:00.
+    """
+    
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_epoch_microseconds(microseconds: int) -> datetime.datetime:
+    """
+    Converts a number of microseconds since EPOCH back to a naive datetime.
+
+    Args:
+        microseconds: The number of microseconds since 1970-01-01 00:00.
+
+    Returns:
+        The corresponding datetime.
+    """
+    
+    # multiplying a timedelta is cheaper than constructing one from keyword arguments
+    return EPOCH + MICROSECOND * microseconds
 
 
 class Task:
@@ -16,10 +62,17 @@ class Task:
         created_at: The datetime when the task was created.
         due_date: The datetime when the task is due.
         completed: A boolean indicating if the task is completed.
+        version: How many times the task was changed through a TaskManager, which lets concurrent
+            writers of the same file tell whether a task was changed behind their back.
+
+    A task held by a TaskManager also refers to the manager's count of the changes made through Task
+    methods, which the methods bump, so that the manager knows it has to save them.
     """
     
+    __slots__ = ("id", "title", "description", "created_at", "due_date", "completed", "version", "_edits")
     
-    def __init__(self, id: int, title: str, description: str, created_at: datetime.datetime, due_date: datetime.datetime, completed: bool) -> None:
+    
+    def __init__(self, id: int, title: str, description: str, created_at: datetime.datetime, due_date: datetime.datetime, completed: bool, version: int = 0) -> None:
         """
         Initializes a Task object with the provided details.
 
@@ -30,6 +83,7 @@ class Task:
             created_at: The datetime when the task was created.
             due_date: The datetime when the task is due.
             completed: A boolean indicating if the task is completed.
+            version: How many times the task was changed through a TaskManager.
 
         Returns:
             None
@@ -41,6 +95,21 @@ class Task:
         self.created_at = created_at
         self.due_date = due_date
         self.completed = completed
+        self.version = version
+        # the count of changes of the TaskManager holding the task, a one-item list, or None
+        self._edits = None
+    
+    def _edited(self) -> None:
+        """
+        Counts a change made through a Task method in the TaskManager holding the task, if any.
+
+        Returns:
+            None
+        """
+        
+        edits = self._edits
+        if edits is not None:
+            edits[0] += 1
     
     def change_title(self, new_title: str):
         """
@@ -59,6 +128,7 @@ class Task:
         if not new_title or len(new_title) > 30:
             raise ValueError("Invalid length")
         self.title = new_title
+        self._edited()
     
     def change_description(self, new_description: str):
         """
@@ -77,6 +147,7 @@ class Task:
         if not new_description or len(new_description) > 300:
             raise ValueError("Invalid length")
         self. description = new_description
+        self._edited()
     
     def change_due_date(self, new_due_date: datetime.datetime):
         """
@@ -92,9 +163,10 @@ class Task:
             ValueError: If the new due date is in the past.
         """
         
-        if new_due_date > datetime.datetime.now():
+        if new_due_date < datetime.datetime.now():
             raise ValueError("Due time cannot be set to the past")
         self.due_date = new_due_date
+        self._edited()
     
     def complete_task(self, completed: bool = True):
         """
@@ -107,6 +179,7 @@ class Task:
             None
         """
         self.completed = completed
+        self._edited()
     
     def to_dict(self) -> dict:
         """
@@ -122,7 +195,8 @@ class Task:
             "description" : self.description,
             "created_at" : self.created_at.isoformat(),
             "due_date" : self.due_date.isoformat(),
-            "completed" : self.completed
+            "completed" : self.completed,
+            "version" : self.version
         }
     
     @classmethod
@@ -144,6 +218,7 @@ class Task:
             datetime.datetime.fromisoformat(data["created_at"]),
             datetime.datetime.fromisoformat(data["due_date"]),
             data["completed"],
+            data.get("version", 0),
         )
     
     
@@ -165,184 +240,1597 @@ class Task:
                 """
 
 
-class TaskManager:
+def iter_tasks_from_file(filename: str, on_error=None, chunk_size: int = 1024 * 1024):
     """
-    Manages a collection of tasks, allowing creation, modification, completion, deletion, and storage to a file.
+    Reads the tasks of a JSON file, as written by TaskManager.save_to_file, one at a time.
 
-    Methods to create, retrieve, update, complete, delete, list, save, and load tasks.
+    The file is read in chunks and the top-level array is decoded one element at a time, so tasks are
+    yielded before the whole file has been read, memory use does not grow with the file, and the caller
+    can stop early. A record that is not a valid task is reported and skipped. A record that cannot be
+    decoded at all is reported and skipped up to the next line ending a record, see RECORD_END, so the
+    tasks after it are still read; one cut short by a crash at the end of the file ends the iteration,
+    keeping every task read before it.
+
+    Args:
+        filename: The name of the file to read.
+        on_error: Called as on_error(offset, message) for every malformed record, where offset is the
+            character offset of the record in the file. By default the error is printed.
+        chunk_size: How many characters to read from the file at once.
+
+    Yields:
+        The Task objects stored in the file, in order.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        json.JSONDecodeError: If the file does not start with a JSON array.
+    """
+    
+    if on_error is None:
+        def on_error(offset: int, message: str) -> None:
+            print(f"Skipping malformed record at offset {offset} of {filename}: {message}")
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"[ \t\n\r]*")
+    with open(filename, "r") as file:
+        buffer = ""
+        base = 0  # offset in the file of buffer[0]
+        position = 0
+        expect = "["
+        while True:
+            position = whitespace.match(buffer, position).end()
+            if position == len(buffer):
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    if expect == "[":
+                        raise json.JSONDecodeError("Expecting '['", buffer, position)
+                    on_error(base + position, "Unexpected end of file")
+                    return
+                base += position
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            character = buffer[position]
+            if expect == "[":
+                if character != "[":
+                    raise json.JSONDecodeError("Expecting '['", buffer, position)
+                position += 1
+                expect = "first"
+                continue
+            if character == "]" and expect in ("first", ","):
+                return
+            if expect == ",":
+                expect = "value"
+                if character == ",":
+                    position += 1
+                else:
+                    on_error(base + position, "Expecting ',' delimiter")
+                continue
+            try:
+                data, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # the record may continue in the next chunks: read up to the line ending it, without
+                # decoding again until then, and skip it if it is still not valid
+                base += position
+                buffer = buffer[position:]
+                position = 0
+                scanned = 0
+                while (record_end := RECORD_END.search(buffer, scanned)) is None:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        on_error(base, error.msg)
+                        return
+                    scanned = max(buffer.rfind("}"), 0)
+                    buffer += chunk
+                try:
+                    data, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError as error:
+                    on_error(base, error.msg)
+                    position = record_end.end()
+                    expect = "value" if "," in record_end.group() else ","
+                    continue
+            offset = base + position
+            position = end
+            expect = ","
+            try:
+                task = Task.from_dict(data)
+            except (KeyError, TypeError, ValueError) as error:
+                on_error(offset, f"Invalid task: {error!r}")
+                continue
+            yield task
+
+
+def file_signature(filename: str) -> list:
+    """
+    Identifies the current contents of a file by its size and modification time.
+
+    Args:
+        filename: The name of the file.
+
+    Returns:
+        The size in bytes and the modification time in nanoseconds of the file.
+    """
+    
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def replace_atomically(filename: str, write, sync: bool = True) -> None:
+    """
+    Replaces a file so that a crash leaves either its old or its new contents, never a truncated mix.
+
+    The new contents are written to "<filename>.tmp", flushed to disk, and renamed over the file.
+
+    Args:
+        filename: The name of the file to replace.
+        write: Called as write(temporary_filename) to write the new contents.
+        sync: Whether to wait for the new contents, and the rename, to reach the disk. Without it the
+            file is still never seen half written, but a power failure may lose the replacement.
+
+    Returns:
+        None
+    """
+    
+    temporary_filename = f"{filename}.tmp"
+    try:
+        write(temporary_filename)
+        if sync:
+            with open(temporary_filename, "rb") as file:
+                os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(temporary_filename):
+            os.remove(temporary_filename)
+        raise
+    os.replace(temporary_filename, filename)
+    if sync and hasattr(os, "O_DIRECTORY"):
+        directory = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def save_high_water_mark(filename: str, high_water_mark: int, sync: bool = True) -> None:
+    """
+    Saves an id allocator's high-water mark to the "<filename>.meta" file kept next to a database file.
+
+    Args:
+        filename: The name of the database file.
+        high_water_mark: The high-water mark to save.
+        sync: Whether to wait for the file to reach the disk.
+
+    Returns:
+        None
+    """
+    
+    def write(temporary_filename: str) -> None:
+        with open(temporary_filename, "w") as file:
+            json.dump({"high_water_mark": high_water_mark}, file)
+    
+    replace_atomically(f"{filename}.meta", write, sync)
+
+
+def load_high_water_mark(filename: str) -> int:
+    """
+    Reads the high-water mark saved by save_high_water_mark next to a database file.
+
+    Args:
+        filename: The name of the database file.
+
+    Returns:
+        The saved high-water mark, or 0 if "<filename>.meta" is missing or unreadable.
+    """
+    
+    try:
+        with open(f"{filename}.meta", "r") as file:
+            return json.load(file)["high_water_mark"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return 0
+
+
+def check_change(selected_task_aspect: str, *args) -> None:
+    """
+    Checks the arguments of a TaskManager.change_task call without changing anything, so that the
+    fields of an edit can all be checked before the first is applied.
+
+    Args:
+        selected_task_aspect: The aspect of the task to change.
+        *args: Variable number of arguments based on the selected aspect.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the aspect or the arguments are invalid.
+    """
+    
+    match selected_task_aspect:
+        case "title" | "description":
+            if len(args) != 1 or not isinstance(args[0], str):
+                raise ValueError(f"Expected a single argument for {selected_task_aspect}.")
+            if not args[0] or len(args[0]) > (30 if selected_task_aspect == "title" else 300):
+                raise ValueError("Invalid length")
+        case "due_date":
+            if len(args) != 1 or not isinstance(args[0], datetime.datetime):
+                raise ValueError("Expected a single datetime argument for due_date.")
+            if args[0] < datetime.datetime.now():
+                raise ValueError("Due time cannot be set to the past")
+        case "complete_task":
+            if len(args) != 1 or not isinstance(args[0], bool):
+                raise ValueError("Expected a single boolean argument for complete_task.")
+        case _:
+            raise ValueError("Invalid task parameter name to change")
+
+
+def task_cursor(task: Task, sort: str = "id") -> str:
+    """
+    Builds the cursor that resumes a TaskManager.page_tasks listing after a task.
+
+    Args:
+        task: The last Task object of a page.
+        sort: The order of the listing, one of SORT_ORDERS.
+
+    Returns:
+        The cursor: the task's id, preceded by its due date when listing by due date.
+    """
+    
+    return str(task.id) if sort == "id" else f"{task.due_date.isoformat()},{task.id}"
+
+
+def parse_cursor(cursor: str, sort: str = "id"):
+    """
+    Decodes a cursor built by task_cursor.
+
+    Args:
+        cursor: The cursor.
+        sort: The order of the listing, one of SORT_ORDERS.
+
+    Returns:
+        The id of the last task listed when listing by id, or its (due date, id) pair when listing by due date.
+
+    Raises:
+        ValueError: If the cursor is not valid for the order.
+    """
+    
+    try:
+        if sort == "id":
+            return int(cursor)
+        due_date, id = cursor.rsplit(",", 1)
+        return datetime.datetime.fromisoformat(due_date), int(id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r} for sorting by {sort}")
+
+
+class GroupCommit:
+    """
+    A group commit policy: lets a TaskManager hold back saves so that several of them are committed,
+    and pay for writing and syncing the data, together.
+
+    A save is committed once max_pending saves have been requested since the last commit, or once
+    max_delay seconds have passed since the first of them was held back. Held back changes are only in
+    memory, so a crash loses them; TaskManager.close commits them.
 
     Attributes:
-        task_list: A list of Task objects managed by the TaskManager.
+        max_pending: How many saves to group into one commit.
+        max_delay: How many seconds a save may be held back at most.
+        pending: How many saves have been held back since the last commit.
     """
     
     
-    def __init__(self) -> None:
+    def __init__(self, max_pending: int = 1, max_delay: float = 0.0) -> None:
         """
-        Initializes a TaskManager object with an empty task list.
+        Initializes a GroupCommit object. The defaults commit every save.
+
+        Args:
+            max_pending: How many saves to group into one commit.
+            max_delay: How many seconds a save may be held back at most.
 
         Returns:
             None
         """
         
-        self.task_list: list[Task] = []
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.pending = 0
+        self._first_pending = 0.0
     
+    def request(self) -> bool:
+        """
+        Registers a save and decides whether to commit now.
+
+        Returns:
+            True if the pending saves should be committed now, False to hold this one back.
+        """
+        
+        now = time.monotonic()
+        if self.pending == 0:
+            self._first_pending = now
+        self.pending += 1
+        if self.pending >= self.max_pending or now - self._first_pending >= self.max_delay:
+            self.pending = 0
+            return True
+        return False
+
+
+class IdAllocator:
+    """
+    Hands out task ids that never collide, in O(1) per id.
+
+    Ids are handed out in increasing order from blocks reserved past a high-water mark, the highest id
+    ever reserved. Only the high-water mark has to be persisted for ids to stay unique across saves and loads;
+    ids left unused in a reserved block are skipped rather than reused.
+
+    Attributes:
+        high_water_mark: The highest id reserved so far.
+        next_id: The next id to hand out from the current block.
+        block_size: How many ids to reserve at once when the current block runs out.
+    """
     
-    def create_task(self, title: str, description: str, due_date: datetime.datetime) -> Task:
+    
+    def __init__(self, high_water_mark: int = 0, block_size: int = 1) -> None:
         """
-        Creates a new task with the provided details and adds it to the task list.
+        Initializes an IdAllocator that continues after the given high-water mark.
 
         Args:
-            title: The title of the task.
-            description: The description of the task.
-            due_date: The due date of the task.
+            high_water_mark: The highest id already in use or reserved.
+            block_size: How many ids to reserve at once when the current block runs out.
 
         Returns:
-            The created Task object.
-        
+            None
+
         Raises:
-            ValueError: If the due date is in the past.
+            ValueError: If the block size is smaller than 1.
         """
         
-        due_date = datetime.datetime.fromisoformat(due_date)
-        if due_date < datetime.datetime.now():
-            raise ValueError("Due time cannot be set to the past")
-        task = Task(random.randint(1,100), title, description, datetime.datetime.now(),due_date, False)
-        self.task_list.append(task)
-        return task
+        if block_size < 1:
+            raise ValueError("Block size must be at least 1")
+        self.high_water_mark = high_water_mark
+        self.next_id = high_water_mark + 1
+        self.block_size = block_size
+    
+    def _reserve_block(self, count: int) -> int:
+        """
+        Reserves a block of consecutive ids past the high-water mark.
+
+        Args:
+            count: The number of ids to reserve.
+
+        Returns:
+            The first id of the reserved block.
+        """
+        
+        start = self.high_water_mark + 1
+        self.high_water_mark += count
+        return start
     
+    def allocate(self) -> int:
+        """
+        Hands out the next unused id.
+
+        Returns:
+            A task id that has never been handed out before.
+        """
+        
+        if self.next_id > self.high_water_mark:
+            self.next_id = self._reserve_block(self.block_size)
+        id = self.next_id
+        self.next_id += 1
+        return id
     
-    def get_task_by_id(self, id: int) -> Task:
+    def reserve(self, count: int) -> range:
         """
-        Retrieves a task by its unique identifier.
+        Reserves a contiguous range of unused ids, for example for a batch import.
 
         Args:
-            id: The unique identifier of the task to retrieve.
+            count: The number of ids to reserve.
 
         Returns:
-            The Task object with the specified ID.
+            A range of ids that will not be handed out again.
 
         Raises:
-            ValueError: If no task exists with the given ID.
+            ValueError: If count is negative.
         """
         
-        for task in self.task_list:
-            if task.id == id:
-                return task
-        raise ValueError("Task with given ID does not exist.")
+        if count < 0:
+            raise ValueError("Cannot reserve a negative number of ids")
+        if self.high_water_mark - self.next_id + 1 < count:
+            self.next_id = self._reserve_block(max(count, self.block_size))
+        ids = range(self.next_id, self.next_id + count)
+        self.next_id += count
+        return ids
     
-    
-    def change_task(self, task_id: int, selected_task_aspect: str, *args) -> None:
+    def observe(self, id: int) -> None:
         """
-        Changes a specific aspect of a task identified by its ID.
+        Marks an id that is already in use, for example one loaded from a file, so it is never handed out.
 
         Args:
-            task_id: The ID of the task to modify.
-            selected_task_aspect: The aspect of the task to change.
-            *args: Variable number of arguments based on the selected aspect.
+            id: The id in use.
 
         Returns:
             None
-
-        Raises:
-            ValueError: If the task is not found, or if the arguments are invalid.
         """
         
-        task = self.get_task_by_id(task_id)
-        if not task:
-            raise ValueError("Task not found.")
+        if id > self.high_water_mark:
+            self.high_water_mark = id
+        if id >= self.next_id:
+            self.next_id = id + 1
 
-        match selected_task_aspect:
-            case "title":
-                if len(args) != 1:
-                    raise ValueError("Expected a single argument for title.")
-                task.change_title(args[0])
-            case "description":
-                if len(args) != 1:
-                    raise ValueError("Expected a single argument for description.")
-                task.change_description(args[0])
-            case "due_date":
-                if len(args) != 1 or not isinstance(args[0], datetime.datetime):
-                    raise ValueError("Expected a single datetime argument for due_date.")
-                task.change_due_date(args[0])
-            case "complete_task":
-                if len(args) != 1 or not isinstance(args[0], bool):
-                    raise ValueError("Expected a single boolean argument for complete_task.")
-                task.complete_task(args[0])
-            case _:
-                raise ValueError("Invalid task parameter name to change")
+
+class StaleRevisionError(ValueError):
+    """
+    Raised by ChangeFeed.since for a revision whose later changes are no longer all kept, or that the
+    feed never reached, such as one from before the process restarted. The reader has to read every
+    task again, then follow the changes after ChangeFeed.revision.
+
+    Attributes:
+        revision: The revision asked for.
+        current: The feed's current revision.
+    """
     
-    def complete_task(self, id:int) -> None:
+    
+    def __init__(self, revision: int, current: int) -> None:
         """
-        Marks a task as completed.
+        Initializes a StaleRevisionError object.
 
         Args:
-            id: The ID of the task to mark as completed.
+            revision: The revision asked for.
+            current: The feed's current revision.
 
         Returns:
             None
         """
         
-        task_to_complete = self.get_task_by_id(id)
-        task_to_complete.completed = True
+        super().__init__(f"Changes since revision {revision} are not available, the current revision is {current}; read every task again")
+        self.revision = revision
+        self.current = current
+
+
+class ChangeFeed:
+    """
+    Numbers every change made through a task manager and keeps the latest ones, so that readers such as
+    caches and web clients can catch up on what changed instead of reading every task again.
+
+    Every change gets the next revision number. The feed keeps the last capacity changes in a ring
+    buffer, each with the state of its task right after it, and hands out those after a revision a
+    reader already has. A change is also passed to every subscriber as soon as it is made. The tasks
+    being loaded again, from the file or merged with another process's changes, is a "reload" change,
+    after which readers have to read every task again. The changes made within a batch block are
+    published as one such reload.
+
+    Changes are published by one thread at a time, as a task manager's changes are made, but can be
+    read and waited for from any thread.
+
+    Attributes:
+        capacity: How many changes are kept.
+        revision: The revision of the latest change, 0 before any.
+    """
     
     
-    def delete_task(self,id: int) -> None:
+    def __init__(self, capacity: int = 10_000) -> None:
         """
-        Deletes a task by its ID.
+        Initializes a ChangeFeed object with no changes.
 
         Args:
-            id: The ID of the task to delete.
+            capacity: How many changes to keep.
 
         Returns:
             None
         """
         
-        index_of_the_task_to_delete = [task.id for task in self.task_list].index(id)
-        task_to_delete = self.task_list[index_of_the_task_to_delete]
-        self.task_list.pop(index_of_the_task_to_delete)
-        return task_to_delete
+        self.capacity = capacity
+        self.revision = 0
+        self._events = collections.deque(maxlen=capacity)
+        self._subscribers = []
+        self._condition = threading.Condition()
+        self._waiting = 0
+        self._batching = 0
+        self._batched = False
     
-    def list_tasks(self) -> None:
+    def publish(self, op: str, task: Task | None = None) -> int:
         """
-        Prints a list of all tasks in the task manager.
+        Records a change.
+
+        Args:
+            op: The kind of change: "create", "change", "complete", "delete" or "reload".
+            task: The Task object that was changed, or None for a reload.
 
         Returns:
+            The revision of the change, or the current revision within a batch block.
+        """
+        
+        if self._batching:
+            self._batched = True
+            return self.revision
+        # the task's fields are copied, as the task can change again, or be a view of a row that moves
+        state = None if task is None or op == "delete" else (task.id, task.title, task.description, task.created_at, task.due_date, task.completed, task.version)
+        # publishing is on the path of every change, so it takes no lock: the event is appended before the
+        # revision moves on, and the condition is only notified when a reader waits on it
+        event = (self.revision + 1, op, None if task is None else task.id, state)
+        self._events.append(event)
+        self.revision = event[0]
+        if self._waiting:
+            with self._condition:
+                self._condition.notify_all()
+        for callback in self._subscribers:
+            callback(self._to_dict(event))
+        return event[0]
+    
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Publishes the changes made within a block as a single "reload" at its end, for changes too many
+        for readers to follow one by one, such as those of a bulk import.
+
+        Yields:
             None
         """
-        for task in self.task_list:
-            print(task)
+        
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if not self._batching and self._batched:
+                self._batched = False
+                self.publish("reload")
     
+    @staticmethod
+    def _to_dict(event: tuple) -> dict:
+        """
+        Decodes a recorded change.
+
+        Args:
+            event: The change as recorded by publish.
+
+        Returns:
+            The change's "revision", "op", task "id" and "task", the task's state after the change as
+            from Task.to_dict, or None for deletions and reloads.
+        """
+        
+        revision, op, id, state = event
+        return {"revision": revision, "op": op, "id": id, "task": None if state is None else Task(*state).to_dict()}
     
-    def save_to_file(self, filename: str = "data/database.json") -> None:
+    def since(self, revision: int) -> list[dict]:
         """
-        Saves the task manager data to a JSON file.
+        Returns the changes made after a revision.
 
         Args:
-            filename: The name of the file to save the data to.
+            revision: The revision the reader is at, 0 for a reader that has seen no change.
 
         Returns:
-            None
+            The changes after the revision, as from _to_dict, oldest first.
+
+        Raises:
+            StaleRevisionError: If some of the changes are no longer kept, or the revision is ahead of the feed.
         """
         
-        with open(filename, "w") as file:
-            json.dump([task.to_dict() for task in self.task_list], file, indent=4)
+        # copying the deque is atomic, where iterating over it would fail if a change were published meanwhile
+        events = list(self._events)
+        current = events[-1][0] if events else self.revision
+        oldest = events[0][0] if events else current + 1
+        if revision < oldest - 1 or revision > current:
+            raise StaleRevisionError(revision, current)
+        return [self._to_dict(event) for event in events[revision - oldest + 1:]]
     
-    def load_from_file(self, filename: str = "data/database.json") -> None:
+    def wait(self, revision: int, timeout: float | None = None) -> bool:
         """
-        Loads task data from a JSON file into the task manager.
+        Blocks until there is a change after a revision.
 
         Args:
-            filename: The name of the file to load data from.
+            revision: The revision the reader is at.
+            timeout: How many seconds to wait at most, forever by default.
+
+        Returns:
+            Whether there is a change after the revision.
+        """
+        
+        with self._condition:
+            self._waiting += 1
+            try:
+                return self._condition.wait_for(lambda: self.revision > revision, timeout)
+            finally:
+                self._waiting -= 1
+    
+    def subscribe(self, callback):
+        """
+        Calls a function with every change from now on, right after it is made, in the thread that made it.
+
+        Args:
+            callback: Called with each change, as from _to_dict.
+
+        Returns:
+            A function without arguments that cancels the subscription.
+        """
+        
+        self._subscribers = self._subscribers + [callback]
+        
+        def unsubscribe() -> None:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber is not callback]
+        
+        return unsubscribe
+
+
+class TaskManager:
+    """
+    Manages a collection of tasks, allowing creation, modification, completion, deletion, and storage to a file.
+
+    Methods to create, retrieve, update, complete, delete, list, save, and load tasks.
+
+    Tasks are looked up through an id index that maps each task id to its position in task_list,
+    so retrieving, changing, completing and deleting a task does not scan the whole list.
+    The index is kept in sync by create_task, delete_task and load_from_file and is rebuilt
+    lazily when task_list is modified directly.
+
+    New tasks get their ids from an IdAllocator whose high-water mark is saved next to the task data,
+    in a "<filename>.meta" file, so ids are never reused across saves and loads.
+
+    Queries by due date go through two DueDateIndex objects, one over all tasks and one over open tasks.
+    They are built on the first such query and kept up to date by create_task, add_task, change_task,
+    complete_task and delete_task from then on, so tasks should be changed through the TaskManager.
+    Keyword searches go through a SearchIndex over titles and descriptions that is maintained the same way,
+    and that save_to_file stores in "<filename>.search" so the first search after load_from_file does not have to rebuild it.
+
+    Every task created, changed, completed or deleted through the TaskManager, and every load, is
+    published on a ChangeFeed, whose changes_since and subscribe let readers follow the changes.
+
+    A TaskManager can be given a storage backend (see task_manager.storage). The backend is told about
+    every task created, changed, completed or deleted through the TaskManager, and is used by load and save.
+    save only writes when something changed since the last load or save: a task changed through the
+    TaskManager or through a Task method called on one of its tasks, or task_list changed in length. A GroupCommit policy can make
+    it hold back saves further, so that frequent saves are committed in groups.
+
+    Attributes:
+        task_list: A list of Task objects managed by the TaskManager.
+        id_allocator: The IdAllocator handing out ids for new tasks.
+        storage: The storage backend used by load and save, or None.
+        group_commit: The GroupCommit policy save follows, or None to commit every save.
+        task_list_factory: Builds task_list, empty or from an iterable of tasks. Subclasses can use a
+            different container, such as task_manager.columnar.TaskStore.
+        instrumentation: The task_manager.instrumentation.Instrumentation recording the task manager's
+            operations, or None. Set by instrument.
+        changes: The ChangeFeed the changes are published on.
+    """
+    
+    task_list_factory = list
+    instrumentation = None
+    
+    
+    def __init__(self, storage=None, group_commit: GroupCommit | None = None) -> None:
+        """
+        Initializes a TaskManager object with an empty task list.
+
+        Args:
+            storage: An optional storage backend, such as task_manager.storage.JsonStorage.
+            group_commit: An optional GroupCommit policy for save.
 
         Returns:
             None
         """
         
-        try:
-            with open(filename, "r") as file:
-                tasks_data = json.load(file)
-                self.task_list = [Task.from_dict(data) for data in tasks_data]
-        except FileNotFoundError:
-            print(f"No file named {filename} found. Starting with an empty task manager.")
-        except json.JSONDecodeError:
-            print(f"Error decoding JSON from the file {filename}. Starting with an empty task manager.")
\ No newline at end of file
+        self.task_list: list[Task] = self.task_list_factory()
+        self.storage = storage
+        self.group_commit = group_commit
+        self._dirty = False
+        # changes made through Task methods to the tasks in task_list, which refer to this list
+        self._edits = [0]
+        self._clean_edits = 0
+        self.id_allocator = IdAllocator()
+        self._positions: dict[int, int] = {}
+        self._indexed_length = 0
+        self._due_index: DueDateIndex | None = None
+        self._open_due_index: DueDateIndex | None = None
+        self._search_index: SearchIndex | None = None
+        # the search index saved with the file last loaded, read on the first search unless a task changes first
+        self._saved_search_index: tuple[str, list] | None = None
+        self.changes = ChangeFeed()
+    
+    
+    def _reindex(self) -> None:
+        """
+        Rebuilds the id index from task_list.
+
+        When several tasks share an id the first one wins, the same task a linear scan would find.
+        Every id found is also marked as in use in the id allocator, and every task is made to count
+        its changes through Task methods in the task manager.
+
+        Returns:
+            None
+        """
+        
+        # built aside and swapped in, so that a lookup running meanwhile sees either index whole
+        positions = self._build_positions()
+        self._positions = positions
+        self._indexed_length = len(self.task_list)
+        if positions:
+            self.id_allocator.observe(max(positions))
+        self._due_index = None
+        self._open_due_index = None
+        self._search_index = None
+        self._saved_search_index = None
+    
+    def _build_positions(self) -> dict:
+        """
+        Maps every id in task_list to its first position, and makes every task count its changes through
+        Task methods in the task manager.
+
+        Returns:
+            The id index, a dictionary from id to position.
+        """
+        
+        positions = {}
+        edits = self._edits
+        for position, task in enumerate(self.task_list):
+            positions.setdefault(task.id, position)
+            task._edits = edits
+        return positions
+    
+    
+    def _find(self, id: int) -> int | None:
+        """
+        Finds the position of a task in task_list using the id index.
+
+        Args:
+            id: The unique identifier of the task to find.
+
+        Returns:
+            The position of the task in task_list, or None if no task has the given ID.
+        """
+        
+        position = self._positions.get(id)
+        if position is not None and position < len(self.task_list) and self.task_list[position].id == id:
+            return position
+        if position is not None or self._indexed_length != len(self.task_list):
+            # task_list was modified behind the index's back
+            self._reindex()
+            return self._positions.get(id)
+        return None
+    
+    
+    def create_task(self, title: str, description: str, due_date: datetime.datetime) -> Task:
+        """
+        Creates a new task with the provided details and adds it to the task list.
+
+        Args:
+            title: The title of the task.
+            description: The description of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            The created Task object.
+        
+        Raises:
+            ValueError: If the due date is in the past.
+        """
+        
+        due_date = datetime.datetime.fromisoformat(due_date)
+        if due_date < datetime.datetime.now():
+            raise ValueError("Due time cannot be set to the past")
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        task = Task(self.id_allocator.allocate(), title, description, datetime.datetime.now(),due_date, False)
+        self._append(task)
+        self._record("create", task)
+        return task
+    
+    
+    def create_tasks(self, entries) -> list[Task]:
+        """
+        Creates many tasks at once, as calling create_task for each of them would.
+
+        All due dates are checked against a single current time and all ids are reserved in one block.
+        The new ids are not looked up in the id index, and the due date indexes, if built, are dropped
+        and rebuilt on their next use instead of being updated task by task.
+
+        Args:
+            entries: An iterable of (title, description, due_date) tuples, with due_date a datetime or
+                a string in ISO format.
+
+        Returns:
+            The created Task objects, in order.
+
+        Raises:
+            ValueError: If a due date is invalid or in the past. No task is created then.
+        """
+        
+        now = datetime.datetime.now()
+        entries = [
+            (title, description, due_date if isinstance(due_date, datetime.datetime) else datetime.datetime.fromisoformat(due_date))
+            for title, description, due_date in entries
+        ]
+        if any(due_date < now for _, _, due_date in entries):
+            raise ValueError("Due time cannot be set to the past")
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        if len(entries) > 1:
+            self._due_index = self._open_due_index = None
+        tasks = []
+        for id, (title, description, due_date) in zip(self.id_allocator.reserve(len(entries)), entries):
+            task = Task(id, title, description, now, due_date, False)
+            self._append(task)
+            self._record("create", task)
+            tasks.append(task)
+        return tasks
+    
+    
+    def add_task(self, task: Task) -> Task:
+        """
+        Adds an existing Task object, keeping its id, to the task list.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            The added Task object.
+
+        Raises:
+            ValueError: If a task with the same ID already exists.
+        """
+        
+        if self._find(task.id) is not None:
+            raise ValueError("Task with given ID already exists.")
+        self._append(task)
+        self.id_allocator.observe(task.id)
+        self._record("create", task)
+        return task
+    
+    
+    def add_tasks(self, tasks) -> list[Task]:
+        """
+        Adds many existing Task objects at once, keeping their ids, as calling add_task for each of them would.
+
+        Every id is checked before any task is added. The due date and search indexes, if built, are
+        dropped and rebuilt on their next use instead of being updated task by task.
+
+        Args:
+            tasks: A list of Task objects, or a task_manager.columnar.TaskStore if task_list is one,
+                which is then copied column by column.
+
+        Returns:
+            The added Task objects, in order.
+
+        Raises:
+            ValueError: If a task has the ID of an existing task, or of another of the tasks. No task is added then.
+        """
+        
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        ids = [task.id for task in tasks]
+        if len(set(ids)) != len(ids) or any(self._find(id) is not None for id in ids):
+            raise ValueError("Task with given ID already exists.")
+        start = len(self.task_list)
+        self.task_list.extend(tasks)
+        self._positions.update(zip(ids, range(start, len(self.task_list))))
+        self._indexed_length = len(self.task_list)
+        if ids:
+            self.id_allocator.observe(max(ids))
+            self._due_index = self._open_due_index = self._search_index = None
+        added = [self.task_list[position] for position in range(start, len(self.task_list))]
+        for task in added:
+            task._edits = self._edits
+            self._record("create", task)
+        return added
+    
+    
+    def _append(self, task: Task) -> None:
+        """
+        Appends a task to task_list and the id index.
+
+        Args:
+            task: The Task object to append.
+
+        Returns:
+            None
+        """
+        
+        self.task_list.append(task)
+        task._edits = self._edits
+        self._positions.setdefault(task.id, len(self.task_list) - 1)
+        self._indexed_length = len(self.task_list)
+        self._index_due_date(task.id, task.due_date, task.completed)
+        if self._search_index is not None:
+            self._search_index.add(task.id, task.title, task.description)
+    
+    
+    def _index_due_date(self, id: int, due_date: datetime.datetime, completed: bool) -> None:
+        """
+        Adds a task to the due date indexes, if they have been built.
+
+        Args:
+            id: The ID of the task.
+            due_date: The due date of the task.
+            completed: Whether the task is completed.
+
+        Returns:
+            None
+        """
+        
+        if self._due_index is not None:
+            self._due_index.add(id, due_date)
+            if not completed:
+                self._open_due_index.add(id, due_date)
+    
+    
+    def _unindex_due_date(self, id: int, due_date: datetime.datetime, completed: bool) -> None:
+        """
+        Removes a task from the due date indexes, if they have been built.
+
+        Args:
+            id: The ID of the task.
+            due_date: The due date the task is indexed under.
+            completed: Whether the task was completed when it was indexed.
+
+        Returns:
+            None
+        """
+        
+        if self._due_index is not None:
+            self._due_index.remove(id, due_date)
+            if not completed:
+                self._open_due_index.remove(id, due_date)
+    
+    
+    def _unindex_task(self, task: Task) -> None:
+        """
+        Removes a deleted task from the due date and search indexes, if they have been built.
+
+        Args:
+            task: The deleted Task object.
+
+        Returns:
+            None
+        """
+        
+        self._unindex_due_date(task.id, task.due_date, task.completed)
+        if self._search_index is not None:
+            self._search_index.remove(task.id, task.title, task.description)
+    
+    
+    def _due_date_indexes(self) -> tuple[DueDateIndex, DueDateIndex]:
+        """
+        Returns the due date indexes over all tasks and over open tasks, building them if needed.
+
+        Returns:
+            The index over all tasks and the index over tasks that are not completed.
+        """
+        
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        if self._due_index is None:
+            self._due_index = DueDateIndex(self.task_list)
+            self._open_due_index = DueDateIndex(task for task in self.task_list if not task.completed)
+        return self._due_index, self._open_due_index
+    
+    
+    def _search_index_for_tasks(self) -> SearchIndex:
+        """
+        Returns the search index, loading the one saved with the file last loaded or building it if needed.
+
+        Returns:
+            The SearchIndex over all tasks.
+        """
+        
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        if self._search_index is None and self._saved_search_index is not None:
+            self._search_index = SearchIndex.load(*self._saved_search_index)
+            self._saved_search_index = None
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.task_list)
+        return self._search_index
+    
+    
+    def _record(self, op: str, task: Task) -> None:
+        """
+        Tells the storage backend, if there is one, about a change made through the task manager, and
+        publishes it on the change feed. A changed or completed task gets its version bumped first.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+        
+        self._dirty = True
+        self._saved_search_index = None
+        if op in ("change", "complete"):
+            task.version += 1
+        if self.storage is not None:
+            self.storage.append(op, task)
+        self.changes.publish(op, task)
+    
+    
+    def get_task_by_id(self, id: int) -> Task:
+        """
+        Retrieves a task by its unique identifier.
+
+        Args:
+            id: The unique identifier of the task to retrieve.
+
+        Returns:
+            The Task object with the specified ID.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+        
+        position = self._find(id)
+        if position is None:
+            raise ValueError("Task with given ID does not exist.")
+        return self.task_list[position]
+    
+    
+    def change_task(self, task_id: int, selected_task_aspect: str, *args) -> None:
+        """
+        Changes a specific aspect of a task identified by its ID.
+
+        Args:
+            task_id: The ID of the task to modify.
+            selected_task_aspect: The aspect of the task to change.
+            *args: Variable number of arguments based on the selected aspect.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the task is not found, or if the arguments are invalid.
+        """
+        
+        task = self.get_task_by_id(task_id)
+        if not task:
+            raise ValueError("Task not found.")
+        due_date, completed = task.due_date, task.completed
+        title, description = task.title, task.description
+
+        check_change(selected_task_aspect, *args)
+        match selected_task_aspect:
+            case "title":
+                task.change_title(args[0])
+            case "description":
+                task.change_description(args[0])
+            case "due_date":
+                task.change_due_date(args[0])
+            case "complete_task":
+                task.complete_task(args[0])
+        if (due_date, completed) != (task.due_date, task.completed):
+            self._unindex_due_date(task.id, due_date, completed)
+            self._index_due_date(task.id, task.due_date, task.completed)
+        if self._search_index is not None and (title, description) != (task.title, task.description):
+            self._search_index.remove(task.id, title, description)
+            self._search_index.add(task.id, task.title, task.description)
+        self._record("change", task)
+    
+    def complete_task(self, id:int) -> None:
+        """
+        Marks a task as completed.
+
+        Args:
+            id: The ID of the task to mark as completed.
+
+        Returns:
+            None
+        """
+        
+        task_to_complete = self.get_task_by_id(id)
+        if not task_to_complete.completed and self._open_due_index is not None:
+            self._open_due_index.remove(task_to_complete.id, task_to_complete.due_date)
+        task_to_complete.completed = True
+        self._record("complete", task_to_complete)
+    
+    
+    def delete_task(self,id: int) -> None:
+        """
+        Deletes a task by its ID.
+
+        The last task in task_list is moved into the freed slot, so deleting does not shift
+        the rest of the list but does not preserve the order of the remaining tasks either.
+
+        Args:
+            id: The ID of the task to delete.
+
+        Returns:
+            The deleted Task object.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+        
+        position = self._find(id)
+        if position is None:
+            raise ValueError("Task with given ID does not exist.")
+        task_to_delete = self.task_list[position]
+        last_task = self.task_list.pop()
+        del self._positions[id]
+        if position < len(self.task_list):
+            self.task_list[position] = last_task
+            if self._positions.get(last_task.id) == len(self.task_list):
+                self._positions[last_task.id] = position
+        self._indexed_length = len(self.task_list)
+        self._unindex_task(task_to_delete)
+        self._record("delete", task_to_delete)
+        return task_to_delete
+    
+    def tasks_due_between(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks due in a range of time, in O(log n + k) for k tasks found.
+
+        Args:
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+
+        Returns:
+            The Task objects due in the range, ordered by due date.
+        """
+        
+        due_index, _ = self._due_date_indexes()
+        return [self.get_task_by_id(id) for id in due_index.between(start, end)]
+    
+    def overdue(self, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks that are past their due date and not completed, in O(log n + k) for k tasks found.
+
+        Args:
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            The overdue Task objects, ordered by due date.
+        """
+        
+        _, open_due_index = self._due_date_indexes()
+        return [self.get_task_by_id(id) for id in open_due_index.between(None, now or datetime.datetime.now())]
+    
+    def next_due(self, count: int, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the open tasks that will become due next, in O(log n + count).
+
+        Args:
+            count: The maximum number of tasks to find.
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            Up to count Task objects that are not completed and not yet due, ordered by due date.
+        """
+        
+        _, open_due_index = self._due_date_indexes()
+        return [self.get_task_by_id(id) for id in open_due_index.first(count, now or datetime.datetime.now())]
+    
+    def search(self, query: str) -> list[Task]:
+        """
+        Finds the tasks whose title or description contain the words of a query.
+
+        All words of the query have to match; alternatives can be combined with OR, and a word
+        ending in "*" matches every word starting with it, for example "invoice* OR report".
+
+        Args:
+            query: The words to look for.
+
+        Returns:
+            The matching Task objects, ordered by ID.
+        """
+        
+        return [self.get_task_by_id(id) for id in sorted(self._search_index_for_tasks().search(query))]
+    
+    def iter_tasks(self):
+        """
+        Iterates over all tasks in the task manager.
+
+        Yields:
+            Every Task object, in task_list order.
+        """
+        
+        yield from self.task_list
+    
+    def page_tasks(self, sort: str = "id", cursor: str | None = None, limit: int | None = None, due_after: datetime.datetime | None = None, due_before: datetime.datetime | None = None, completed: bool | None = None):
+        """
+        Lists tasks a page at a time, in a stable order, without building the whole list.
+
+        The next page starts after the last task of this one: pass task_cursor(last_task, sort) as its
+        cursor. Pages are found through the id index or the due date index, so reading a page costs
+        about the same however far into the tasks it is; tasks created or deleted between pages do not
+        shift the pages that follow.
+
+        Args:
+            sort: "id" to list tasks by id, "due" to list them by due date then id.
+            cursor: Only tasks after the one this cursor was built from are listed, if given.
+            limit: The maximum number of tasks to list, all of them by default.
+            due_after: Only tasks due at or after this datetime are listed, if given.
+            due_before: Only tasks due before this datetime are listed, if given.
+            completed: Only completed tasks are listed if True, only open ones if False.
+
+        Returns:
+            An iterator over the Task objects.
+
+        Raises:
+            ValueError: If the order or the cursor is invalid, or the limit is negative.
+        """
+        
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Cannot sort tasks by {sort}, only by one of {', '.join(SORT_ORDERS)}")
+        if limit is not None and limit < 0:
+            raise ValueError("The limit cannot be negative")
+        after = None if cursor is None else parse_cursor(cursor, sort)
+        if sort == "id":
+            tasks = self._tasks_by_id(0 if after is None else after)
+        else:
+            tasks = self._tasks_by_due_date(after, due_after, due_before, completed is False)
+        if due_after is not None or due_before is not None or completed is not None:
+            tasks = (
+                task for task in tasks
+                if (due_after is None or task.due_date >= due_after)
+                and (due_before is None or task.due_date < due_before)
+                and (completed is None or task.completed == completed)
+            )
+        return itertools.islice(tasks, limit)
+    
+    def _tasks_by_id(self, after: int):
+        """
+        Iterates over the tasks by id, walking the ids up from after through the id index.
+
+        Ids are handed out in increasing order, so they are mostly dense and walking them costs O(k)
+        for k tasks read. When most ids left are unused, the ids found are sorted instead.
+
+        Args:
+            after: Only tasks with a higher id are yielded.
+
+        Yields:
+            The Task objects, ordered by ID.
+        """
+        
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+        last = self.id_allocator.high_water_mark
+        if last - after > 2 * len(self.task_list):
+            ids = sorted(id for id in self._positions if id > after)
+        else:
+            ids = range(after + 1, last + 1)
+        for id in ids:
+            position = self._find(id)
+            if position is not None:
+                yield self.task_list[position]
+    
+    def _tasks_by_due_date(self, after: tuple[datetime.datetime, int] | None, start: datetime.datetime | None, end: datetime.datetime | None, open_only: bool):
+        """
+        Iterates over the tasks by due date through the due date indexes.
+
+        Args:
+            after: Only tasks after this (due date, id) pair are yielded, if given.
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+            open_only: Whether only tasks that are not completed are wanted, which their own index holds.
+
+        Yields:
+            The Task objects, ordered by due date then id.
+        """
+        
+        due_index, open_due_index = self._due_date_indexes()
+        for id in (open_due_index if open_only else due_index).iter_after(after, start, end):
+            yield self.get_task_by_id(id)
+    
+    def list_tasks(self) -> None:
+        """
+        Prints a list of all tasks in the task manager.
+
+        Returns:
+            None
+        """
+        for task in self.iter_tasks():
+            print(task)
+    
+    
+    def query(self, now: datetime.datetime | None = None):
+        """
+        Takes a column-oriented snapshot of the tasks to count, group and sort them in single passes,
+        see task_manager.query.
+
+        Args:
+            now: The time tasks are overdue at, datetime.datetime.now() by default.
+
+        Returns:
+            The TaskQuery over the tasks.
+        """
+        
+        from task_manager.query import TaskQuery
+        return TaskQuery.from_manager(self, now)
+    
+    def reminders(self, lead: datetime.timedelta = datetime.timedelta(0), callbacks=()):
+        """
+        Starts keeping reminders of the open tasks, fired lead before they are due, see task_manager.scheduler.
+        The reminders follow every later change made through the task manager.
+
+        Args:
+            lead: How long before its due date to remind of a task.
+            callbacks: Functions to call with the id and due date of each task reminded of.
+
+        Returns:
+            The ReminderScheduler, to be driven by its run coroutine or its start method.
+        """
+        
+        from task_manager.scheduler import ReminderScheduler
+        return ReminderScheduler(self, lead, callbacks)
+    
+    @property
+    def revision(self) -> int:
+        """
+        The revision of the latest change published on the change feed.
+
+        Returns:
+            The revision, 0 before any change.
+        """
+        
+        return self.changes.revision
+    
+    def changes_since(self, revision: int) -> list[dict]:
+        """
+        Returns the changes made after a revision, see ChangeFeed.since.
+
+        Args:
+            revision: The revision the reader is at, 0 for a reader that has seen no change.
+
+        Returns:
+            The changes after the revision, oldest first, each with its "revision", "op", task "id" and
+            "task", the task's state after the change, or None for deletions and reloads.
+
+        Raises:
+            StaleRevisionError: If some of the changes are no longer kept; every task has to be read again.
+        """
+        
+        return self.changes.since(revision)
+    
+    def subscribe(self, callback):
+        """
+        Calls a function with every change from now on, see ChangeFeed.subscribe.
+
+        Args:
+            callback: Called with each change, as returned by changes_since.
+
+        Returns:
+            A function without arguments that cancels the subscription.
+        """
+        
+        return self.changes.subscribe(callback)
+    
+    def instrument(self):
+        """
+        Starts recording how often the task manager's operations run, how long they take and how many
+        bytes they read and write, see task_manager.instrumentation. Until then nothing is recorded and
+        operations run at full speed.
+
+        Returns:
+            The Instrumentation recording the operations.
+        """
+        
+        if self.instrumentation is None:
+            from task_manager.instrumentation import Instrumentation
+            Instrumentation().attach(self)
+        return self.instrumentation
+    
+    def stats(self) -> dict:
+        """
+        Returns the statistics recorded since instrument was called.
+
+        Returns:
+            The count, cumulative, mean and percentile latencies in microseconds, and bytes read and
+            written, of every operation that ran, by name; empty if the task manager is not instrumented.
+        """
+        
+        return {} if self.instrumentation is None else self.instrumentation.stats()
+    
+    @property
+    def dirty(self) -> bool:
+        """
+        Whether the tasks may have changed since the last load or save.
+
+        Returns:
+            True if a task was created, changed, completed or deleted through the task manager, a task
+            of the task manager was changed through a Task method, or task_list changed in length.
+        """
+        
+        return self._dirty or self._edits[0] != self._clean_edits or self._indexed_length != len(self.task_list)
+    
+    def mark_clean(self) -> None:
+        """
+        Records that the tasks are in the state last loaded or saved.
+
+        Returns:
+            None
+        """
+        
+        self._dirty = False
+        self._clean_edits = self._edits[0]
+        if self._indexed_length != len(self.task_list):
+            self._reindex()
+    
+    def save(self) -> None:
+        """
+        Saves the task manager data through its storage backend, if it changed since the last load or save.
+
+        With a group_commit policy, the save may be held back until more saves have been requested.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the task manager has no storage backend.
+        """
+        
+        if self.storage is None:
+            raise ValueError("Task manager has no storage backend")
+        if not self.dirty:
+            return
+        if self.group_commit is not None and not self.group_commit.request():
+            return
+        self.storage.save(self)
+        self.mark_clean()
+    
+    def load(self) -> None:
+        """
+        Loads task data through the task manager's storage backend.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the task manager has no storage backend.
+        """
+        
+        if self.storage is None:
+            raise ValueError("Task manager has no storage backend")
+        # the changes replayed by the storage, and the reload of the file, are published as a single reload
+        with self.changes.batch():
+            self.storage.load(self)
+            self.mark_clean()
+            self.changes.publish("reload")
+    
+    
+    def close(self) -> None:
+        """
+        Commits the saves held back by the group commit policy, if any, and releases the resources
+        held by the task manager's storage backend, if it has one.
+
+        Returns:
+            None
+        """
+        
+        if self.storage is not None:
+            if self.group_commit is not None and self.group_commit.pending and self.dirty:
+                self.group_commit.pending = 0
+                self.storage.save(self)
+                self.mark_clean()
+            self.storage.close()
+    
+    
+    def save_to_file(self, filename: str = "data/database.json", sync: bool = True) -> None:
+        """
+        Saves the task manager data to a JSON file, and the id allocator's high-water mark to "<filename>.meta".
+
+        A filename ending in ".bin" is saved as a binary snapshot instead, see task_manager.snapshot.
+
+        Both files are replaced atomically with replace_atomically, so a crash during a save leaves the
+        previous save intact. The high-water mark is saved first: if the data then fails to be saved, ids
+        are skipped rather than reused.
+
+        If the search index has been built it is saved to "<filename>.search", marked with the size and
+        modification time of the saved file so it is only reused for this exact data, and replaced
+        atomically as well. An index that was never built is not saved, so saves do not pay for it
+        when nothing searches.
+
+        Args:
+            filename: The name of the file to save the data to.
+            sync: Whether to wait for the files to reach the disk.
+
+        Returns:
+            None
+        """
+        
+        from task_manager.snapshot import is_snapshot, write_snapshot
+        
+        def write_json(temporary_filename: str) -> None:
+            with open(temporary_filename, "w") as file:
+                json.dump([task.to_dict() for task in self.task_list], file, indent=4)
+        
+        save_high_water_mark(filename, self.id_allocator.high_water_mark, sync)
+        if is_snapshot(filename):
+            replace_atomically(filename, lambda temporary_filename: write_snapshot(temporary_filename, self.task_list), sync)
+        else:
+            replace_atomically(filename, write_json, sync)
+        if self._search_index is not None:
+            signature = file_signature(filename)
+            replace_atomically(f"{filename}.search", lambda temporary_filename: self._search_index.save(temporary_filename, signature), sync)
+    
+    def load_from_file(self, filename: str = "data/database.json") -> None:
+        """
+        Loads task data from a JSON file, or from a binary snapshot if filename ends in ".bin", into the task manager.
+
+        The id allocator continues after the high-water mark saved in "<filename>.meta", or after the
+        highest loaded id if that is larger or the file is missing.
+
+        A search index saved with the file is loaded by the first search, unless the file has changed
+        since it was saved or a task is changed through the task manager before.
+
+        The file is read with iter_tasks_from_file, so malformed records are reported with their offsets
+        and skipped instead of discarding the whole file. The load is published on the change feed as a
+        "reload".
+
+        Args:
+            filename: The name of the file to load data from.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the file is a snapshot that cannot be read, such as one cut short, or a JSON
+                file that does not hold an array of tasks; the tasks are left as they were.
+        """
+        
+        self.id_allocator.observe(load_high_water_mark(filename))
+        from task_manager.snapshot import is_snapshot, iter_snapshot
+        try:
+            tasks = iter_snapshot(filename) if is_snapshot(filename) else iter_tasks_from_file(filename)
+            self.task_list = self.task_list_factory(tasks)
+            self._reindex()
+            self._saved_search_index = (f"{filename}.search", file_signature(filename))
+            self.changes.publish("reload")
+        except FileNotFoundError:
+            print(f"No file named {filename} found. Starting with an empty task manager.")
+        except json.JSONDecodeError as error:
+            # starting empty would let the next save overwrite the file
+            raise ValueError(f"Cannot read the JSON file {filename}: {error}") from error
+        except ValueError as error:
+            # starting empty would let the next save overwrite the snapshot
+            raise ValueError(f"Cannot read the snapshot {filename}: {error}") from error
+    
+    def import_bulk(self, filename: str, format: str | None = None, workers: int | None = None, chunk_size: int = 1024 * 1024) -> int:
+        """
+        Adds the tasks of a JSON, NDJSON or CSV file, keeping their ids, parsing the file in parallel
+        with task_manager.bulk.read_chunks.
+
+        The file is split into chunks that worker processes parse into TaskStore columns, and each chunk
+        is added with add_tasks as soon as it is parsed, so only a few chunks are held at once. The
+        import is published on the change feed as a single "reload" rather than a change per task.
+
+        Args:
+            filename: The name of the file to read.
+            format: "json", "ndjson" or "csv", guessed from the file's extension by default.
+            workers: How many worker processes parse the file, one per CPU by default; with 1 the file
+                is parsed in this process.
+            chunk_size: About how many characters of the file make a chunk.
+
+        Returns:
+            The number of tasks added.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If a record is not a valid task or has the ID of an existing task. The chunks
+                added before it are kept.
+        """
+        
+        from task_manager.bulk import read_chunks
+        from task_manager.columnar import TaskStore
+        
+        count = 0
+        with self.changes.batch():
+            for chunk in read_chunks(filename, format, workers, chunk_size):
+                count += len(self.add_tasks(chunk if isinstance(self.task_list, TaskStore) else chunk.to_tasks()))
+        return count
+    
+    def export_bulk(self, filename: str, format: str | None = None, workers: int | None = None, chunk_size: int = 10_000) -> int:
+        """
+        Writes every task to a JSON, NDJSON or CSV file, formatting it in parallel with
+        task_manager.bulk.write_chunks.
+
+        The tasks are taken chunk by chunk as TaskStore columns, which worker processes format, and
+        each formatted chunk is written out as soon as it is ready, so only a few chunks are held at
+        once. A file is replaced atomically once it is written whole.
+
+        Args:
+            filename: The name of the file to write, or "-" for standard output.
+            format: "json", "ndjson" or "csv", guessed from the file's extension by default.
+            workers: How many worker processes format the tasks, one per CPU by default; with 1 the
+                tasks are formatted in this process.
+            chunk_size: How many tasks make a chunk.
+
+        Returns:
+            The number of tasks written.
+        """
+        
+        from task_manager.bulk import write_chunks
+        return write_chunks(self.iter_tasks(), filename, format, workers, chunk_size)
@@ -0,0 +1,41 @@
+import os
+
+
+# Kept apart from task_manager.storage, which imports the task models, so that the CLI can parse its
+# arguments, and answer --help, without importing them
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATABASE = os.path.join(DATA, "database.json")
+SQLITE_DATABASE = os.path.join(DATA, "database.sqlite3")
+SNAPSHOT_DATABASE = os.path.join(DATA, "database.bin")
+SHARDED_DATABASE = os.path.join(DATA, "database.shards")
+STORAGES = ("json", "log", "sqlite", "lazy", "sharded")
+
+
+def default_database(storage: str = "json") -> str:
+    """
+    Returns the database file a storage backend uses when none is given.
+
+    Args:
+        storage: The name of the backend, as for task_manager.storage.open_task_manager.
+
+    Returns:
+        SQLITE_DATABASE for "sqlite", SNAPSHOT_DATABASE for "lazy", SHARDED_DATABASE for "sharded"
+        and DATABASE otherwise.
+    """
+
+    return {"sqlite": SQLITE_DATABASE, "lazy": SNAPSHOT_DATABASE, "sharded": SHARDED_DATABASE}.get(storage, DATABASE)
+
+
+def daemon_socket_path(storage: str = "json", filename: str | None = None) -> str:
+    """
+    Returns the path of the Unix socket a daemon serving a database listens on.
+
+    Args:
+        storage: The name of the backend, as for task_manager.storage.open_task_manager.
+        filename: The database file, by default default_database(storage).
+
+    Returns:
+        The database file name with ".sock" appended.
+    """
+
+    return f"{filename or default_database(storage)}.sock"
@@ -0,0 +1,350 @@
+import datetime
+from array import array
+
+try:
+    import numpy
+except ImportError:  # optional, the queries fall back to pure Python
+    numpy = None
+
+from task_manager.columnar import TaskStore
+from task_manager.models import EPOCH, from_epoch_microseconds, to_epoch_microseconds
+
+
+# The fields tasks can be sorted by with TaskQuery.sort_by
+SORT_FIELDS = ("id", "created_at", "due_date", "completed")
+# The keys tasks can be grouped by with TaskQuery.group_by
+GROUP_KEYS = ("completed", "overdue", "due_day", "created_day")
+DAY = 24 * 60 * 60 * 1_000_000
+
+
+class TaskQuery:
+    """
+    Counts, groups and sorts tasks over a column-oriented snapshot of the fields they are queried by.
+
+    The snapshot holds the ids, creation times, due dates and completion flags of all tasks in
+    parallel arrays, timestamps as microseconds since the epoch, and is taken once, so a dashboard
+    can run many queries without going through Task objects again. A ColumnarTaskManager's columns
+    are copied as they are; other task managers are read once, task by task. Every query then makes a
+    single pass over the columns, vectorized with NumPy if it is installed and in plain Python
+    otherwise; both give the same results.
+
+    The snapshot does not follow later changes to the tasks: take a new one to see them.
+
+    Attributes:
+        ids: The task ids.
+        created_at: The creation times, in microseconds since the epoch.
+        due_dates: The due dates, in microseconds since the epoch.
+        completed: The completion flags, one byte per task.
+        now: The time tasks are overdue at, in microseconds since the epoch.
+        vectorized: Whether queries run on NumPy.
+    """
+
+
+    def __init__(self, tasks=(), now: datetime.datetime | None = None, vectorized: bool | None = None) -> None:
+        """
+        Initializes a TaskQuery object over a snapshot of tasks.
+
+        Args:
+            tasks: An iterable of Task objects, or a TaskStore whose columns are copied.
+            now: The time tasks are overdue at, datetime.datetime.now() by default.
+            vectorized: Whether to use NumPy; by default it is used if it is installed.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If NumPy is asked for but not installed.
+        """
+
+        if vectorized and numpy is None:
+            raise ValueError("NumPy is not installed")
+        self.vectorized = numpy is not None if vectorized is None else vectorized
+        self.now = to_epoch_microseconds(now or datetime.datetime.now())
+        if isinstance(tasks, TaskStore):
+            self.ids = array("q", tasks.ids)
+            self.created_at = array("q", tasks.created_at)
+            self.due_dates = array("q", tasks.due_dates)
+            self.completed = bytearray(tasks.completed)
+        else:
+            # a column at a time, which runs each conversion in a tighter loop than a task at a time
+            tasks = tasks if isinstance(tasks, list) else list(tasks)
+            self.ids = array("q", [task.id for task in tasks])
+            self.created_at = array("q", [to_epoch_microseconds(task.created_at) for task in tasks])
+            self.due_dates = array("q", [to_epoch_microseconds(task.due_date) for task in tasks])
+            self.completed = bytearray([task.completed for task in tasks])
+        if self.vectorized:
+            # views sharing the memory of the arrays
+            self._columns = {
+                "id": numpy.frombuffer(self.ids, dtype=numpy.int64),
+                "created_at": numpy.frombuffer(self.created_at, dtype=numpy.int64),
+                "due_date": numpy.frombuffer(self.due_dates, dtype=numpy.int64),
+                "completed": numpy.frombuffer(self.completed, dtype=numpy.uint8).astype(bool),
+            }
+        else:
+            self._columns = {"id": self.ids, "created_at": self.created_at, "due_date": self.due_dates, "completed": self.completed}
+
+    @classmethod
+    def from_manager(cls, manager, now: datetime.datetime | None = None, vectorized: bool | None = None) -> "TaskQuery":
+        """
+        Takes a snapshot of the tasks of a task manager.
+
+        Args:
+            manager: The TaskManager whose tasks to query.
+            now: The time tasks are overdue at, datetime.datetime.now() by default.
+            vectorized: Whether to use NumPy; by default it is used if it is installed.
+
+        Returns:
+            The TaskQuery over the task manager's tasks.
+        """
+
+        task_list = getattr(manager, "task_list", None)
+        return cls(task_list if isinstance(task_list, TaskStore) else manager.iter_tasks(), now, vectorized)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of tasks in the snapshot.
+
+        Returns:
+            The number of tasks.
+        """
+
+        return len(self.ids)
+
+    def _selected(self, completed: bool | None, overdue: bool | None, due_after: datetime.datetime | None, due_before: datetime.datetime | None):
+        """
+        Selects the tasks matching every filter given.
+
+        Args:
+            completed: Only completed tasks if True, only open ones if False.
+            overdue: Only tasks past their due date and not completed if True, only others if False.
+            due_after: Only tasks due at or after this datetime, if given.
+            due_before: Only tasks due before this datetime, if given.
+
+        Returns:
+            A boolean NumPy array if vectorized, a list of row numbers otherwise, or None if no filter was given.
+        """
+
+        if completed is None and overdue is None and due_after is None and due_before is None:
+            return None
+        low = None if due_after is None else to_epoch_microseconds(due_after)
+        high = None if due_before is None else to_epoch_microseconds(due_before)
+        now = self.now
+        if self.vectorized:
+            due_dates, done = self._columns["due_date"], self._columns["completed"]
+            selected = numpy.ones(len(self), dtype=bool)
+            if completed is not None:
+                selected &= done == completed
+            if overdue is not None:
+                selected &= (~done & (due_dates < now)) == overdue
+            if low is not None:
+                selected &= due_dates >= low
+            if high is not None:
+                selected &= due_dates < high
+            return selected
+        return [
+            row for row, (due_date, done) in enumerate(zip(self.due_dates, self.completed))
+            if (completed is None or bool(done) == completed)
+            and (overdue is None or (not done and due_date < now) == overdue)
+            and (low is None or due_date >= low)
+            and (high is None or due_date < high)
+        ]
+
+    def count(self, completed: bool | None = None, overdue: bool | None = None, due_after: datetime.datetime | None = None, due_before: datetime.datetime | None = None) -> int:
+        """
+        Counts the tasks matching every filter given.
+
+        Args:
+            completed: Only completed tasks if True, only open ones if False.
+            overdue: Only tasks past their due date and not completed if True, only others if False.
+            due_after: Only tasks due at or after this datetime, if given.
+            due_before: Only tasks due before this datetime, if given.
+
+        Returns:
+            The number of matching tasks.
+        """
+
+        selected = self._selected(completed, overdue, due_after, due_before)
+        if selected is None:
+            return len(self)
+        return int(selected.sum()) if self.vectorized else len(selected)
+
+    def summary(self) -> dict:
+        """
+        Counts the tasks by state.
+
+        Returns:
+            The numbers of tasks in all, completed, open and overdue, as "total", "completed", "open" and "overdue".
+        """
+
+        if self.vectorized:
+            done = self._columns["completed"]
+            completed = int(done.sum())
+            overdue = int((~done & (self._columns["due_date"] < self.now)).sum())
+        else:
+            now = self.now
+            completed = sum(self.completed)
+            overdue = sum(1 for due_date, done in zip(self.due_dates, self.completed) if not done and due_date < now)
+        return {"total": len(self), "completed": completed, "open": len(self) - completed, "overdue": overdue}
+
+    def group_by(self, key: str, completed: bool | None = None, overdue: bool | None = None, due_after: datetime.datetime | None = None, due_before: datetime.datetime | None = None) -> dict:
+        """
+        Counts the tasks matching every filter given in groups.
+
+        Args:
+            key: What to group by: "completed" or "overdue" for True and False, "due_day" or
+                "created_day" for the datetime.date a task is due or was created on.
+            completed: Only completed tasks if True, only open ones if False.
+            overdue: Only tasks past their due date and not completed if True, only others if False.
+            due_after: Only tasks due at or after this datetime, if given.
+            due_before: Only tasks due before this datetime, if given.
+
+        Returns:
+            The number of tasks in each group that has any, by group, in ascending order.
+
+        Raises:
+            ValueError: If the key is not one of GROUP_KEYS.
+        """
+
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Cannot group tasks by {key}, only by one of {', '.join(GROUP_KEYS)}")
+        selected = self._selected(completed, overdue, due_after, due_before)
+        if self.vectorized:
+            if key == "completed":
+                values = self._columns["completed"]
+            elif key == "overdue":
+                values = ~self._columns["completed"] & (self._columns["due_date"] < self.now)
+            else:
+                values = self._columns["due_date" if key == "due_day" else "created_at"] // DAY
+            if selected is not None:
+                values = values[selected]
+            groups, counts = numpy.unique(values, return_counts=True)
+            groups, counts = groups.tolist(), counts.tolist()
+        else:
+            rows = range(len(self)) if selected is None else selected
+            if key == "completed":
+                values = (bool(self.completed[row]) for row in rows)
+            elif key == "overdue":
+                values = (not self.completed[row] and self.due_dates[row] < self.now for row in rows)
+            else:
+                column = self.due_dates if key == "due_day" else self.created_at
+                values = (column[row] // DAY for row in rows)
+            found = {}
+            for value in values:
+                found[value] = found.get(value, 0) + 1
+            groups = sorted(found)
+            counts = [found[group] for group in groups]
+        if key in ("due_day", "created_day"):
+            groups = [(EPOCH + datetime.timedelta(days=day)).date() for day in groups]
+        return dict(zip(groups, counts))
+
+    def histogram(self, bucket: datetime.timedelta = datetime.timedelta(days=1), start: datetime.datetime | None = None, end: datetime.datetime | None = None, completed: bool | None = None, overdue: bool | None = None) -> list[tuple[datetime.datetime, int]]:
+        """
+        Counts the tasks matching every filter given by due date, in buckets of equal length.
+
+        Args:
+            bucket: The length of a bucket, a day by default.
+            start: The start of the first bucket, if given; tasks due earlier are left out. By default
+                buckets are aligned on multiples of their length since the epoch, from the one holding
+                the earliest due date of a matching task.
+            end: Tasks due at or after this datetime are left out, if given.
+            completed: Only completed tasks if True, only open ones if False.
+            overdue: Only tasks past their due date and not completed if True, only others if False.
+
+        Returns:
+            The start of every bucket from the first to the last with a task, with the number of tasks due in it.
+
+        Raises:
+            ValueError: If the bucket length is not positive.
+        """
+
+        width = bucket // datetime.timedelta(microseconds=1)
+        if width <= 0:
+            raise ValueError("The bucket length has to be positive")
+        selected = self._selected(completed, overdue, start, end)
+        if self.vectorized:
+            due_dates = self._columns["due_date"] if selected is None else self._columns["due_date"][selected]
+            if not len(due_dates):
+                return []
+            origin = to_epoch_microseconds(start) if start is not None else int(due_dates.min()) // width * width
+            counts = numpy.bincount((due_dates - origin) // width).tolist()
+        else:
+            due_dates = self.due_dates if selected is None else [self.due_dates[row] for row in selected]
+            if not len(due_dates):
+                return []
+            origin = to_epoch_microseconds(start) if start is not None else min(due_dates) // width * width
+            counts = [0] * ((max(due_dates) - origin) // width + 1)
+            for due_date in due_dates:
+                counts[(due_date - origin) // width] += 1
+        return [(from_epoch_microseconds(origin + number * width), count) for number, count in enumerate(counts)]
+
+    def sort_by(self, *keys: str, limit: int | None = None) -> list[int]:
+        """
+        Orders the tasks by several fields, each one breaking the ties of the ones before it.
+
+        Args:
+            keys: The fields to sort by, from SORT_FIELDS, each prefixed with "-" to sort it in
+                descending order; ties left are broken by id.
+            limit: The maximum number of ids to return, all of them by default.
+
+        Returns:
+            The ids of the tasks in order; TaskManager.get_task_by_id finds the tasks.
+
+        Raises:
+            ValueError: If no key, or a field not in SORT_FIELDS, is given.
+        """
+
+        if not keys:
+            raise ValueError("Give at least one field to sort by")
+        fields = []
+        for key in keys:
+            field = key.lstrip("-")
+            if field not in SORT_FIELDS:
+                raise ValueError(f"Cannot sort tasks by {field}, only by {', '.join(SORT_FIELDS)}")
+            fields.append((field, key.startswith("-")))
+        fields.append(("id", False))
+        if self.vectorized:
+            columns = []
+            for field, descending in fields:
+                column = self._columns[field].astype(numpy.int64)
+                columns.append(-column if descending else column)
+            # lexsort sorts by its last key first
+            order = numpy.lexsort(columns[::-1])
+            return self._columns["id"][order[:limit]].tolist()
+        order = list(range(len(self)))
+        self._sort_rows(order, fields)
+        return [self.ids[row] for row in order[:limit]]
+
+    def _sort_rows(self, rows: list[int], fields: list[tuple[str, bool]]) -> None:
+        """
+        Sorts row numbers by several fields in plain Python.
+
+        The rows are sorted by the first field alone, which compares plain integers, and only the runs
+        of rows tied on it are sorted by the next fields, so that sorting by several fields costs little
+        more than sorting by one when ties are rare.
+
+        Args:
+            rows: The row numbers, sorted in place.
+            fields: The fields to sort by, as (field, descending) pairs.
+
+        Returns:
+            None
+        """
+
+        (field, descending), rest = fields[0], fields[1:]
+        column = self._columns[field]
+        rows.sort(key=column.__getitem__, reverse=descending)
+        if not rest:
+            return
+        values = list(map(column.__getitem__, rows))
+        # the positions holding the same value as the one before, consecutive within a run of ties
+        ties = [position for position, (previous, value) in enumerate(zip(values, values[1:]), 1) if previous == value]
+        start = last = None
+        for position in ties + [None]:
+            if last is not None and position != last + 1:
+                run = rows[start - 1:last + 1]
+                self._sort_rows(run, rest)
+                rows[start - 1:last + 1] = run
+                start = None
+            if start is None:
+                start = position
+            last = position
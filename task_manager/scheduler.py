@@ -0,0 +1,334 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import threading
+
+from task_manager.models import TaskManager
+
+
+# The longest the scheduler sleeps at once, so that a change of the system clock delays reminders by at most this
+MAX_SLEEP_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """
+    Reminds of tasks shortly before they become due, sleeping until the next reminder instead of
+    scanning every task on a timer.
+
+    The open tasks not due yet are kept in a min-heap ordered by reminder time, lead before each
+    task's due date, and in a table from task id to the due date it is reminded of. The scheduler
+    follows the task manager's change feed, so creating a task, changing its due date, completing it
+    or deleting it updates the heap in O(log n): a new reminder is pushed, and the one it replaces
+    stays in the heap and is skipped when it comes up, as the table no longer matches it. The heap is
+    rebuilt from the table once the skipped reminders outnumber the pending ones.
+
+    Reminders are fired by fire_due, which run calls from the event loop and start calls from a timer
+    thread, each time the earliest reminder is reached. Every callback is called with the id and the
+    due date of the task; a callback that raises is logged, and the other callbacks and reminders are
+    still called. A task is reminded of once; changing it afterwards only reminds of it again
+    if its due date is moved so that its reminder is in the future again. A task that is due when it
+    is added, or when the scheduler starts, is not reminded of, as it is already overdue.
+
+    Attributes:
+        task_manager: The TaskManager whose tasks are reminded of.
+        lead: How long before its due date a task is reminded of.
+        callbacks: The functions called with the id and due date of each task reminded of.
+        clock: Returns the current datetime.
+    """
+
+
+    def __init__(self, task_manager: TaskManager, lead: datetime.timedelta = datetime.timedelta(0), callbacks=(), clock=datetime.datetime.now) -> None:
+        """
+        Initializes a ReminderScheduler object with the open tasks not due yet, and starts following the task manager's changes.
+
+        Args:
+            task_manager: The TaskManager whose tasks to remind of.
+            lead: How long before its due date to remind of a task.
+            callbacks: Functions to call with the id and due date of each task reminded of.
+            clock: Returns the current datetime.
+
+        Returns:
+            None
+        """
+
+        self.task_manager = task_manager
+        self.lead = lead
+        self.callbacks = list(callbacks)
+        self.clock = clock
+        self._heap: list[tuple[datetime.datetime, int, datetime.datetime]] = []
+        self._pending: dict[int, datetime.datetime] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._woken: asyncio.Event | None = None
+        self._rebuild()
+        self._unsubscribe = task_manager.subscribe(self._on_change)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of tasks that have yet to be reminded of.
+
+        Returns:
+            The number of pending reminders.
+        """
+
+        return len(self._pending)
+
+    def _rebuild(self) -> None:
+        """
+        Schedules a reminder for every open task not due yet, replacing the current ones.
+
+        Returns:
+            None
+        """
+
+        now = self.clock()
+        pending = {task.id: task.due_date for task in self.task_manager.iter_tasks() if not task.completed and task.due_date > now}
+        # heapify is O(n), where sorting by due date, or reading the due date index in order, is O(n log n)
+        heap = [(due_date - self.lead, id, due_date) for id, due_date in pending.items()]
+        heapq.heapify(heap)
+        with self._condition:
+            self._pending = pending
+            self._heap = heap
+            self._wake()
+
+    def _compact(self) -> None:
+        """
+        Rebuilds the heap from the pending reminders once it holds more skipped reminders than pending ones.
+        Must be called holding the condition's lock.
+
+        Returns:
+            None
+        """
+
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [(due_date - self.lead, id, due_date) for id, due_date in self._pending.items()]
+            heapq.heapify(self._heap)
+
+    def _wake(self) -> None:
+        """
+        Wakes the timer thread or the run coroutine, so that it sleeps until the new earliest reminder.
+        Must be called holding the condition's lock.
+
+        Returns:
+            None
+        """
+
+        self._condition.notify_all()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._woken.set)
+
+    def schedule(self, id: int, due_date: datetime.datetime) -> None:
+        """
+        Schedules a reminder for a task, replacing the one it had.
+
+        Args:
+            id: The ID of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            None
+        """
+
+        entry = (due_date - self.lead, id, due_date)
+        with self._condition:
+            self._pending[id] = due_date
+            heapq.heappush(self._heap, entry)
+            earliest = self._heap[0] is entry
+            self._compact()
+            if earliest:
+                self._wake()
+
+    def cancel(self, id: int) -> None:
+        """
+        Cancels the reminder of a task. Does nothing if the task has none.
+
+        Args:
+            id: The ID of the task.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            if self._pending.pop(id, None) is not None:
+                self._compact()
+
+    def _on_change(self, change: dict) -> None:
+        """
+        Updates the reminders after a change published on the task manager's change feed.
+
+        Args:
+            change: The change, as from TaskManager.changes_since.
+
+        Returns:
+            None
+        """
+
+        op = change["op"]
+        if op == "reload":
+            self._rebuild()
+            return
+        task = change["task"]
+        # the reminder is read and replaced under the lock, so the timer thread cannot fire it in between
+        with self._condition:
+            if op in ("complete", "delete") or task["completed"]:
+                self.cancel(change["id"])
+                return
+            due_date = datetime.datetime.fromisoformat(task["due_date"])
+            current = self._pending.get(change["id"])
+            if due_date == current:
+                return
+            now = self.clock()
+            if op == "create" or current is not None or due_date - self.lead > now:
+                if due_date > now:
+                    self.schedule(change["id"], due_date)
+                else:
+                    self.cancel(change["id"])
+
+    def next_reminder(self) -> datetime.datetime | None:
+        """
+        Returns when the next reminder is due.
+
+        Returns:
+            The datetime of the earliest pending reminder, or None if there is none.
+        """
+
+        with self._condition:
+            while self._heap and self._pending.get(self._heap[0][1]) != self._heap[0][2]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def fire_due(self, now: datetime.datetime | None = None) -> list[tuple[int, datetime.datetime]]:
+        """
+        Fires every reminder that is due, calling the callbacks with each of them in order. A callback
+        that raises is logged and does not stop the others.
+
+        Args:
+            now: The current datetime; the clock's by default.
+
+        Returns:
+            The id and due date of each task reminded of.
+        """
+
+        now = self.clock() if now is None else now
+        fired = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, id, due_date = heapq.heappop(self._heap)
+                if self._pending.get(id) == due_date:
+                    del self._pending[id]
+                    fired.append((id, due_date))
+        for id, due_date in fired:
+            for callback in self.callbacks:
+                try:
+                    callback(id, due_date)
+                except Exception:
+                    logger.exception("Reminder callback %r failed for task %s", callback, id)
+        return fired
+
+    def _seconds_to_next(self) -> float | None:
+        """
+        Returns how long to sleep until the earliest reminder in the heap, skipped or not.
+        Must be called holding the condition's lock.
+
+        Returns:
+            The number of seconds, at most MAX_SLEEP_SECONDS and 0 if the reminder is due, or None if there is none.
+        """
+
+        if not self._heap:
+            return None
+        return max(0.0, min((self._heap[0][0] - self.clock()).total_seconds(), MAX_SLEEP_SECONDS))
+
+    async def run(self) -> None:
+        """
+        Fires the reminders from the running event loop as they become due, until cancelled.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            self._woken = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self._woken.clear()
+                with self._condition:
+                    timeout = self._seconds_to_next()
+                if timeout == 0:
+                    self.fire_due()
+                    continue
+                try:
+                    await asyncio.wait_for(self._woken.wait(), MAX_SLEEP_SECONDS if timeout is None else timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._condition:
+                self._loop = None
+
+    def start(self) -> None:
+        """
+        Starts firing the reminders from a timer thread as they become due, until stop is called.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the timer thread is already running.
+        """
+
+        if self._thread is not None:
+            raise ValueError("The scheduler is already running")
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run_thread, name="reminders", daemon=True)
+        self._thread.start()
+
+    def _run_thread(self) -> None:
+        """
+        The timer thread: sleeps until the earliest reminder or a wake-up, and fires the reminders that are due.
+
+        Returns:
+            None
+        """
+
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                timeout = self._seconds_to_next()
+                if timeout != 0:
+                    self._condition.wait(MAX_SLEEP_SECONDS if timeout is None else timeout)
+                    continue
+            self.fire_due()
+
+    def stop(self) -> None:
+        """
+        Stops the timer thread, waiting for it to finish. Does nothing if it is not running.
+
+        Returns:
+            None
+        """
+
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def close(self) -> None:
+        """
+        Stops the timer thread and stops following the task manager's changes.
+
+        Returns:
+            None
+        """
+
+        self.stop()
+        self._unsubscribe()
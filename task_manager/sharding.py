@@ -0,0 +1,826 @@
+import concurrent.futures
+import datetime
+import glob
+import heapq
+import itertools
+import json
+import os
+
+from task_manager.models import GroupCommit, IdAllocator, Task, TaskManager, load_high_water_mark, replace_atomically
+from task_manager.paths import SHARDED_DATABASE
+from task_manager.storage import JsonStorage
+
+
+SCHEMES = ("id", "month")
+DEFAULT_SHARDS = 8
+
+
+def by_id(task: Task) -> int:
+    """The key ordering tasks by id, as returned by TaskManager.search."""
+
+    return task.id
+
+
+def by_due_date(task: Task) -> tuple[datetime.datetime, int]:
+    """The key ordering tasks by due date then id, as returned by the due date queries."""
+
+    return task.due_date, task.id
+
+
+class Shard(TaskManager):
+    """
+    One shard of a ShardedTaskManager: a TaskManager stored in its own JSON file with a JsonStorage.
+    """
+
+
+    @classmethod
+    def from_tasks(cls, filename: str, tasks: list[Task], high_water_mark: int):
+        """
+        Creates a shard holding given tasks, that has yet to be saved.
+
+        Args:
+            filename: The name of the shard's JSON file.
+            tasks: The Task objects the shard holds.
+            high_water_mark: The highest id ever used by any shard, which the shard saves so it is never reused.
+
+        Returns:
+            The dirty Shard object.
+        """
+
+        shard = cls(JsonStorage(filename))
+        shard.task_list = tasks
+        shard._reindex()
+        shard.id_allocator.observe(high_water_mark)
+        shard._dirty = True
+        return shard
+
+    def find(self, id: int) -> Task | None:
+        """
+        Looks a task up by its ID without raising if it is not in the shard.
+
+        Args:
+            id: The ID of the task.
+
+        Returns:
+            The Task object, or None if the shard does not hold it.
+        """
+
+        position = self._find(id)
+        return None if position is None else self.task_list[position]
+
+
+class ShardedTaskManager(TaskManager):
+    """
+    A TaskManager whose tasks are partitioned across several JSON files, so that a save only rewrites
+    the shards that changed and a command only reads the shards it needs.
+
+    Tasks are partitioned by id, the shard of a task being its id modulo the number of shards, or by
+    the month they are due in, one shard per month. The layout is recorded in a small manifest at
+    filename, and shard files are named after it: "<filename>.id<shards>-<shard>.json" by id, and
+    "<filename>.<YYYY-MM>.json" by month. Each shard is a Shard, a TaskManager with its own indexes
+    and id high-water mark, loaded the first time it is needed.
+
+    Looking up, changing, completing or deleting a task goes to one shard: the one its id maps to, or
+    by month the one an id to month table of the loaded shards points at, every shard being loaded
+    the first time an id is looked up. A task whose due date moves to another month moves to its
+    shard. Ids are allocated across all shards, after the highest high-water mark they saved.
+
+    Queries spanning shards, such as due date ranges, overdue tasks and searches, run on every shard
+    through a thread pool and their ordered results are merged; by month, only the shards of the
+    months in range are read. Pages of tasks are merged from the shards' own pages the same way.
+    Loading and saving shards also runs through the pool, which overlaps their file reads, writes and
+    syncs; decoding and encoding JSON still take turns on the interpreter lock.
+
+    rebalance moves the tasks to a different number of shards, or to the other partitioning.
+
+    Attributes:
+        filename: The name of the manifest file.
+        shard_count: The number of shards when partitioning by id.
+        scheme: "id" or "month", how the tasks are partitioned.
+        workers: The number of threads shards are read and saved with, or None for the default.
+    """
+
+
+    def __init__(self, filename: str = SHARDED_DATABASE, shards: int = DEFAULT_SHARDS, scheme: str = "id", group_commit: GroupCommit | None = None, workers: int | None = None) -> None:
+        """
+        Initializes a ShardedTaskManager object with no shard loaded. load reads the layout from the
+        manifest if there is one, and the given one is used otherwise.
+
+        Args:
+            filename: The name of the manifest file.
+            shards: The number of shards to partition tasks into by id.
+            scheme: "id" or "month", how to partition the tasks.
+            group_commit: An optional GroupCommit policy for save.
+            workers: The number of threads to read and save shards with, by default as for ThreadPoolExecutor.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the scheme is unknown or the number of shards is not positive.
+        """
+
+        check_layout(shards, scheme)
+        super().__init__(group_commit=group_commit)
+        self.filename = filename
+        self.shard_count = shards
+        self.scheme = scheme
+        self.workers = workers
+        self._shards: dict = {}
+        self._months: set[str] = set()
+        self._locations: dict[int, str] = {}
+        self._manifest_saved = False
+        self._pool: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def _layout(self) -> str:
+        """
+        Names the current layout, which shard file names start with.
+
+        Returns:
+            "id<shards>" or "month".
+        """
+
+        return f"id{self.shard_count}" if self.scheme == "id" else "month"
+
+    def _shard_path(self, key) -> str:
+        """
+        Returns the name of a shard's file.
+
+        Args:
+            key: The shard number by id, or the "YYYY-MM" month by month.
+
+        Returns:
+            The file name.
+        """
+
+        return f"{self.filename}.id{self.shard_count}-{key}.json" if self.scheme == "id" else f"{self.filename}.{key}.json"
+
+    def _month_paths(self) -> list[str]:
+        """
+        Finds the month shard files next to the manifest.
+
+        Returns:
+            Their file names.
+        """
+
+        return glob.glob(f"{glob.escape(self.filename)}.[0-9][0-9][0-9][0-9]-[0-9][0-9].json")
+
+    def _keys(self) -> list:
+        """
+        Returns the keys of every shard, loaded or not.
+
+        Returns:
+            The shard numbers by id, or the months that have a shard, in order.
+        """
+
+        return list(range(self.shard_count)) if self.scheme == "id" else sorted(self._months)
+
+    def _key_for(self, id: int, due_date: datetime.datetime):
+        """
+        Returns the key of the shard a task belongs in.
+
+        Args:
+            id: The ID of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            The shard number by id, or the "YYYY-MM" month by month.
+        """
+
+        return id % self.shard_count if self.scheme == "id" else due_date.strftime("%Y-%m")
+
+    def _executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Returns the thread pool shards are read and saved with, starting it the first time.
+
+        Returns:
+            The ThreadPoolExecutor.
+        """
+
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="shard")
+        return self._pool
+
+    def _map(self, function, shards: list) -> list:
+        """
+        Calls a function with every shard, through the thread pool if there are several.
+
+        Args:
+            function: Called with each Shard object.
+            shards: The shards.
+
+        Returns:
+            The results, in the order of the shards.
+        """
+
+        if len(shards) < 2:
+            return [function(shard) for shard in shards]
+        return list(self._executor().map(function, shards))
+
+    def _open(self, key) -> Shard:
+        """
+        Loads a shard from its file, or creates it empty if it has none.
+
+        Args:
+            key: The key of the shard.
+
+        Returns:
+            The Shard object.
+        """
+
+        shard = Shard(JsonStorage(self._shard_path(key)))
+        if os.path.exists(self._shard_path(key)):
+            shard.load()
+        return shard
+
+    def _register(self, key, shard: Shard) -> None:
+        """
+        Makes a loaded shard available for lookups.
+
+        Args:
+            key: The key of the shard.
+            shard: The Shard object.
+
+        Returns:
+            None
+        """
+
+        self._shards[key] = shard
+        self.id_allocator.observe(shard.id_allocator.high_water_mark)
+        if self.scheme == "month":
+            self._months.add(key)
+            self._locations.update((task.id, key) for task in shard.task_list)
+
+    def _shard(self, key) -> Shard:
+        """
+        Returns a shard, loading or creating it the first time.
+
+        Args:
+            key: The key of the shard.
+
+        Returns:
+            The Shard object.
+        """
+
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._open(key)
+            self._register(key, shard)
+        return shard
+
+    def _load_shards(self, keys: list | None = None) -> list[Shard]:
+        """
+        Returns several shards, loading those not loaded yet through the thread pool.
+
+        Args:
+            keys: The keys of the shards, every shard by default.
+
+        Returns:
+            The Shard objects, in the order of the keys.
+        """
+
+        keys = self._keys() if keys is None else keys
+        missing = [key for key in keys if key not in self._shards]
+        if len(missing) > 1:
+            for key, shard in zip(missing, self._executor().map(self._open, missing)):
+                self._register(key, shard)
+        return [self._shard(key) for key in keys]
+
+    def _shards_due(self, start: datetime.datetime | None, end: datetime.datetime | None) -> list[Shard]:
+        """
+        Returns the shards that can hold tasks due in a range: every shard by id, those of the months in range by month.
+
+        Args:
+            start: The start of the range. None leaves the range open at the start.
+            end: The end of the range. None leaves the range open at the end.
+
+        Returns:
+            The Shard objects.
+        """
+
+        keys = self._keys()
+        if self.scheme == "month":
+            keys = [key for key in keys if (start is None or key >= start.strftime("%Y-%m")) and (end is None or key <= end.strftime("%Y-%m"))]
+        return self._load_shards(keys)
+
+    def _owner(self, id: int) -> Shard:
+        """
+        Finds the shard holding a task.
+
+        Args:
+            id: The ID of the task.
+
+        Returns:
+            The Shard object.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        if self.scheme == "id":
+            shard = self._shard(id % self.shard_count)
+        else:
+            if id not in self._locations:
+                self._load_shards()
+            shard = self._shards.get(self._locations.get(id))
+        if shard is None or shard.find(id) is None:
+            raise ValueError("Task with given ID does not exist.")
+        return shard
+
+    def _lookup(self, id: int) -> Task | None:
+        """
+        Looks a task up among the loaded shards without raising.
+
+        Args:
+            id: The ID of the task.
+
+        Returns:
+            The Task object, or None if no loaded shard holds it.
+        """
+
+        shard = self._shards.get(id % self.shard_count if self.scheme == "id" else self._locations.get(id))
+        return None if shard is None else shard.find(id)
+
+    def _add(self, task: Task) -> Task:
+        """
+        Adds a task to the shard it belongs in.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            The added Task object.
+        """
+
+        key = self._key_for(task.id, task.due_date)
+        self._shard(key).add_task(task)
+        if self.scheme == "month":
+            self._locations[task.id] = key
+        self._record("create", task)
+        return task
+
+    def _record(self, op: str, task: Task) -> None:
+        """
+        Publishes a change on the change feed. The shard the change was made through has already
+        recorded it and bumped the task's version.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+        self._dirty = True
+        self.changes.publish(op, task)
+
+    def create_task(self, title: str, description: str, due_date: datetime.datetime) -> Task:
+        """
+        Creates a new task with the provided details and adds it to its shard.
+
+        Args:
+            title: The title of the task.
+            description: The description of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            The created Task object.
+
+        Raises:
+            ValueError: If the due date is in the past.
+        """
+
+        due_date = datetime.datetime.fromisoformat(due_date)
+        if due_date < datetime.datetime.now():
+            raise ValueError("Due time cannot be set to the past")
+        return self._add(Task(self.id_allocator.allocate(), title, description, datetime.datetime.now(), due_date, False))
+
+    def create_tasks(self, entries) -> list[Task]:
+        """
+        Creates many tasks at once, as calling create_task for each of them would, reserving their ids in one block.
+
+        Args:
+            entries: An iterable of (title, description, due_date) tuples, with due_date a datetime or
+                a string in ISO format.
+
+        Returns:
+            The created Task objects, in order.
+
+        Raises:
+            ValueError: If a due date is invalid or in the past. No task is created then.
+        """
+
+        now = datetime.datetime.now()
+        entries = [
+            (title, description, due_date if isinstance(due_date, datetime.datetime) else datetime.datetime.fromisoformat(due_date))
+            for title, description, due_date in entries
+        ]
+        if any(due_date < now for _, _, due_date in entries):
+            raise ValueError("Due time cannot be set to the past")
+        return [
+            self._add(Task(id, title, description, now, due_date, False))
+            for id, (title, description, due_date) in zip(self.id_allocator.reserve(len(entries)), entries)
+        ]
+
+    def add_task(self, task: Task) -> Task:
+        """
+        Adds an existing Task object, keeping its id, to its shard.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            The added Task object.
+
+        Raises:
+            ValueError: If a task with the same ID already exists.
+        """
+
+        try:
+            self._owner(task.id)
+        except ValueError:
+            self.id_allocator.observe(task.id)
+            return self._add(task)
+        raise ValueError("Task with given ID already exists.")
+
+    def add_tasks(self, tasks) -> list[Task]:
+        """
+        Adds many existing Task objects at once, keeping their ids, each to its shard.
+
+        Args:
+            tasks: An iterable of Task objects.
+
+        Returns:
+            The added Task objects, in order.
+
+        Raises:
+            ValueError: If a task has the ID of an existing task, or of another of the tasks. No task is added then.
+        """
+
+        tasks = list(tasks)
+        ids = {task.id for task in tasks}
+        if len(ids) != len(tasks):
+            raise ValueError("Task with given ID already exists.")
+        for id in ids:
+            try:
+                self._owner(id)
+            except ValueError:
+                continue
+            raise ValueError("Task with given ID already exists.")
+        if ids:
+            self.id_allocator.observe(max(ids))
+        return [self._add(task) for task in tasks]
+
+    def get_task_by_id(self, id: int) -> Task:
+        """
+        Retrieves a task from the shard holding it.
+
+        Args:
+            id: The ID of the task to retrieve.
+
+        Returns:
+            The Task object with the given ID.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        return self._owner(id).get_task_by_id(id)
+
+    def change_task(self, task_id: int, selected_task_aspect: str, *args) -> None:
+        """
+        Changes a specific aspect of a task through the shard holding it, moving the task to another
+        shard if its due date moved to another month.
+
+        Args:
+            task_id: The ID of the task to modify.
+            selected_task_aspect: The aspect of the task to change.
+            *args: Variable number of arguments based on the selected aspect.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the task is not found, or if the arguments are invalid.
+        """
+
+        shard = self._owner(task_id)
+        shard.change_task(task_id, selected_task_aspect, *args)
+        task = shard.get_task_by_id(task_id)
+        key = self._key_for(task.id, task.due_date)
+        if self.scheme == "month" and key != self._locations[task.id]:
+            shard.delete_task(task.id)
+            self._shard(key).add_task(task)
+            self._locations[task.id] = key
+        self._record("change", task)
+
+    def complete_task(self, id: int) -> None:
+        """
+        Marks a task as completed through the shard holding it.
+
+        Args:
+            id: The ID of the task to mark as completed.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        shard = self._owner(id)
+        shard.complete_task(id)
+        self._record("complete", shard.get_task_by_id(id))
+
+    def delete_task(self, id: int) -> Task:
+        """
+        Deletes a task from the shard holding it.
+
+        Args:
+            id: The ID of the task to delete.
+
+        Returns:
+            The deleted Task object.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        task = self._owner(id).delete_task(id)
+        self._locations.pop(id, None)
+        self._record("delete", task)
+        return task
+
+    def tasks_due_between(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks due in a range of time in every shard that can hold them, and merges them.
+
+        Args:
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+
+        Returns:
+            The Task objects due in the range, ordered by due date.
+        """
+
+        found = self._map(lambda shard: shard.tasks_due_between(start, end), self._shards_due(start, end))
+        return list(heapq.merge(*found, key=by_due_date))
+
+    def overdue(self, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks that are past their due date and not completed in every shard that can hold them, and merges them.
+
+        Args:
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            The overdue Task objects, ordered by due date.
+        """
+
+        now = now or datetime.datetime.now()
+        found = self._map(lambda shard: shard.overdue(now), self._shards_due(None, now))
+        return list(heapq.merge(*found, key=by_due_date))
+
+    def next_due(self, count: int, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the open tasks that will become due next in every shard that can hold them, and merges them.
+
+        Args:
+            count: The maximum number of tasks to find.
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            Up to count Task objects that are not completed and not yet due, ordered by due date.
+        """
+
+        now = now or datetime.datetime.now()
+        found = self._map(lambda shard: shard.next_due(count, now), self._shards_due(now, None))
+        return list(itertools.islice(heapq.merge(*found, key=by_due_date), count))
+
+    def search(self, query: str) -> list[Task]:
+        """
+        Finds the tasks matching a query in every shard, see TaskManager.search, and merges them.
+
+        Args:
+            query: The words to look for.
+
+        Returns:
+            The matching Task objects, ordered by ID.
+        """
+
+        found = self._map(lambda shard: shard.search(query), self._load_shards())
+        return list(heapq.merge(*found, key=by_id))
+
+    def iter_tasks(self):
+        """
+        Iterates over all tasks, a shard at a time.
+
+        Yields:
+            Every Task object, in the order of the shards.
+        """
+
+        for shard in self._load_shards():
+            yield from shard.iter_tasks()
+
+    def _tasks_by_id(self, after: int):
+        """
+        Iterates over the tasks by id, walking the ids up from after and looking each one up in its
+        shard, or merging the shards' own orders when most ids left are unused.
+
+        Args:
+            after: Only tasks with a higher id are yielded.
+
+        Yields:
+            The Task objects, ordered by ID.
+        """
+
+        shards = self._load_shards()
+        last = self.id_allocator.high_water_mark
+        if last - after > 2 * sum(len(shard.task_list) for shard in shards):
+            yield from heapq.merge(*(shard._tasks_by_id(after) for shard in shards), key=by_id)
+            return
+        for id in range(after + 1, last + 1):
+            task = self._lookup(id)
+            if task is not None:
+                yield task
+
+    def _tasks_by_due_date(self, after: tuple[datetime.datetime, int] | None, start: datetime.datetime | None, end: datetime.datetime | None, open_only: bool):
+        """
+        Iterates over the tasks by due date, merging the orders of the shards that can hold them.
+
+        Args:
+            after: Only tasks after this (due date, id) pair are yielded, if given.
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+            open_only: Whether only tasks that are not completed are wanted.
+
+        Yields:
+            The Task objects, ordered by due date then id.
+        """
+
+        lowest = start if after is None or (start is not None and start > after[0]) else after[0]
+        shards = self._shards_due(lowest, end)
+        yield from heapq.merge(*(shard._tasks_by_due_date(after, start, end, open_only) for shard in shards), key=by_due_date)
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Whether a loaded shard, or the manifest, has to be saved.
+
+        Returns:
+            True if a shard was changed through the task manager since its last load or save, or the manifest was never saved.
+        """
+
+        return not self._manifest_saved or any(shard.dirty for shard in self._shards.values())
+
+    def _save(self) -> None:
+        """
+        Saves the dirty shards through the thread pool, then the manifest if it was never saved.
+
+        Returns:
+            None
+        """
+
+        self._map(lambda shard: shard.save(), [shard for shard in self._shards.values() if shard.dirty])
+        if not self._manifest_saved:
+            def write_manifest(temporary_filename: str) -> None:
+                with open(temporary_filename, "w") as file:
+                    json.dump({"scheme": self.scheme, "shards": self.shard_count}, file)
+
+            replace_atomically(self.filename, write_manifest)
+            self._manifest_saved = True
+        self.mark_clean()
+
+    def save(self) -> None:
+        """
+        Saves the shards that changed since they were loaded or saved, unless the group commit policy,
+        if there is one, holds the save back.
+
+        Returns:
+            None
+        """
+
+        if not self.dirty:
+            return
+        if self.group_commit is not None and not self.group_commit.request():
+            return
+        self._save()
+
+    def load(self) -> None:
+        """
+        Reads the layout from the manifest, if there is one, and the high-water marks of the shards.
+        Shards themselves are loaded the first time they are needed.
+
+        Returns:
+            None
+        """
+
+        try:
+            with open(self.filename, "r") as file:
+                manifest = json.load(file)
+            self.scheme, self.shard_count = manifest["scheme"], manifest["shards"]
+            self._manifest_saved = True
+        except FileNotFoundError:
+            self._manifest_saved = False
+        self._shards, self._locations = {}, {}
+        self.id_allocator = IdAllocator()
+        paths = self._month_paths() if self.scheme == "month" else [self._shard_path(key) for key in self._keys()]
+        self._months = {path[len(self.filename) + 1:-len(".json")] for path in paths} if self.scheme == "month" else set()
+        for path in paths:
+            self.id_allocator.observe(load_high_water_mark(path))
+        self.mark_clean()
+        self.changes.publish("reload")
+
+    def close(self) -> None:
+        """
+        Saves the changes held back by the group commit policy, if any, and stops the thread pool.
+
+        Returns:
+            None
+        """
+
+        if self.group_commit is not None and self.group_commit.pending and self.dirty:
+            self.group_commit.pending = 0
+            self._save()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def rebalance(self, shards: int = DEFAULT_SHARDS, scheme: str = "id") -> int:
+        """
+        Moves every task to a new layout: a different number of shards by id, or the other partitioning.
+
+        The shards of the new layout are written under their own names, then the manifest is replaced,
+        which is when the new layout takes over, and then the old shard files are removed. A crash
+        before the manifest is replaced leaves the old layout in use, and a crash after it leaves old
+        files behind that are never read. Changes not saved yet are saved with the new layout.
+
+        Args:
+            shards: The number of shards to partition tasks into by id.
+            scheme: "id" or "month", how to partition the tasks.
+
+        Returns:
+            The number of tasks moved, 0 if the layout does not change.
+
+        Raises:
+            ValueError: If the scheme is unknown or the number of shards is not positive.
+        """
+
+        check_layout(shards, scheme)
+        if (f"id{shards}" if scheme == "id" else "month") == self._layout():
+            return 0
+        tasks = list(self.iter_tasks())
+        old_paths = [self._shard_path(key) for key in self._keys()]
+        high_water_mark = self.id_allocator.high_water_mark
+        self.scheme, self.shard_count = scheme, shards
+        # files of the new layout are left from a rebalance that did not finish
+        remove_shard_files(self._month_paths() if scheme == "month" else [self._shard_path(key) for key in self._keys()])
+        partitions = {}
+        for task in tasks:
+            partitions.setdefault(self._key_for(task.id, task.due_date), []).append(task)
+        self._shards, self._months, self._locations = {}, set(), {}
+        for key, shard_tasks in partitions.items():
+            self._register(key, Shard.from_tasks(self._shard_path(key), shard_tasks, high_water_mark))
+        self._manifest_saved = False
+        self._save()
+        remove_shard_files(old_paths)
+        return len(tasks)
+
+
+def check_layout(shards: int, scheme: str) -> None:
+    """
+    Checks a shard layout.
+
+    Args:
+        shards: The number of shards by id.
+        scheme: How tasks are partitioned.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the scheme is unknown or the number of shards is not positive.
+    """
+
+    if scheme not in SCHEMES:
+        raise ValueError(f"Cannot shard tasks by {scheme}, only by one of {', '.join(SCHEMES)}")
+    if shards < 1:
+        raise ValueError("The number of shards must be positive")
+
+
+def remove_shard_files(paths: list[str]) -> None:
+    """
+    Removes shard files, with the high-water mark and search index files saved next to them.
+
+    Args:
+        paths: The names of the shard files.
+
+    Returns:
+        None
+    """
+
+    for path in paths:
+        for filename in (path, f"{path}.meta", f"{path}.search"):
+            if os.path.exists(filename):
+                os.remove(filename)
@@ -0,0 +1,304 @@
+import mmap
+import os
+import struct
+
+from task_manager.models import Task, from_epoch_microseconds, to_epoch_microseconds
+
+
+# A file with this extension is saved and loaded as a binary snapshot instead of JSON
+SNAPSHOT_EXTENSION = ".bin"
+
+MAGIC = b"TASKSNAP"
+VERSION = 2
+
+# magic, format version, reserved flags, number of tasks, offset of the id index
+HEADER = struct.Struct("<8sIIQQ")
+# id, created_at and due_date in microseconds since the epoch, completed, version, title and description lengths
+RECORD = struct.Struct("<qqqBqII")
+# id, offset of the task's record
+INDEX_ENTRY = struct.Struct("<qQ")
+# due_date, completed and version, the fields of a record that can be rewritten in place, and their offset in it
+MUTABLE_FIELDS = struct.Struct("<qBq")
+MUTABLE_FIELDS_OFFSET = 16
+
+
+def is_snapshot(filename: str) -> bool:
+    """
+    Tells whether a database file is a binary snapshot, by its extension.
+
+    Args:
+        filename: The name of the database file.
+
+    Returns:
+        True if the file name ends in SNAPSHOT_EXTENSION.
+    """
+
+    return os.fspath(filename).endswith(SNAPSHOT_EXTENSION)
+
+
+def write_snapshot(filename: str, tasks) -> None:
+    """
+    Writes tasks to a binary snapshot file.
+
+    The file starts with a HEADER, followed by one record per task in the given order: a fixed-width
+    RECORD holding the id, the timestamps as microseconds since the epoch, the completed flag, the
+    version and the lengths of the title and description, then the UTF-8 encoded title and description. After the
+    records comes an index of INDEX_ENTRY pairs, sorted by id, locating each task's record, so a task
+    can be found by binary search without reading the records.
+
+    Args:
+        filename: The name of the file to write.
+        tasks: An iterable of Task objects with unique ids.
+
+    Returns:
+        None
+    """
+
+    entries = []
+    offset = HEADER.size
+    with open(filename, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        for task in tasks:
+            title = task.title.encode()
+            description = task.description.encode()
+            entries.append((task.id, offset))
+            file.write(RECORD.pack(
+                task.id,
+                to_epoch_microseconds(task.created_at),
+                to_epoch_microseconds(task.due_date),
+                task.completed,
+                task.version,
+                len(title),
+                len(description),
+            ))
+            file.write(title)
+            file.write(description)
+            offset += RECORD.size + len(title) + len(description)
+        entries.sort()
+        file.write(b"".join(INDEX_ENTRY.pack(id, record_offset) for id, record_offset in entries))
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), offset))
+
+
+class SnapshotReader:
+    """
+    Reads a binary snapshot written by write_snapshot through a read-only memory map.
+
+    Opening a snapshot only checks its header; records are decoded when they are read, and titles
+    and descriptions are copied out of the mapping only when a Task is built from them.
+
+    Attributes:
+        filename: The name of the snapshot file.
+        count: The number of tasks in the snapshot.
+        index_offset: The offset of the id index, which is also the end of the records.
+    """
+
+
+    def __init__(self, filename: str) -> None:
+        """
+        Opens a snapshot file and checks its header.
+
+        Args:
+            filename: The name of the snapshot file.
+
+        Returns:
+            None
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not a snapshot of a supported version, or is truncated.
+        """
+
+        self.filename = filename
+        with open(filename, "rb") as file:
+            size = file.seek(0, 2)
+            if size < HEADER.size:
+                raise ValueError("File is too short to be a task snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.index_offset = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("File is not a task snapshot")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported task snapshot version {version}")
+        if self.index_offset + self.count * INDEX_ENTRY.size > size:
+            self.close()
+            raise ValueError("Task snapshot is truncated")
+
+    def __enter__(self) -> "SnapshotReader":
+        """
+        Returns the reader, for use as a context manager that closes it.
+
+        Returns:
+            The SnapshotReader object.
+        """
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Closes the reader at the end of a with block.
+
+        Returns:
+            None
+        """
+
+        self.close()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of tasks in the snapshot.
+
+        Returns:
+            The number of tasks.
+        """
+
+        return self.count
+
+    def index_entry(self, position: int) -> tuple[int, int]:
+        """
+        Reads one entry of the id index.
+
+        Args:
+            position: The position of the entry, from 0 for the lowest id.
+
+        Returns:
+            The task id and the offset of its record.
+        """
+
+        return INDEX_ENTRY.unpack_from(self._map, self.index_offset + position * INDEX_ENTRY.size)
+
+    def find(self, id: int) -> int | None:
+        """
+        Finds the record of a task by binary search over the id index.
+
+        Args:
+            id: The id of the task.
+
+        Returns:
+            The offset of the task's record, or None if the snapshot has no such task.
+        """
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_id, offset = self.index_entry(middle)
+            if middle_id == id:
+                return offset
+            if middle_id < id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def record(self, offset: int) -> tuple:
+        """
+        Decodes the fixed-width part of a record.
+
+        Args:
+            offset: The offset of the record.
+
+        Returns:
+            The id, created_at and due_date in microseconds, completed flag, version, title length
+            and description length of the task, as stored.
+        """
+
+        return RECORD.unpack_from(self._map, offset)
+
+    def string(self, offset: int, length: int) -> str:
+        """
+        Decodes a UTF-8 string from the mapping.
+
+        Args:
+            offset: The offset of the string.
+            length: The encoded length of the string.
+
+        Returns:
+            The string.
+        """
+
+        return self._map[offset:offset + length].decode()
+
+    def task(self, offset: int) -> Task:
+        """
+        Builds a Task object from a record.
+
+        Args:
+            offset: The offset of the record.
+
+        Returns:
+            The Task object.
+        """
+
+        id, created_at, due_date, completed, version, title_length, description_length = RECORD.unpack_from(self._map, offset)
+        title_offset = offset + RECORD.size
+        return Task(
+            id,
+            self._map[title_offset:title_offset + title_length].decode(),
+            self._map[title_offset + title_length:title_offset + title_length + description_length].decode(),
+            from_epoch_microseconds(created_at),
+            from_epoch_microseconds(due_date),
+            bool(completed),
+            version,
+        )
+
+    def offsets(self):
+        """
+        Iterates over the offsets of the records, in the order the tasks were written.
+
+        Yields:
+            The offset of every record.
+        """
+
+        offset = HEADER.size
+        while offset < self.index_offset:
+            yield offset
+            _, _, _, _, _, title_length, description_length = RECORD.unpack_from(self._map, offset)
+            offset += RECORD.size + title_length + description_length
+
+    def __iter__(self):
+        """
+        Iterates over the tasks, in the order they were written.
+
+        Yields:
+            A Task object per record.
+        """
+
+        # one pass over the records, decoding each fixed-width part only once
+        data, unpack_from, record_size, load = self._map, RECORD.unpack_from, RECORD.size, from_epoch_microseconds
+        offset = HEADER.size
+        while offset < self.index_offset:
+            id, created_at, due_date, completed, version, title_length, description_length = unpack_from(data, offset)
+            title_end = offset + record_size + title_length
+            offset = title_end + description_length
+            yield Task(id, data[title_end - title_length:title_end].decode(), data[title_end:offset].decode(), load(created_at), load(due_date), bool(completed), version)
+
+    def close(self) -> None:
+        """
+        Unmaps the file.
+
+        Returns:
+            None
+        """
+
+        self._map.close()
+
+
+def iter_snapshot(filename: str):
+    """
+    Reads the tasks of a binary snapshot one at a time.
+
+    Args:
+        filename: The name of the snapshot file.
+
+    Yields:
+        A Task object per record, in the order the tasks were written.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a valid snapshot.
+    """
+
+    with SnapshotReader(filename) as reader:
+        yield from reader
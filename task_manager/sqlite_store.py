@@ -0,0 +1,574 @@
+import datetime
+import json
+import re
+import sqlite3
+
+from task_manager.indexes import SearchIndex
+from task_manager.models import GroupCommit, Task, TaskManager, iter_tasks_from_file
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    completed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+CREATE INDEX IF NOT EXISTS tasks_open_due_date ON tasks (completed, due_date);
+"""
+
+# The full-text search index, created only if SQLite was built with FTS5
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_search USING fts5 (title, description, content='tasks', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS tasks_search_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_search_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_search (tasks_search, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_search_update AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_search (tasks_search, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+
+COLUMNS = "id, title, description, created_at, due_date, completed"
+
+
+def task_from_row(row: tuple) -> Task:
+    """
+    Creates a Task object from a row of the tasks table.
+
+    Args:
+        row: The values of the columns in COLUMNS, in order.
+
+    Returns:
+        A Task object created from the row.
+    """
+
+    return Task(
+        row[0],
+        row[1],
+        row[2],
+        datetime.datetime.fromisoformat(row[3]),
+        datetime.datetime.fromisoformat(row[4]),
+        bool(row[5]),
+    )
+
+
+def fts_query(query: str) -> str:
+    """
+    Translates a TaskManager.search query into an FTS5 query.
+
+    Args:
+        query: Words to look for, optionally ending in "*" and combined with OR.
+
+    Returns:
+        The equivalent FTS5 query, or an empty string if the query has no words.
+    """
+
+    alternatives = []
+    for alternative in re.split(r"\s+OR\s+", query.strip()):
+        terms = [
+            f'"{term[:-1]}" *' if term.endswith("*") else f'"{term}"'
+            for term in re.findall(r"\w+\*?", alternative.lower())
+        ]
+        if terms:
+            alternatives.append("(" + " AND ".join(terms) + ")")
+    return " OR ".join(alternatives)
+
+
+def like_query(query: str) -> tuple[str, list[str]]:
+    """
+    Translates a TaskManager.search query into a LIKE condition on the tasks table, for SQLite
+    builds without FTS5.
+
+    The condition matches every task the query matches, and maybe more, since LIKE matches parts
+    of words; its matches have to be checked with a SearchIndex. Words that are not ASCII, which LIKE
+    does not compare case-insensitively, are left out of it.
+
+    Args:
+        query: Words to look for, optionally ending in "*" and combined with OR.
+
+    Returns:
+        The condition, or an empty string if the query has no words, and its parameters.
+    """
+
+    alternatives = []
+    parameters = []
+    for alternative in re.split(r"\s+OR\s+", query.strip()):
+        terms = re.findall(r"\w+", alternative.lower())
+        if not terms:
+            continue
+        conditions = ["1"]
+        for term in terms:
+            if term.isascii():
+                conditions.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+                pattern = "%" + term.replace("_", "\\_") + "%"
+                parameters += [pattern, pattern]
+        alternatives.append("(" + " AND ".join(conditions) + ")")
+    return " OR ".join(alternatives), parameters
+
+
+def task_to_row(task: Task) -> tuple:
+    """
+    Converts a Task object to a row of the tasks table.
+
+    Args:
+        task: The Task object to convert.
+
+    Returns:
+        The values of the columns in COLUMNS, in order.
+    """
+
+    return (task.id, task.title, task.description, task.created_at.isoformat(), task.due_date.isoformat(), int(task.completed))
+
+
+class SqliteTaskManager(TaskManager):
+    """
+    A TaskManager that keeps its tasks in an SQLite database instead of in memory.
+
+    Every operation is an SQL statement against the database, so nothing is loaded up front and the
+    dataset does not have to fit in memory. Tasks are looked up by their INTEGER PRIMARY KEY id, and
+    the due_date and completed columns are indexed. Ids come from AUTOINCREMENT, so they are never reused.
+    Titles and descriptions are indexed for search in an FTS5 table kept up to date by triggers. If
+    SQLite was built without FTS5, search scans the tasks with LIKE and checks what it finds with a
+    SearchIndex instead.
+
+    The database runs in WAL mode; changes are committed by save, so a command that makes several
+    changes pays for a single commit.
+
+    Attributes:
+        filename: The name of the SQLite database file.
+        connection: The open sqlite3 connection.
+        full_text_search: Whether titles and descriptions are indexed with FTS5.
+    """
+
+
+    def __init__(self, filename: str = "data/database.sqlite3", group_commit: GroupCommit | None = None) -> None:
+        """
+        Opens, and if needed creates, an SQLite task database.
+
+        Args:
+            filename: The name of the SQLite database file.
+            group_commit: An optional GroupCommit policy for save.
+
+        Returns:
+            None
+        """
+
+        super().__init__(group_commit=group_commit)
+        self.filename = filename
+        # the servers save from a worker thread while they handle no request, so the connection is used
+        # by one thread at a time but not always the one that opened it
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # so that INSERT OR REPLACE fires the delete trigger keeping the search index in sync
+        self.connection.execute("PRAGMA recursive_triggers=ON")
+        has_search_index = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_search'").fetchone()
+        self.connection.executescript(SCHEMA)
+        try:
+            self.connection.executescript(SEARCH_SCHEMA)
+            self.full_text_search = True
+        except sqlite3.OperationalError:
+            # no such module: fts5
+            self.full_text_search = False
+        if self.full_text_search and not has_search_index:
+            # the tasks table may predate the search index
+            self.connection.execute("INSERT INTO tasks_search (tasks_search) VALUES ('rebuild')")
+            self.connection.commit()
+
+    def create_task(self, title: str, description: str, due_date: datetime.datetime) -> Task:
+        """
+        Creates a new task with the provided details and inserts it into the database.
+
+        Args:
+            title: The title of the task.
+            description: The description of the task.
+            due_date: The due date of the task.
+
+        Returns:
+            The created Task object.
+
+        Raises:
+            ValueError: If the due date is in the past.
+        """
+
+        due_date = datetime.datetime.fromisoformat(due_date)
+        if due_date < datetime.datetime.now():
+            raise ValueError("Due time cannot be set to the past")
+        task = Task(None, title, description, datetime.datetime.now(), due_date, False)
+        cursor = self.connection.execute(
+            "INSERT INTO tasks (title, description, created_at, due_date, completed) VALUES (?, ?, ?, ?, ?)",
+            task_to_row(task)[1:],
+        )
+        task.id = cursor.lastrowid
+        self.changes.publish("create", task)
+        return task
+
+    def create_tasks(self, entries) -> list[Task]:
+        """
+        Creates many tasks at once, inserting them with a single prepared statement.
+
+        Args:
+            entries: An iterable of (title, description, due_date) tuples, with due_date a datetime or
+                a string in ISO format.
+
+        Returns:
+            The created Task objects, in order.
+
+        Raises:
+            ValueError: If a due date is invalid or in the past. No task is created then.
+        """
+
+        now = datetime.datetime.now()
+        tasks = [
+            Task(None, title, description, now, due_date if isinstance(due_date, datetime.datetime) else datetime.datetime.fromisoformat(due_date), False)
+            for title, description, due_date in entries
+        ]
+        if any(task.due_date < now for task in tasks):
+            raise ValueError("Due time cannot be set to the past")
+        for task in tasks:
+            cursor = self.connection.execute(
+                "INSERT INTO tasks (title, description, created_at, due_date, completed) VALUES (?, ?, ?, ?, ?)",
+                task_to_row(task)[1:],
+            )
+            task.id = cursor.lastrowid
+        for task in tasks:
+            self.changes.publish("create", task)
+        return tasks
+
+    def add_task(self, task: Task) -> Task:
+        """
+        Inserts an existing Task object, keeping its id, into the database.
+
+        Args:
+            task: The Task object to add.
+
+        Returns:
+            The added Task object.
+
+        Raises:
+            ValueError: If a task with the same ID already exists.
+        """
+
+        try:
+            self.connection.execute(f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", task_to_row(task))
+        except sqlite3.IntegrityError:
+            raise ValueError("Task with given ID already exists.")
+        self.changes.publish("create", task)
+        return task
+
+    def add_tasks(self, tasks) -> list[Task]:
+        """
+        Inserts many existing Task objects at once, keeping their ids, with a single prepared statement.
+
+        Args:
+            tasks: An iterable of Task objects.
+
+        Returns:
+            The added Task objects, in order.
+
+        Raises:
+            ValueError: If a task has the ID of an existing task, or of another of the tasks. No task is added then.
+        """
+
+        tasks = list(tasks)
+        ids = [task.id for task in tasks]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Task with given ID already exists.")
+        # looked up in batches, as SQLite limits how many parameters a statement takes
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            if self.connection.execute(f"SELECT 1 FROM tasks WHERE id IN ({', '.join('?' * len(batch))}) LIMIT 1", batch).fetchone() is not None:
+                raise ValueError("Task with given ID already exists.")
+        self.connection.executemany(f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", map(task_to_row, tasks))
+        for task in tasks:
+            self.changes.publish("create", task)
+        return tasks
+
+    def get_task_by_id(self, id: int) -> Task:
+        """
+        Retrieves a task by its unique identifier.
+
+        Args:
+            id: The unique identifier of the task to retrieve.
+
+        Returns:
+            The Task object with the specified ID.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        row = self.connection.execute(f"SELECT {COLUMNS} FROM tasks WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            raise ValueError("Task with given ID does not exist.")
+        return task_from_row(row)
+
+    def complete_task(self, id: int) -> None:
+        """
+        Marks a task as completed.
+
+        Args:
+            id: The ID of the task to mark as completed.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        row = self.connection.execute(f"UPDATE tasks SET completed = 1 WHERE id = ? RETURNING {COLUMNS}", (id,)).fetchone()
+        if row is None:
+            raise ValueError("Task with given ID does not exist.")
+        self.changes.publish("complete", task_from_row(row))
+
+    def delete_task(self, id: int) -> Task:
+        """
+        Deletes a task by its ID.
+
+        Args:
+            id: The ID of the task to delete.
+
+        Returns:
+            The deleted Task object.
+
+        Raises:
+            ValueError: If no task exists with the given ID.
+        """
+
+        row = self.connection.execute(f"DELETE FROM tasks WHERE id = ? RETURNING {COLUMNS}", (id,)).fetchone()
+        if row is None:
+            raise ValueError("Task with given ID does not exist.")
+        task = task_from_row(row)
+        self.changes.publish("delete", task)
+        return task
+
+    def _record(self, op: str, task: Task) -> None:
+        """
+        Writes a task changed by TaskManager.change_task back to the database.
+
+        Args:
+            op: The kind of change.
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+        self.connection.execute(
+            "UPDATE tasks SET title = ?, description = ?, created_at = ?, due_date = ?, completed = ? WHERE id = ?",
+            task_to_row(task)[1:] + (task.id,),
+        )
+        self.changes.publish(op, task)
+
+    def tasks_due_between(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks due in a range of time, using the due_date index.
+
+        Args:
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+
+        Returns:
+            The Task objects due in the range, ordered by due date.
+        """
+
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE due_date >= ? AND due_date < ? ORDER BY due_date, id",
+            ((start or datetime.datetime.min).isoformat(), (end or datetime.datetime.max).isoformat()),
+        )
+        return [task_from_row(row) for row in rows]
+
+    def overdue(self, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the tasks that are past their due date and not completed, using the (completed, due_date) index.
+
+        Args:
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            The overdue Task objects, ordered by due date.
+        """
+
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE completed = 0 AND due_date < ? ORDER BY due_date, id",
+            ((now or datetime.datetime.now()).isoformat(),),
+        )
+        return [task_from_row(row) for row in rows]
+
+    def next_due(self, count: int, now: datetime.datetime | None = None) -> list[Task]:
+        """
+        Finds the open tasks that will become due next, using the (completed, due_date) index.
+
+        Args:
+            count: The maximum number of tasks to find.
+            now: The current datetime, datetime.datetime.now() by default.
+
+        Returns:
+            Up to count Task objects that are not completed and not yet due, ordered by due date.
+        """
+
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE completed = 0 AND due_date >= ? ORDER BY due_date, id LIMIT ?",
+            ((now or datetime.datetime.now()).isoformat(), count),
+        )
+        return [task_from_row(row) for row in rows]
+
+    def _tasks_by_id(self, after: int):
+        """
+        Iterates over the tasks by id, reading them one at a time from the primary key.
+
+        Args:
+            after: Only tasks with a higher id are yielded.
+
+        Yields:
+            The Task objects, ordered by ID.
+        """
+
+        for row in self.connection.execute(f"SELECT {COLUMNS} FROM tasks WHERE id > ? ORDER BY id", (after,)):
+            yield task_from_row(row)
+
+    def _tasks_by_due_date(self, after: tuple[datetime.datetime, int] | None, start: datetime.datetime | None, end: datetime.datetime | None, open_only: bool):
+        """
+        Iterates over the tasks by due date, reading them one at a time from the due_date indexes.
+
+        Args:
+            after: Only tasks after this (due date, id) pair are yielded, if given.
+            start: The start of the range, inclusive. None leaves the range open at the start.
+            end: The end of the range, exclusive. None leaves the range open at the end.
+            open_only: Whether only tasks that are not completed are wanted.
+
+        Yields:
+            The Task objects, ordered by due date then id.
+        """
+
+        conditions = ["due_date >= ?", "due_date < ?"]
+        parameters = [(start or datetime.datetime.min).isoformat(), (end or datetime.datetime.max).isoformat()]
+        if open_only:
+            conditions.append("completed = 0")
+        if after is not None:
+            conditions.append("(due_date, id) > (?, ?)")
+            parameters += [after[0].isoformat(), after[1]]
+        for row in self.connection.execute(f"SELECT {COLUMNS} FROM tasks WHERE {' AND '.join(conditions)} ORDER BY due_date, id", parameters):
+            yield task_from_row(row)
+
+    def search(self, query: str) -> list[Task]:
+        """
+        Finds the tasks whose title or description contain the words of a query, using the FTS5 index,
+        or without FTS5 a LIKE scan whose results are checked with a SearchIndex.
+
+        Args:
+            query: Words to look for, optionally ending in "*" and combined with OR.
+
+        Returns:
+            The matching Task objects, ordered by ID.
+        """
+
+        if not self.full_text_search:
+            condition, parameters = like_query(query)
+            if not condition:
+                return []
+            candidates = [task_from_row(row) for row in self.connection.execute(f"SELECT {COLUMNS} FROM tasks WHERE {condition} ORDER BY id", parameters)]
+            found = SearchIndex(candidates).search(query)
+            return [task for task in candidates if task.id in found]
+        expression = fts_query(query)
+        if not expression:
+            return []
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE id IN (SELECT rowid FROM tasks_search WHERE tasks_search MATCH ?) ORDER BY id",
+            (expression,),
+        )
+        return [task_from_row(row) for row in rows]
+
+    def iter_tasks(self):
+        """
+        Iterates over all tasks in the database, reading them one at a time.
+
+        Yields:
+            Every Task object, ordered by ID.
+        """
+
+        for row in self.connection.execute(f"SELECT {COLUMNS} FROM tasks ORDER BY id"):
+            yield task_from_row(row)
+
+    def import_json(self, filename: str) -> int:
+        """
+        Copies the tasks of a JSON database, as written by TaskManager.save_to_file, into the SQLite database.
+
+        Tasks keep their ids; a task whose id is already in the database replaces it. The id high-water mark
+        from "<filename>.meta", if present, is carried over so ids used by the JSON database are not reused.
+        The file is read one task at a time with iter_tasks_from_file, so it does not have to fit in
+        memory, and malformed records are reported and skipped.
+
+        Args:
+            filename: The name of the JSON file to import.
+
+        Returns:
+            The number of imported tasks.
+        """
+
+        count = 0
+
+        def rows():
+            nonlocal count
+            for task in iter_tasks_from_file(filename):
+                count += 1
+                yield task_to_row(task)
+
+        with self.connection:
+            self.connection.executemany(f"INSERT OR REPLACE INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows())
+            try:
+                with open(f"{filename}.meta", "r") as file:
+                    high_water_mark = json.load(file)["high_water_mark"]
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                high_water_mark = 0
+            if self.connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone() is None:
+                self.connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', 0)")
+            self.connection.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'tasks'", (high_water_mark,))
+        self.changes.publish("reload")
+        return count
+
+    def load(self) -> None:
+        """
+        Does nothing: tasks are read from the database when they are needed.
+
+        Returns:
+            None
+        """
+
+    def save(self) -> None:
+        """
+        Commits the changes made since the last save, if there are any and the group commit policy,
+        if there is one, does not hold the commit back.
+
+        Returns:
+            None
+        """
+
+        if not self.connection.in_transaction:
+            return
+        if self.group_commit is not None and not self.group_commit.request():
+            return
+        self.connection.commit()
+
+    def close(self) -> None:
+        """
+        Commits the changes held back by the group commit policy, if any, and closes the database
+        connection, discarding any other uncommitted change.
+
+        Returns:
+            None
+        """
+
+        if self.group_commit is not None and self.group_commit.pending and self.connection.in_transaction:
+            self.group_commit.pending = 0
+            self.connection.commit()
+        self.connection.close()
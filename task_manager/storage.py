@@ -0,0 +1,403 @@
+import json
+import os
+import threading
+
+from task_manager.models import GroupCommit, Task, TaskManager, replace_atomically, save_high_water_mark
+from task_manager.paths import default_database
+from task_manager.snapshot import is_snapshot, write_snapshot
+
+
+class Storage:
+    """
+    Interface of a TaskManager storage backend.
+
+    A TaskManager calls append for every task created, changed, completed or deleted through it,
+    and load and save from TaskManager.load and TaskManager.save.
+    """
+
+
+    def load(self, manager: TaskManager) -> None:
+        """
+        Loads the stored tasks into a task manager.
+
+        Args:
+            manager: The TaskManager to load the tasks into.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def append(self, op: str, task: Task) -> None:
+        """
+        Records a single change made through the task manager. Does nothing by default.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+    def save(self, manager: TaskManager) -> None:
+        """
+        Persists the state of a task manager.
+
+        Args:
+            manager: The TaskManager to save.
+
+        Returns:
+            None
+        """
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Releases any resources held by the storage backend. Does nothing by default.
+
+        Returns:
+            None
+        """
+
+
+class JsonStorage(Storage):
+    """
+    Stores tasks in a single JSON file, rewritten in full on every save.
+
+    Attributes:
+        filename: The name of the JSON file.
+    """
+
+
+    def __init__(self, filename: str = "data/database.json") -> None:
+        """
+        Initializes a JsonStorage object.
+
+        Args:
+            filename: The name of the JSON file.
+
+        Returns:
+            None
+        """
+
+        self.filename = filename
+
+    def load(self, manager: TaskManager) -> None:
+        """
+        Loads the JSON file into a task manager with TaskManager.load_from_file.
+
+        Args:
+            manager: The TaskManager to load the tasks into.
+
+        Returns:
+            None
+        """
+
+        manager.load_from_file(self.filename)
+
+    def save(self, manager: TaskManager) -> None:
+        """
+        Rewrites the JSON file with TaskManager.save_to_file.
+
+        Args:
+            manager: The TaskManager to save.
+
+        Returns:
+            None
+        """
+
+        manager.save_to_file(self.filename)
+
+
+class LogStorage(Storage):
+    """
+    Stores tasks as a JSON snapshot plus an append-only log of the changes made since the snapshot.
+
+    Every create, change, complete and delete is appended to "<filename>.log" as one JSON line holding
+    the operation and the full state of the task, so saving costs as much as the change, not the dataset.
+    Loading reads the snapshot and replays the log over it. Once the log grows past compact_threshold
+    bytes, save compacts it: the current state is written as a new snapshot and the log is emptied.
+
+    During a compaction the log is first moved aside to "<filename>.log.old", so new changes can be
+    appended while the snapshot is written, optionally in a background thread. Replaying a record only
+    ever sets a task to the state it had when the record was written, so a log that is replayed over a
+    snapshot already containing its changes, for example after a crash mid-compaction, does no harm.
+
+    The snapshot has the same format as TaskManager.save_to_file, JSON or binary depending on the
+    extension of filename, so it can be exported or loaded as is.
+
+    Attributes:
+        filename: The name of the JSON snapshot file.
+        log_filename: The name of the log file.
+        compact_threshold: The log size in bytes past which save compacts the log.
+        background: Whether compactions started by save write the snapshot in a background thread.
+    """
+
+
+    def __init__(self, filename: str = "data/database.json", compact_threshold: int = 1024 * 1024, background: bool = False) -> None:
+        """
+        Initializes a LogStorage object.
+
+        Args:
+            filename: The name of the JSON snapshot file.
+            compact_threshold: The log size in bytes past which save compacts the log.
+            background: Whether compactions started by save write the snapshot in a background thread.
+
+        Returns:
+            None
+        """
+
+        self.filename = filename
+        self.log_filename = f"{filename}.log"
+        self.compact_threshold = compact_threshold
+        self.background = background
+        self._log = None
+        self._replaying = False
+        self._compaction: threading.Thread | None = None
+
+    def load(self, manager: TaskManager) -> None:
+        """
+        Loads the snapshot into a task manager and replays the log over it.
+
+        Args:
+            manager: The TaskManager to load the tasks into.
+
+        Returns:
+            None
+        """
+
+        self.wait()
+        if os.path.exists(self.filename):
+            manager.load_from_file(self.filename)
+        self._replaying = True
+        try:
+            for log_filename in (f"{self.log_filename}.old", self.log_filename):
+                self._replay(manager, log_filename)
+        finally:
+            self._replaying = False
+
+    def _replay(self, manager: TaskManager, log_filename: str) -> None:
+        """
+        Applies every record of a log file to a task manager.
+
+        A record that cannot be decoded, such as a line torn by a crash, is reported and skipped.
+
+        Args:
+            manager: The TaskManager to apply the records to.
+            log_filename: The name of the log file.
+
+        Returns:
+            None
+        """
+
+        try:
+            file = open(log_filename, "r")
+        except FileNotFoundError:
+            return
+        with file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed record on line {line_number} of {log_filename}.")
+                    continue
+                apply_record(manager, record)
+
+    def append(self, op: str, task: Task) -> None:
+        """
+        Appends a change to the log.
+
+        Args:
+            op: The kind of change: "create", "change", "complete" or "delete".
+            task: The Task object that was changed.
+
+        Returns:
+            None
+        """
+
+        if self._replaying:
+            return
+        record = {"op": op, "id": task.id}
+        if op != "delete":
+            record["task"] = task.to_dict()
+        if self._log is None:
+            self._log = open(self.log_filename, "a")
+        self._log.write(json.dumps(record) + "\n")
+
+    def save(self, manager: TaskManager) -> None:
+        """
+        Flushes the log to disk, and compacts it if it has grown past compact_threshold.
+
+        Args:
+            manager: The TaskManager being saved.
+
+        Returns:
+            None
+        """
+
+        if self._log is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        if os.path.exists(self.log_filename) and os.path.getsize(self.log_filename) >= self.compact_threshold:
+            self.compact(manager, self.background)
+
+    def compact(self, manager: TaskManager, background: bool = False) -> None:
+        """
+        Writes the state of a task manager as a new snapshot and empties the log.
+
+        The state is captured and the log moved aside before returning, so the task manager can keep
+        changing while the snapshot is written.
+
+        Args:
+            manager: The TaskManager whose state to write.
+            background: Whether to write the snapshot in a background thread.
+
+        Returns:
+            None
+        """
+
+        self.wait()
+        tasks_data = [task.to_dict() for task in manager.task_list]
+        high_water_mark = manager.id_allocator.high_water_mark
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        old_log_filename = f"{self.log_filename}.old"
+        if os.path.exists(self.log_filename):
+            if os.path.exists(old_log_filename):
+                # a previous compaction did not finish: its records are not in the snapshot yet
+                with open(self.log_filename, "r") as log, open(old_log_filename, "a") as old_log:
+                    old_log.write(log.read())
+                os.remove(self.log_filename)
+            else:
+                os.replace(self.log_filename, old_log_filename)
+        if background:
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(tasks_data, high_water_mark), daemon=True)
+            self._compaction.start()
+        else:
+            self._write_snapshot(tasks_data, high_water_mark)
+
+    def _write_snapshot(self, tasks_data: list[dict], high_water_mark: int) -> None:
+        """
+        Replaces the snapshot with the given task data, then removes the log moved aside by compact.
+
+        Args:
+            tasks_data: The tasks to write, as dictionaries.
+            high_water_mark: The id allocator's high-water mark.
+
+        Returns:
+            None
+        """
+
+        def write_json(temporary_filename: str) -> None:
+            with open(temporary_filename, "w") as file:
+                json.dump(tasks_data, file, indent=4)
+
+        save_high_water_mark(self.filename, high_water_mark)
+        if is_snapshot(self.filename):
+            replace_atomically(self.filename, lambda temporary_filename: write_snapshot(temporary_filename, map(Task.from_dict, tasks_data)))
+        else:
+            replace_atomically(self.filename, write_json)
+        os.remove(f"{self.log_filename}.old")
+
+    def wait(self) -> None:
+        """
+        Waits for a background compaction, if one is running, to finish.
+
+        Returns:
+            None
+        """
+
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self) -> None:
+        """
+        Waits for any background compaction and closes the log.
+
+        Returns:
+            None
+        """
+
+        self.wait()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def apply_record(manager: TaskManager, record: dict) -> None:
+    """
+    Applies a LogStorage record to a task manager.
+
+    Records hold the full state of the task they change, so applying one sets the task to that state,
+    replacing or creating it through the task manager; deleting a task that does not exist does nothing.
+
+    Args:
+        manager: The TaskManager to apply the record to.
+        record: The decoded log record.
+
+    Returns:
+        None
+    """
+
+    if record["op"] == "delete":
+        try:
+            manager.delete_task(record["id"])
+        except ValueError:
+            pass
+        return
+    task = Task.from_dict(record["task"])
+    try:
+        manager.delete_task(task.id)
+    except ValueError:
+        pass
+    manager.add_task(task)
+
+
+def open_task_manager(storage: str = "json", filename: str | None = None, group_commit: GroupCommit | None = None, instrument: bool = False) -> TaskManager:
+    """
+    Creates a task manager using one of the storage backends and loads its tasks.
+
+    Args:
+        storage: The name of the backend: "json" for task_manager.locking.SharedStorage, a JsonStorage
+            that other processes can use at the same time, "log" for LogStorage,
+            "sqlite" for SqliteTaskManager, "lazy" for LazyTaskManager or "sharded" for ShardedTaskManager.
+        filename: The database file, by default default_database(storage).
+        group_commit: An optional GroupCommit policy for the task manager's saves.
+        instrument: Whether to record the task manager's operations, loading included, see TaskManager.instrument.
+
+    Returns:
+        The loaded TaskManager.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+
+    filename = filename or default_database(storage)
+    if storage == "sqlite":
+        from task_manager.sqlite_store import SqliteTaskManager
+        task_manager = SqliteTaskManager(filename, group_commit)
+    elif storage == "lazy":
+        from task_manager.lazy import LazyTaskManager
+        task_manager = LazyTaskManager(filename, group_commit)
+    elif storage == "sharded":
+        from task_manager.sharding import ShardedTaskManager
+        task_manager = ShardedTaskManager(filename, group_commit=group_commit)
+    elif storage == "log":
+        task_manager = TaskManager(LogStorage(filename), group_commit)
+    elif storage == "json":
+        from task_manager.locking import SharedStorage
+        task_manager = TaskManager(SharedStorage(filename), group_commit)
+    else:
+        raise ValueError(f"Unknown storage backend {storage}")
+    if instrument:
+        task_manager.instrument()
+    task_manager.load()
+    return task_manager
+
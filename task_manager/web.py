@@ -0,0 +1,582 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from task_manager.locking import ConflictError
+from task_manager.models import StaleRevisionError, TaskManager, check_change, task_cursor
+from task_manager.paths import STORAGES
+from task_manager.storage import open_task_manager
+
+
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 1024 * 1024
+MAX_POLL_SECONDS = 30.0
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 410: "Gone", 413: "Payload Too Large"}
+
+TASKS = re.compile(r"^/tasks/?$")
+TASK = re.compile(r"^/tasks/(\d+)$")
+COMPLETE = re.compile(r"^/tasks/(\d+)/complete$")
+METRICS = re.compile(r"^/metrics/?$")
+CHANGES = re.compile(r"^/changes/?$")
+CHANGE_FIELDS = (("title", "title"), ("description", "description"), ("due_date", "due_date"), ("completed", "complete_task"))
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """
+    An error that is answered with an HTTP error status and a JSON {"error": message} body.
+
+    Attributes:
+        status: The HTTP status code.
+        message: The error message.
+    """
+
+
+    def __init__(self, status: int, message: str) -> None:
+        """
+        Initializes an HTTPError object.
+
+        Args:
+            status: The HTTP status code.
+            message: The error message.
+
+        Returns:
+            None
+        """
+
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class TaskServer:
+    """
+    Serves a single long-lived TaskManager over an HTTP/JSON API.
+
+    Endpoints:
+        GET /tasks                  lists tasks; ?q=words searches, ?overdue=1, ?due_after= and ?due_before= filter,
+                                    ?limit=, ?cursor= and ?sort=id or due page through them
+        POST /tasks                 creates a task from {"title", "description", "due_date"}
+        GET /tasks/<id>             returns a task
+        PATCH /tasks/<id>           changes any of "title", "description", "due_date" and "completed"
+        DELETE /tasks/<id>          deletes a task
+        POST /tasks/<id>/complete   marks a task as completed
+        GET /metrics                returns TaskManager.stats(), if the task manager is instrumented
+        GET /changes?since=N        returns the changes after revision N and the current revision; with
+                                    ?timeout=S, waits up to S seconds for one if there is none yet.
+                                    Answers 410 Gone if the changes after N are no longer kept
+
+    The server runs on asyncio, so many clients are served concurrently, each over a keep-alive connection
+    on which requests may be pipelined. Every TaskManager call runs on the event loop without awaiting in
+    between, so no request ever sees another one half done. Changes are saved in the background save_delay
+    seconds after the first change not saved yet, so a burst of changes costs a single save. The save runs
+    in a worker thread, so the loop keeps accepting and reading requests meanwhile, but no request is
+    handled until it is done; a save that fails is logged and tried again save_delay seconds later, or,
+    if it raised ConflictError, the tasks are loaded again.
+
+    Attributes:
+        task_manager: The TaskManager being served.
+        save_delay: How many seconds to wait after a change before saving.
+    """
+
+
+    def __init__(self, task_manager: TaskManager, save_delay: float = 1.0) -> None:
+        """
+        Initializes a TaskServer object.
+
+        Args:
+            task_manager: The TaskManager to serve.
+            save_delay: How many seconds to wait after a change before saving.
+
+        Returns:
+            None
+        """
+
+        self.task_manager = task_manager
+        self.save_delay = save_delay
+        self._save_handle: asyncio.TimerHandle | None = None
+        self._save_task: asyncio.Task | None = None
+        # held while a background save runs, and by every request, so requests wait for the save
+        self._save_lock = asyncio.Lock()
+
+    def _get_task(self, id: str):
+        """
+        Retrieves a task by the ID in a request path.
+
+        Args:
+            id: The ID, as matched in the path.
+
+        Returns:
+            The Task object.
+
+        Raises:
+            HTTPError: If no task exists with the given ID.
+        """
+
+        try:
+            return self.task_manager.get_task_by_id(int(id))
+        except ValueError:
+            raise HTTPError(404, "Task with given ID does not exist.")
+
+    def _list(self, query: dict) -> dict:
+        """
+        Lists the tasks selected by the query string of a GET /tasks request.
+
+        Args:
+            query: The parsed query string.
+
+        Returns:
+            The response payload.
+        """
+
+        def moment(name: str) -> datetime.datetime | None:
+            return datetime.datetime.fromisoformat(query[name][0]) if name in query else None
+
+        overdue = query.get("overdue", ["0"])[0] not in ("0", "false")
+        if "q" in query:
+            tasks = self.task_manager.search(query["q"][0])
+        elif "limit" in query or "cursor" in query or "sort" in query:
+            now = datetime.datetime.now()
+            sort = query["sort"][0] if "sort" in query else ("due" if overdue or "due_after" in query or "due_before" in query else "id")
+            limit = int(query["limit"][0]) if "limit" in query else None
+            due_before = min(moment("due_before") or now, now) if overdue else moment("due_before")
+            cursor = query["cursor"][0] if "cursor" in query else None
+            # one task more than the limit tells whether another page follows
+            tasks = list(self.task_manager.page_tasks(sort, cursor, None if limit is None else limit + 1, moment("due_after"), due_before, False if overdue else None))
+            more = limit is not None and len(tasks) > limit
+            tasks = tasks[:limit]
+            next_cursor = task_cursor(tasks[-1], sort) if more and tasks else None
+            return {"tasks": [task.to_dict() for task in tasks], "next_cursor": next_cursor}
+        elif overdue:
+            tasks = self.task_manager.overdue()
+        elif "due_after" in query or "due_before" in query:
+            tasks = self.task_manager.tasks_due_between(moment("due_after"), moment("due_before"))
+        else:
+            tasks = self.task_manager.iter_tasks()
+        return {"tasks": [task.to_dict() for task in tasks]}
+
+    def _changes(self, query: dict) -> dict:
+        """
+        Lists the changes asked for by the query string of a GET /changes request.
+
+        Args:
+            query: The parsed query string.
+
+        Returns:
+            The response payload, with the current "revision" and the "changes" after ?since=.
+
+        Raises:
+            StaleRevisionError: If the changes after ?since= are no longer kept.
+            ValueError: If ?since= is not a number.
+        """
+
+        since = int(query.get("since", ["0"])[0])
+        changes = self.task_manager.changes_since(since)
+        return {"revision": changes[-1]["revision"] if changes else since, "changes": changes}
+
+    async def _wait_for_change(self, query: dict) -> None:
+        """
+        Waits for a change after ?since=, for at most ?timeout= seconds, before a GET /changes request is answered.
+        Returns at once without ?timeout=, or if the query string is invalid, which handle then reports.
+
+        Args:
+            query: The parsed query string.
+
+        Returns:
+            None
+        """
+
+        try:
+            since = int(query.get("since", ["0"])[0])
+            timeout = min(float(query["timeout"][0]), MAX_POLL_SECONDS)
+        except (KeyError, ValueError):
+            return
+        if timeout <= 0 or self.task_manager.revision != since:
+            return
+        loop = asyncio.get_running_loop()
+        changed = loop.create_future()
+
+        def wake(change: dict) -> None:
+            if not changed.done():
+                changed.set_result(None)
+
+        # changes can be made from other threads, such as by a SharedStorage merge
+        unsubscribe = self.task_manager.subscribe(lambda change: loop.call_soon_threadsafe(wake, change))
+        try:
+            await asyncio.wait_for(changed, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            unsubscribe()
+
+    def _change(self, task, body: dict) -> None:
+        """
+        Applies the fields of a PATCH /tasks/<id> body to a task. Every field is checked before the
+        first is applied, so that a bad one leaves the task as it was.
+
+        Args:
+            task: The Task object to change.
+            body: The decoded request body.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If a field is invalid.
+            TypeError: If the due date is not a string.
+        """
+
+        changes = [(aspect, body[field]) for field, aspect in CHANGE_FIELDS if field in body]
+        changes = [(aspect, datetime.datetime.fromisoformat(value) if aspect == "due_date" else value) for aspect, value in changes]
+        for aspect, value in changes:
+            check_change(aspect, value)
+        for aspect, value in changes:
+            self.task_manager.change_task(task.id, aspect, value)
+
+    def handle(self, method: str, target: str, body: dict | None) -> tuple[int, dict]:
+        """
+        Handles one request.
+
+        Args:
+            method: The HTTP method.
+            target: The request target, a path with an optional query string.
+            body: The decoded JSON request body, or None if there was none.
+
+        Returns:
+            The HTTP status code and the response payload.
+
+        Raises:
+            HTTPError: If the request cannot be served.
+        """
+
+        url = urlsplit(target)
+        if TASKS.match(url.path):
+            if method == "GET":
+                return 200, self._list(parse_qs(url.query))
+            if method == "POST":
+                body = body or {}
+                try:
+                    task = self.task_manager.create_task(body["title"], body["description"], body["due_date"])
+                except KeyError as error:
+                    raise HTTPError(400, f"Missing field {error}")
+                self._schedule_save()
+                return 201, task.to_dict()
+        elif match := TASK.match(url.path):
+            task = self._get_task(match[1])
+            if method == "GET":
+                return 200, task.to_dict()
+            if method == "PATCH":
+                try:
+                    self._change(task, body or {})
+                finally:
+                    self._schedule_save()
+                return 200, self.task_manager.get_task_by_id(task.id).to_dict()
+            if method == "DELETE":
+                deleted = self.task_manager.delete_task(task.id)
+                self._schedule_save()
+                return 200, deleted.to_dict()
+        elif match := COMPLETE.match(url.path):
+            task = self._get_task(match[1])
+            if method == "POST":
+                self.task_manager.complete_task(task.id)
+                self._schedule_save()
+                return 200, self.task_manager.get_task_by_id(task.id).to_dict()
+        elif CHANGES.match(url.path):
+            if method == "GET":
+                return 200, self._changes(parse_qs(url.query))
+        elif METRICS.match(url.path):
+            if self.task_manager.instrumentation is None:
+                raise HTTPError(404, "Metrics are not enabled")
+            if method == "GET":
+                return 200, {"operations": self.task_manager.stats()}
+        else:
+            raise HTTPError(404, "Not found")
+        raise HTTPError(405, f"Method {method} not allowed")
+
+    def _schedule_save(self) -> None:
+        """
+        Saves the task manager save_delay seconds after the first change not saved yet.
+
+        Returns:
+            None
+        """
+
+        if self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(self.save_delay, self._start_save)
+
+    def _start_save(self) -> None:
+        """
+        Starts saving the task manager in the background.
+
+        Returns:
+            None
+        """
+
+        self._save_handle = None
+        self._save_task = asyncio.ensure_future(self._save_in_background())
+
+    async def _save_in_background(self) -> None:
+        """
+        Saves the task manager in a worker thread, while no request is handled. A save that fails is
+        logged and tried again save_delay seconds later, unless it conflicts with changes another process
+        saved, which never clears: the tasks are then loaded again, dropping the changes not saved.
+
+        Returns:
+            None
+        """
+
+        async with self._save_lock:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.task_manager.save)
+            except ConflictError as error:
+                # saving again can never succeed: the tasks saved by the other process win
+                logger.error("Saving the tasks failed: %s. Reloading them, which drops the changes not saved", error)
+                await loop.run_in_executor(None, self.task_manager.load)
+            except Exception:
+                logger.exception("Saving the tasks failed, trying again in %s seconds", self.save_delay)
+                self._schedule_save()
+
+    async def flush(self) -> None:
+        """
+        Waits for a background save to finish, then saves the changes not saved yet.
+
+        Returns:
+            None
+        """
+
+        async with self._save_lock:
+            self.save()
+
+    def save(self) -> None:
+        """
+        Saves the task manager now, cancelling any pending background save.
+
+        Returns:
+            None
+        """
+
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self.task_manager.save()
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> bytes:
+        """
+        Reads one line of a request's head.
+
+        Args:
+            reader: The connection's reader.
+
+        Returns:
+            The line, with its line break, or b"" if the client closed the connection.
+
+        Raises:
+            HTTPError: If the line is longer than the reader's limit.
+        """
+
+        try:
+            return await reader.readline()
+        except ValueError:
+            raise HTTPError(400, "Request line too long")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, str, dict, bytes] | None:
+        """
+        Reads one request from a connection.
+
+        Args:
+            reader: The connection's reader.
+
+        Returns:
+            The method, target, HTTP version, lowercased headers and body, or None if the client closed the connection.
+
+        Raises:
+            HTTPError: If the request is malformed or too large.
+        """
+
+        request_line = await self._read_line(reader)
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await self._read_line(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, "Too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the requests of one client connection, in order, until it is closed.
+
+        Args:
+            reader: The connection's reader.
+            writer: The connection's writer.
+
+        Returns:
+            None
+        """
+
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as error:
+                    # the rest of the stream cannot be framed into requests any more
+                    self._write_response(writer, error.status, {"error": error.message}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                if method == "GET" and CHANGES.match(urlsplit(target).path):
+                    await self._wait_for_change(parse_qs(urlsplit(target).query))
+                async with self._save_lock:
+                    status, payload = self._respond(method, target, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        """
+        Handles one request, turning errors into error responses.
+
+        Args:
+            method: The HTTP method.
+            target: The request target.
+            body: The raw request body.
+
+        Returns:
+            The HTTP status code and the response payload.
+        """
+
+        try:
+            try:
+                decoded = json.loads(body) if body else None
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Request body is not valid JSON")
+            try:
+                if self.task_manager.instrumentation is None:
+                    return self.handle(method, target, decoded)
+                with self.task_manager.instrumentation.timer(f"http.{method}"):
+                    return self.handle(method, target, decoded)
+            except StaleRevisionError as error:
+                raise HTTPError(410, str(error))
+            except (ValueError, TypeError) as error:
+                raise HTTPError(400, str(error))
+        except HTTPError as error:
+            return error.status, {"error": error.message}
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        """
+        Writes a JSON response to a connection.
+
+        Args:
+            writer: The connection's writer.
+            status: The HTTP status code.
+            payload: The response payload.
+            keep_alive: Whether the connection stays open after the response.
+
+        Returns:
+            None
+        """
+
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.Server:
+        """
+        Starts listening for connections.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on, 0 for any free port.
+
+        Returns:
+            The listening asyncio.Server.
+        """
+
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(task_manager: TaskManager, host: str = "127.0.0.1", port: int = 8000) -> None:
+    """
+    Serves a task manager until cancelled, then saves it.
+
+    Args:
+        task_manager: The TaskManager to serve.
+        host: The address to listen on.
+        port: The port to listen on.
+
+    Returns:
+        None
+    """
+
+    task_server = TaskServer(task_manager)
+    server = await task_server.start(host, port)
+    print(f"Serving tasks on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await task_server.flush()
+
+
+def main() -> None:
+    """
+    Runs the web API from the command line.
+
+    Returns:
+        None
+    """
+
+    parser = argparse.ArgumentParser(description="Task Manager web API")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--storage", choices=STORAGES, default="json", help="Storage backend")
+    parser.add_argument("--database", type=str, help="Path of the database file")
+    parser.add_argument("--metrics", action="store_true", help="Record operation statistics and serve them at GET /metrics")
+    args = parser.parse_args()
+    task_manager = open_task_manager(args.storage, args.database, instrument=args.metrics)
+    try:
+        asyncio.run(serve(task_manager, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        task_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
 import pytest
 import datetime
-from task_manager.models import Task, TaskManager
+from task_manager.models import ChangeFeed, GroupCommit, IdAllocator, StaleRevisionError, Task, TaskManager, iter_tasks_from_file, task_cursor
+from task_manager.columnar import ColumnarTaskManager, TaskStore
+from task_manager.sqlite_store import SqliteTaskManager
+from task_manager.storage import JsonStorage, LogStorage, Storage
+from task_manager.web import TaskServer
+from task_manager.daemon import Daemon
+from task_manager.cli import main, run_batch, send_to_daemon
+from task_manager.snapshot import SnapshotReader, write_snapshot
+from task_manager.lazy import LazyTaskManager
+from task_manager.scheduler import ReminderScheduler
+from task_manager.sharding import ShardedTaskManager
+from task_manager.locking import ConflictError, ReadWriteLock, SharedStorage, ThreadSafeTaskManager
+from task_manager.storage import open_task_manager
+from concurrent.futures import ProcessPoolExecutor
+import io
 import json
+import asyncio
+import threading
+import os
+import subprocess
+import sys
 
 @pytest.fixture
 def task_manager():
@@ -253,3 +272,1808 @@ def test_load_from_file(task_manager, tmp_path):
     assert task.created_at == datetime.datetime.fromisoformat(task_data[0]["created_at"])
     assert task.due_date == datetime.datetime.fromisoformat(task_data[0]["due_date"])
     assert task.completed == task_data[0]["completed"]
+
+def test_get_task_by_id_after_direct_append(task_manager, sample_task):
+    # Arrange
+    created = task_manager.create_task("Task 1", "Description 1", (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat())
+    other = Task(created.id + 1000, "Other", "Other task", datetime.datetime.now(), datetime.datetime.now(), False)
+    task_manager.task_list.append(other)
+
+    # Act and Assert
+    assert task_manager.get_task_by_id(created.id) is created
+    assert task_manager.get_task_by_id(other.id) is other
+
+def test_delete_task_keeps_index_in_sync(task_manager):
+    # Arrange
+    now = datetime.datetime.now()
+    tasks = [Task(id, f"Task {id}", "Description", now, now, False) for id in range(1, 6)]
+    task_manager.task_list.extend(tasks)
+
+    # Act
+    task_manager.delete_task(2)
+    task_manager.delete_task(5)
+
+    # Assert
+    assert sorted(task.id for task in task_manager.task_list) == [1, 3, 4]
+    for id in (1, 3, 4):
+        assert task_manager.get_task_by_id(id).id == id
+    for id in (2, 5):
+        with pytest.raises(ValueError):
+            task_manager.get_task_by_id(id)
+
+def test_delete_task_not_found(task_manager):
+    # Act and Assert
+    with pytest.raises(ValueError):
+        task_manager.delete_task(999)
+
+def test_create_task_ids_do_not_collide(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+
+    # Act
+    tasks = [task_manager.create_task(f"Task {i}", "Description", due_date) for i in range(500)]
+
+    # Assert
+    assert len({task.id for task in tasks}) == 500
+
+def test_id_allocator_reserve():
+    # Arrange
+    allocator = IdAllocator(high_water_mark=10, block_size=4)
+
+    # Act
+    first = allocator.allocate()
+    reserved = allocator.reserve(100)
+    after = allocator.allocate()
+
+    # Assert
+    assert first == 11
+    assert len(reserved) == 100 and reserved.start > first
+    assert after >= reserved.stop
+    assert allocator.high_water_mark >= after
+
+def test_id_allocator_survives_save_and_load(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    first = task_manager.create_task("Task 1", "Description 1", due_date)
+    second = task_manager.create_task("Task 2", "Description 2", due_date)
+    task_manager.delete_task(second.id)
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+
+    # Act
+    loaded = TaskManager()
+    loaded.load_from_file(file_path)
+    third = loaded.create_task("Task 3", "Description 3", due_date)
+
+    # Assert
+    assert third.id not in (first.id, second.id)
+
+def test_log_storage_replays_changes(tmp_path):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = TaskManager(LogStorage(file_path))
+    manager.load()
+    first = manager.create_task("Task 1", "Description 1", due_date)
+    second = manager.create_task("Task 2", "Description 2", due_date)
+    manager.change_task(first.id, "title", "New Title")
+    manager.complete_task(first.id)
+    manager.delete_task(second.id)
+    manager.save()
+    manager.storage.close()
+
+    # Act
+    loaded = TaskManager(LogStorage(file_path))
+    loaded.load()
+
+    # Assert
+    assert not file_path.exists()
+    assert [task.id for task in loaded.task_list] == [first.id]
+    assert loaded.task_list[0].title == "New Title"
+    assert loaded.task_list[0].completed is True
+    assert loaded.create_task("Task 3", "Description 3", due_date).id not in (first.id, second.id)
+
+@pytest.mark.parametrize("background", [False, True], ids=["foreground", "background"])
+def test_log_storage_compaction(tmp_path, background):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = TaskManager(LogStorage(file_path, compact_threshold=0, background=background))
+    for i in range(3):
+        manager.create_task(f"Task {i}", "Description", due_date)
+
+    # Act
+    manager.save()
+    manager.create_task("Task 3", "Description", due_date)
+    manager.save()
+    manager.storage.close()
+    loaded = TaskManager(LogStorage(file_path))
+    loaded.load()
+
+    # Assert
+    with open(file_path, "r") as file:
+        assert len(json.load(file)) == 4
+    assert sorted(task.title for task in loaded.task_list) == ["Task 0", "Task 1", "Task 2", "Task 3"]
+
+def test_log_storage_skips_torn_record(tmp_path, capsys):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = TaskManager(LogStorage(file_path))
+    manager.create_task("Task 1", "Description 1", due_date)
+    manager.storage.close()
+    with open(f"{file_path}.log", "a") as log:
+        log.write('{"op": "create", "id": 2, "ta')
+
+    # Act
+    loaded = TaskManager(LogStorage(file_path))
+    loaded.load()
+
+    # Assert
+    assert len(loaded.task_list) == 1
+    assert "line 2" in capsys.readouterr().out
+
+def test_sqlite_task_manager(tmp_path):
+    # Arrange
+    file_path = tmp_path / "tasks.sqlite3"
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = SqliteTaskManager(file_path)
+    first = manager.create_task("Task 1", "Description 1", due_date)
+    second = manager.create_task("Task 2", "Description 2", due_date)
+
+    # Act
+    manager.change_task(first.id, "title", "New Title")
+    manager.complete_task(first.id)
+    deleted = manager.delete_task(second.id)
+    manager.save()
+    manager.close()
+    reopened = SqliteTaskManager(file_path)
+
+    # Assert
+    assert deleted.title == "Task 2"
+    task = reopened.get_task_by_id(first.id)
+    assert task.title == "New Title"
+    assert task.completed is True
+    with pytest.raises(ValueError):
+        reopened.get_task_by_id(second.id)
+    with pytest.raises(ValueError):
+        reopened.complete_task(second.id)
+    assert reopened.create_task("Task 3", "Description 3", due_date).id > second.id
+    assert reopened.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_sqlite_import_json(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for i in range(3):
+        task_manager.create_task(f"Task {i}", "Description", due_date)
+    task_manager.delete_task(3)
+    json_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(json_path)
+    manager = SqliteTaskManager(tmp_path / "tasks.sqlite3")
+
+    # Act
+    imported = manager.import_json(json_path)
+
+    # Assert
+    assert imported == 2
+    assert manager.get_task_by_id(2).title == "Task 1"
+    assert manager.create_task("Task 3", "Description", due_date).id == 4
+
+def test_iter_tasks_from_file_reports_malformed_records(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for i in range(3):
+        task_manager.create_task(f"Task {i}", "Description", due_date)
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+    text = file_path.read_text()
+    bad_record_text = '{"id": 9, "title": "No dates"}'
+    text = text.replace("[", "[\n    " + bad_record_text + ",", 1)
+    text = text[:text.rindex("}")]  # cut the last record short
+    file_path.write_text(text)
+    errors = []
+
+    # Act
+    tasks = list(iter_tasks_from_file(file_path, on_error=lambda offset, message: errors.append(offset), chunk_size=16))
+
+    # Assert
+    assert [task.title for task in tasks] == ["Task 0", "Task 1"]
+    assert len(errors) == 2
+    assert text[errors[0]:].startswith(bad_record_text)
+    assert text[errors[1]:].startswith('{\n        "id": 3')
+
+def test_iter_tasks_from_file_skips_a_record_it_cannot_decode(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for i in range(50):
+        task_manager.create_task(f"Task {i}", "Description", due_date)
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+    text = file_path.read_text().replace('"title": "Task 10"', '"title": "Task 10', 1)
+    file_path.write_text(text)
+    errors = []
+
+    # Act
+    tasks = list(iter_tasks_from_file(file_path, on_error=lambda offset, message: errors.append(offset), chunk_size=64))
+
+    # Assert
+    assert [task.id for task in tasks] == [id for id in range(1, 51) if id != 11]
+    assert len(errors) == 1
+    assert text[errors[0]:].startswith('{\n        "id": 11')
+
+def test_iter_tasks_from_file_stops_early(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for i in range(100):
+        task_manager.create_task(f"Task {i}", "Description", due_date)
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+
+    # Act
+    tasks = iter_tasks_from_file(file_path, chunk_size=256)
+    first = next(tasks)
+    tasks.close()
+
+    # Assert
+    assert first.title == "Task 0"
+
+def test_load_from_file_keeps_records_before_truncation(task_manager, tmp_path, capsys):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for i in range(3):
+        task_manager.create_task(f"Task {i}", "Description", due_date)
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+    file_path.write_text(file_path.read_text()[:-20])
+    loaded = TaskManager()
+
+    # Act
+    loaded.load_from_file(file_path)
+
+    # Assert
+    assert len(loaded.task_list) == 2
+    assert "offset" in capsys.readouterr().out
+
+def test_load_from_file_refuses_a_file_that_is_not_a_json_array(task_manager, sample_task, tmp_path):
+    # Arrange
+    task_manager.add_task(sample_task)
+    file_path = tmp_path / "tasks.json"
+    file_path.write_text("not json")
+
+    # Act
+    with pytest.raises(ValueError) as error:
+        task_manager.load_from_file(str(file_path))
+
+    # Assert
+    assert "Cannot read the JSON file" in str(error.value)
+    assert task_manager.task_list == [sample_task]
+
+def test_task_has_no_instance_dict(sample_task):
+    # Act and Assert
+    with pytest.raises(AttributeError):
+        sample_task.__dict__
+
+def test_task_store_views(sample_task):
+    # Arrange
+    store = TaskStore([sample_task])
+
+    # Act
+    view = store[0]
+    view.change_title("New Title")
+    view.complete_task()
+
+    # Assert
+    assert view.to_dict() == {**sample_task.to_dict(), "title": "New Title", "completed": True}
+    assert store.task(0).title == "New Title"
+
+def test_columnar_task_manager(tmp_path):
+    # Arrange
+    manager = ColumnarTaskManager()
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    tasks = [manager.create_task(f"Task {i}", f"Description {i}", due_date) for i in range(5)]
+
+    # Act
+    manager.change_task(tasks[1].id, "description", "New Description")
+    manager.complete_task(tasks[2].id)
+    deleted = manager.delete_task(tasks[0].id)
+    file_path = tmp_path / "tasks.json"
+    manager.save_to_file(file_path)
+    loaded = ColumnarTaskManager()
+    loaded.load_from_file(file_path)
+
+    # Assert
+    assert deleted.title == "Task 0"
+    assert isinstance(loaded.task_list, TaskStore)
+    assert sorted(task.id for task in loaded.task_list) == [2, 3, 4, 5]
+    assert loaded.get_task_by_id(2).description == "New Description"
+    assert loaded.get_task_by_id(3).completed is True
+    with pytest.raises(ValueError):
+        loaded.get_task_by_id(1)
+
+def test_task_store_compacts_dead_strings(sample_task):
+    # Arrange
+    store = TaskStore([sample_task, sample_task])
+    view = store[0]
+    for i in range(10):
+        view.change_title(f"Title {i}")
+    store.pop(1)
+    live = len("Title 9") + len(sample_task.description)
+
+    # Act
+    kept = store.compact(ratio=0.9)
+    compacted = store.compact()
+
+    # Assert
+    assert not kept
+    assert compacted
+    assert len(store.strings) == live
+    assert store.dead_bytes == 0
+    assert view.to_dict() == {**sample_task.to_dict(), "title": "Title 9"}
+
+def test_columnar_task_manager_compacts_the_heap_on_save(tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = ColumnarTaskManager(JsonStorage(str(tmp_path / "tasks.json")))
+    manager.create_task("Title", "Description", due_date)
+    for i in range(5):
+        manager.change_task(1, "description", f"Description {i}")
+
+    # Act
+    manager.save()
+
+    # Assert
+    assert manager.task_list.dead_bytes == 0
+    assert bytes(manager.task_list.strings) == b"TitleDescription 4"
+
+def test_columnar_task_manager_rebuilds_due_date_index_on_load(tmp_path):
+    # Arrange
+    now = datetime.datetime.now()
+    file_path = tmp_path / "tasks.json"
+    saved = TaskManager()
+    for id in range(1, 4):
+        saved.add_task(Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(days=id), False))
+    saved.save_to_file(file_path)
+    manager = ColumnarTaskManager()
+    manager.add_task(Task(9, "Old", "Description", now, now + datetime.timedelta(days=1), False))
+    manager.add_task(Task(8, "Old", "Description", now, now + datetime.timedelta(days=2), False))
+    manager.tasks_due_between()
+
+    # Act
+    manager.load_from_file(file_path)
+    due = manager.tasks_due_between()
+    found = manager.search("task")
+
+    # Assert
+    assert [task.id for task in due] == [1, 2, 3]
+    assert [task.title for task in due] == ["Task 1", "Task 2", "Task 3"]
+    assert sorted(task.id for task in found) == [1, 2, 3]
+
+def test_due_date_queries(task_manager):
+    # Arrange
+    now = datetime.datetime.now()
+    tasks = [Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(days=id - 3), False) for id in range(1, 8)]
+    for task in tasks:
+        task_manager.add_task(task)
+    task_manager.complete_task(1)
+
+    # Act
+    task_manager.change_task(7, "due_date", now + datetime.timedelta(hours=12))
+    task_manager.delete_task(6)
+    created = task_manager.create_task("Task 8", "Description", (now + datetime.timedelta(days=10)).isoformat())
+
+    # Assert
+    assert [task.id for task in task_manager.overdue(now)] == [2]
+    assert [task.id for task in task_manager.tasks_due_between(now - datetime.timedelta(days=2), now + datetime.timedelta(days=1))] == [1, 2, 3, 7]
+    assert [task.id for task in task_manager.next_due(3, now + datetime.timedelta(seconds=1))] == [7, 4, 5]
+    assert task_manager.tasks_due_between(now + datetime.timedelta(days=9))[0] is created
+
+def test_due_date_index_matches_scan(task_manager):
+    # Arrange
+    now = datetime.datetime.now()
+    for id in range(1, 200):
+        task_manager.add_task(Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(hours=(id * 37) % 101), id % 4 == 0))
+    start, end = now + datetime.timedelta(hours=20), now + datetime.timedelta(hours=60)
+
+    # Act
+    indexed = [task.id for task in task_manager.tasks_due_between(start, end)]
+
+    # Assert
+    scanned = [task.id for task in sorted(task_manager.task_list, key=lambda task: (task.due_date, task.id)) if start <= task.due_date < end]
+    assert indexed == scanned
+
+def test_sqlite_due_date_queries(tmp_path):
+    # Arrange
+    now = datetime.datetime.now()
+    manager = SqliteTaskManager(tmp_path / "tasks.sqlite3")
+    for id in range(1, 6):
+        manager.add_task(Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(days=id - 3), id == 1))
+
+    # Act and Assert
+    assert [task.id for task in manager.overdue(now)] == [2]
+    assert [task.id for task in manager.tasks_due_between(now - datetime.timedelta(days=3), now)] == [1, 2]
+    assert [task.id for task in manager.next_due(2, now)] == [3, 4]
+
+@pytest.mark.parametrize("query, expected_ids", [
+    ("invoice", [1, 3]),
+    ("INVOICE client", [3]),
+    ("report OR client", [2, 3]),
+    ("inv*", [1, 3, 4]),
+    ("missing", []),
+], ids=["word", "and", "or", "prefix", "no_match"])
+def test_search(task_manager, query, expected_ids):
+    # Arrange
+    now = datetime.datetime.now()
+    for id, title, description in [
+        (1, "Invoice", "Send the invoice"),
+        (2, "Report", "Write the quarterly report"),
+        (3, "Client", "Invoice the client"),
+        (4, "Inventory", "Count the stock"),
+    ]:
+        task_manager.add_task(Task(id, title, description, now, now, False))
+
+    # Act and Assert
+    assert [task.id for task in task_manager.search(query)] == expected_ids
+
+def test_search_index_follows_changes(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    first = task_manager.create_task("Invoice", "Send the invoice", due_date)
+    second = task_manager.create_task("Report", "Write the report", due_date)
+    task_manager.search("invoice")
+
+    # Act
+    task_manager.change_task(first.id, "title", "Payment")
+    task_manager.change_task(first.id, "description", "Chase the payment")
+    task_manager.delete_task(second.id)
+    third = task_manager.create_task("Invoice again", "Another invoice", due_date)
+
+    # Assert
+    assert task_manager.search("invoice") == [third]
+    assert task_manager.search("payment") == [first]
+    assert task_manager.search("report") == []
+
+def test_search_index_is_saved_with_database(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_manager.create_task("Invoice", "Send the invoice", due_date)
+    task_manager.search("invoice")
+    file_path = tmp_path / "tasks.json"
+    task_manager.save_to_file(file_path)
+
+    # Act
+    loaded = TaskManager()
+    loaded.load_from_file(file_path)
+    indexed_on_load = loaded._search_index is not None
+    found = [task.title for task in loaded.search("invoice")]
+    loaded_index = loaded._search_index
+    file_path.write_text(file_path.read_text().replace("Invoice", "Receipt"))
+    reloaded = TaskManager()
+    reloaded.load_from_file(file_path)
+    changed = TaskManager()
+    changed.load_from_file(file_path)
+    changed.create_task("Receipt copy", "Another receipt", due_date)
+    changed.save_to_file(tmp_path / "unsearched.json")
+
+    # Assert
+    assert not indexed_on_load
+    assert found == ["Invoice"]
+    assert loaded_index.search("invoice") == {1}
+    assert [task.title for task in reloaded.search("receipt")] == ["Receipt"]
+    assert [task.title for task in changed.search("receipt")] == ["Receipt", "Receipt copy"]
+    assert not (tmp_path / "unsearched.json.search").exists()
+    assert not list(tmp_path.glob("*.tmp*"))
+
+def test_sqlite_search(tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = SqliteTaskManager(tmp_path / "tasks.sqlite3")
+    first = manager.create_task("Invoice", "Send the invoice", due_date)
+    second = manager.create_task("Report", "Write the report", due_date)
+
+    # Act
+    manager.change_task(second.id, "description", "Report on invoices")
+    manager.delete_task(first.id)
+
+    # Assert
+    assert [task.id for task in manager.search("invoice*")] == [second.id]
+    assert [task.id for task in manager.search("invoice OR report")] == [second.id]
+    assert manager.search("send") == []
+
+def test_sqlite_search_without_fts5(tmp_path, monkeypatch):
+    # Arrange
+    import task_manager.sqlite_store
+    monkeypatch.setattr(task_manager.sqlite_store, "SEARCH_SCHEMA", "CREATE VIRTUAL TABLE tasks_search USING no_such_module (title);")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = SqliteTaskManager(tmp_path / "tasks.sqlite3")
+    first = manager.create_task("Invoice", "Send the invoice", due_date)
+    second = manager.create_task("Report", "Write the report on invoices", due_date)
+    third = manager.create_task("Invoices_due", "Check the list", due_date)
+
+    # Act
+    prefix_matches = manager.search("invoice*")
+    word_matches = manager.search("invoice OR write")
+
+    # Assert
+    assert not manager.full_text_search
+    assert [task.id for task in prefix_matches] == [first.id, second.id, third.id]
+    assert [task.id for task in word_matches] == [first.id, second.id]
+    assert [task.id for task in manager.search("INVOICES_DUE")] == [third.id]
+    assert manager.search("send report") == []
+
+async def read_http_response(reader):
+    status_line = await reader.readline()
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return int(status_line.split()[1]), json.loads(body)
+
+def http_request(method, target, body=None, close=False):
+    data = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {target} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+    if close:
+        head += "Connection: close\r\n"
+    return head.encode() + b"\r\n" + data
+
+def test_web_api_pipelined_requests(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_server = TaskServer(task_manager, save_delay=60)
+    task_manager.save = lambda: None
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(
+            http_request("POST", "/tasks", {"title": "Task 1", "description": "Description 1", "due_date": due_date})
+            + http_request("POST", "/tasks", {"title": "Task 2", "description": "Description 2", "due_date": due_date})
+            + http_request("PATCH", "/tasks/1", {"title": "New Title"})
+            + http_request("POST", "/tasks/2/complete")
+            + http_request("DELETE", "/tasks/1")
+            + http_request("GET", "/tasks/1")
+            + http_request("POST", "/tasks", {"title": "Task 3"})
+            + http_request("GET", "/tasks", close=True)
+        )
+        responses = [await read_http_response(reader) for _ in range(8)]
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    # Act
+    responses = asyncio.run(scenario())
+
+    # Assert
+    assert [status for status, _ in responses] == [201, 201, 200, 200, 200, 404, 400, 200]
+    assert responses[2][1]["title"] == "New Title"
+    assert responses[3][1]["completed"] is True
+    assert [task["id"] for task in responses[7][1]["tasks"]] == [2]
+
+def test_web_api_patch_leaves_a_task_unchanged_when_a_later_field_is_invalid(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_manager.create_task("Old Title", "Description", due_date)
+    task_server = TaskServer(task_manager, save_delay=60)
+    task_manager.save = lambda: None
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(http_request("PATCH", "/tasks/1", {"title": "New Title", "due_date": "garbage"}, close=True))
+        response = await read_http_response(reader)
+        scheduled = task_server._save_handle is not None
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response, scheduled
+
+    # Act
+    (status, payload), scheduled = asyncio.run(scenario())
+
+    # Assert
+    assert status == 400
+    assert "garbage" in payload["error"]
+    assert task_manager.get_task_by_id(1).title == "Old Title"
+    assert scheduled
+
+def test_web_api_concurrent_clients(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    saves = []
+    task_manager.save = lambda: saves.append(len(task_manager.task_list))
+    task_server = TaskServer(task_manager, save_delay=0.01)
+
+    async def client(address, number):
+        reader, writer = await asyncio.open_connection(*address)
+        statuses = []
+        for i in range(10):
+            writer.write(http_request("POST", "/tasks", {"title": f"Task {number}-{i}", "description": "Description", "due_date": due_date}))
+            statuses.append((await read_http_response(reader))[0])
+        writer.close()
+        return statuses
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        address = server.sockets[0].getsockname()[:2]
+        results = await asyncio.gather(*(client(address, number) for number in range(20)))
+        await asyncio.sleep(0.05)
+        server.close()
+        await server.wait_closed()
+        return results
+
+    # Act
+    results = asyncio.run(scenario())
+
+    # Assert
+    assert all(status == 201 for statuses in results for status in statuses)
+    assert len({task.id for task in task_manager.task_list}) == 200
+    assert saves and saves[-1] == 200
+
+def test_web_api_saves_in_a_worker_thread_and_retries_failed_saves(task_manager, caplog):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    save_threads = []
+
+    def save():
+        save_threads.append(threading.current_thread())
+        if len(save_threads) == 1:
+            raise OSError("Disk full")
+
+    task_manager.save = save
+    task_server = TaskServer(task_manager, save_delay=0.01)
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(http_request("POST", "/tasks", {"title": "Task 1", "description": "Description", "due_date": due_date}))
+        status, _ = await read_http_response(reader)
+        await asyncio.sleep(0.1)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return status
+
+    # Act
+    status = asyncio.run(scenario())
+
+    # Assert
+    assert status == 201
+    assert len(save_threads) == 2
+    assert threading.main_thread() not in save_threads
+    assert "Saving the tasks failed" in caplog.text
+
+def test_web_api_rejects_an_overlong_request_line(task_manager):
+    # Arrange
+    task_server = TaskServer(task_manager, save_delay=60)
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(b"GET /" + b"a" * 100_000 + b" HTTP/1.1\r\n\r\n")
+        response = await read_http_response(reader)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    # Act
+    status, payload = asyncio.run(scenario())
+
+    # Assert
+    assert status == 400
+    assert payload == {"error": "Request line too long"}
+
+def test_daemon_runs_cli_commands_and_coalesces_saves(task_manager, tmp_path):
+    # Arrange
+    saves = []
+    task_manager.save = lambda: saves.append(len(task_manager.task_list))
+    daemon = Daemon(task_manager, str(tmp_path / "tasks.sock"), flush_delay=0.05)
+
+    async def scenario():
+        server = await daemon.start()
+        replies = []
+        for argv in (["add", "Task 1", "Description 1", "2030-01-01"],
+                     ["add", "Task 2", "Description 2", "2030-01-02"],
+                     ["complete", "1"],
+                     ["remove", "99"],
+                     ["search", "task"]):
+            replies.append(await asyncio.to_thread(send_to_daemon, daemon.path, argv))
+        await asyncio.sleep(0.1)
+        server.close()
+        await server.wait_closed()
+        return replies
+
+    # Act
+    replies = asyncio.run(scenario())
+
+    # Assert
+    assert [reply["status"] for reply in replies] == [0, 0, 0, 1, 0]
+    assert replies[3]["error"] == "Task with given ID does not exist."
+    assert "completed: True" in replies[4]["output"]
+    assert task_manager.get_task_by_id(1).completed
+    assert saves == [2]
+
+def test_daemon_replies_with_the_error_of_a_failing_command(task_manager, tmp_path):
+    # Arrange
+    daemon = Daemon(task_manager, str(tmp_path / "tasks.sock"))
+
+    def search(query):
+        raise RuntimeError("Index is broken")
+
+    task_manager.search = search
+
+    # Act
+    reply = daemon.execute(["search", "task"])
+
+    # Assert
+    assert reply == {"status": 1, "output": "", "error": "RuntimeError: Index is broken"}
+
+def test_daemon_reloads_instead_of_retrying_a_conflicting_save(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "tasks.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    setup = open_task_manager("json", file_path)
+    setup.create_task("Task 1", "Description", due_date)
+    setup.save()
+    served = open_task_manager("json", file_path)
+    other = open_task_manager("json", file_path)
+    daemon = Daemon(served, str(tmp_path / "tasks.sock"), flush_delay=0.01)
+    served.change_task(1, "title", "Daemon")
+    other.change_task(1, "title", "Other")
+    other.save()
+
+    async def scenario():
+        await daemon._save_in_background()
+        return daemon._save_handle
+
+    # Act
+    save_handle = asyncio.run(scenario())
+
+    # Assert
+    assert save_handle is None
+    assert not served.dirty
+    assert served.get_task_by_id(1).title == "Other"
+
+def test_send_to_daemon_does_not_fall_back_once_the_command_is_sent(tmp_path):
+    # Arrange
+    import socket
+    path = str(tmp_path / "tasks.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    def drop_connection():
+        connection, _ = listener.accept()
+        connection.makefile("rb").readline()
+        connection.close()
+
+    thread = threading.Thread(target=drop_connection)
+    thread.start()
+
+    # Act
+    reply = send_to_daemon(path, ["add", "Task 1", "Description 1", "2030-01-01"])
+    thread.join()
+    listener.close()
+
+    # Assert
+    assert reply["status"] == 1
+    assert "may or may not have run" in reply["error"]
+
+def test_send_to_daemon_without_daemon(tmp_path):
+    # Act
+    reply = send_to_daemon(str(tmp_path / "missing.sock"), ["list"])
+
+    # Assert
+    assert reply is None
+
+def test_create_tasks(task_manager):
+    # Arrange
+    due_date = datetime.datetime.now() + datetime.timedelta(days=1)
+
+    # Act
+    tasks = task_manager.create_tasks([("Task 1", "Description 1", due_date), ("Task 2", "Description 2", due_date.isoformat())])
+
+    # Assert
+    assert [task.id for task in tasks] == [1, 2]
+    assert task_manager.get_task_by_id(2).title == "Task 2"
+    assert task_manager.tasks_due_between(due_date, None) == tasks
+
+def test_create_tasks_with_past_due_date_creates_nothing(task_manager):
+    # Arrange
+    future = datetime.datetime.now() + datetime.timedelta(days=1)
+    past = datetime.datetime.now() - datetime.timedelta(days=1)
+
+    # Act
+    with pytest.raises(ValueError):
+        task_manager.create_tasks([("Task 1", "Description 1", future), ("Task 2", "Description 2", past)])
+
+    # Assert
+    assert task_manager.task_list == []
+
+def test_run_batch_reports_errors_and_applies_the_rest(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    lines = [
+        json.dumps({"op": "add", "title": "Task 1", "description": "Description 1", "due_date": due_date}),
+        json.dumps({"op": "add", "title": "Task 2", "description": "Description 2", "due_date": due_date}),
+        "not json",
+        json.dumps({"op": "complete", "id": 1}),
+        json.dumps({"op": "remove", "id": 99}),
+        json.dumps({"op": "edit", "id": 2, "title": "New Title"}),
+        json.dumps({"op": "add", "title": "Task 3", "description": "Description 3", "due_date": "2000-01-01"}),
+        json.dumps({"op": "add", "title": "Task 4", "description": "Description 4", "due_date": due_date}),
+        json.dumps({"op": "edit", "id": 2, "title": 5}),
+        json.dumps({"op": "edit", "id": 2, "due_date": 20300101}),
+        json.dumps({"op": "edit", "id": 2, "title": "Half Applied", "due_date": "tomorrow"}),
+    ]
+    output = io.StringIO()
+
+    # Act
+    applied = run_batch(task_manager, lines, output)
+
+    # Assert
+    assert applied == 5
+    assert output.getvalue().splitlines() == [
+        "Line 3: Invalid JSON: Expecting value: line 1 column 1 (char 0)",
+        "Line 5: Task with given ID does not exist.",
+        "Line 7: Due time cannot be set to the past",
+        "Line 9: edit needs a string title",
+        "Line 10: edit needs a string due_date",
+        "Line 11: Invalid isoformat string: 'tomorrow'",
+        "Applied 5 of 11 operations",
+    ]
+    assert task_manager.get_task_by_id(1).completed
+    assert task_manager.get_task_by_id(2).title == "New Title"
+    assert task_manager.get_task_by_id(3).title == "Task 4"
+
+def test_run_batch_leaves_a_task_unchanged_when_a_later_field_is_invalid(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_manager.create_task("Old Title", "Description", due_date)
+    lines = [
+        json.dumps({"op": "edit", "id": 1, "title": "New Title", "description": "x" * 301}),
+        json.dumps({"op": "edit", "id": 1, "title": "New Title", "due_date": "2000-01-01"}),
+    ]
+    output = io.StringIO()
+
+    # Act
+    applied = run_batch(task_manager, lines, output)
+
+    # Assert
+    assert applied == 0
+    assert output.getvalue().splitlines()[:2] == ["Line 1: Invalid length", "Line 2: Due time cannot be set to the past"]
+    assert task_manager.get_task_by_id(1).title == "Old Title"
+
+def test_binary_snapshot_round_trip(task_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_manager.create_task("Tâche 1", "Déscription ✓", due_date)
+    task_manager.create_task("Task 2", "", due_date)
+    task_manager.complete_task(2)
+    file_path = tmp_path / "tasks.bin"
+    loaded = TaskManager()
+
+    # Act
+    task_manager.save_to_file(file_path)
+    loaded.load_from_file(file_path)
+
+    # Assert
+    assert [task.to_dict() for task in loaded.task_list] == [task.to_dict() for task in task_manager.task_list]
+    assert loaded.create_task("Task 3", "Description 3", due_date).id == 3
+
+def test_snapshot_reader_finds_tasks_by_id(tmp_path):
+    # Arrange
+    due_date = datetime.datetime.now() + datetime.timedelta(days=1)
+    tasks = [Task(id, f"Task {id}", "Description", datetime.datetime.now(), due_date, False) for id in (5, 2, 9)]
+    file_path = tmp_path / "tasks.bin"
+    write_snapshot(file_path, tasks)
+
+    # Act
+    with SnapshotReader(file_path) as reader:
+        found = {id: reader.find(id) for id in (2, 5, 9, 7)}
+        titles = {id: reader.task(offset).title for id, offset in found.items() if offset is not None}
+
+    # Assert
+    assert found[7] is None
+    assert titles == {2: "Task 2", 5: "Task 5", 9: "Task 9"}
+
+def test_load_from_file_rejects_truncated_snapshot(task_manager, sample_task, tmp_path):
+    # Arrange
+    task_manager.add_task(sample_task)
+    file_path = tmp_path / "tasks.bin"
+    task_manager.save_to_file(file_path)
+    file_path.write_bytes(file_path.read_bytes()[:-4])
+    truncated = file_path.read_bytes()
+    loaded = TaskManager()
+
+    # Act
+    with pytest.raises(ValueError, match="truncated"):
+        loaded.load_from_file(file_path)
+    with pytest.raises(ValueError, match="truncated"):
+        LazyTaskManager(str(file_path)).load()
+
+    # Assert
+    assert loaded.task_list == []
+    assert file_path.read_bytes() == truncated
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = TaskManager()
+    for i in range(1, 4):
+        manager.create_task(f"Task {i}", f"Description {i}", due_date)
+    file_path = tmp_path / "tasks.bin"
+    manager.save_to_file(file_path)
+    return file_path
+
+def test_lazy_task_manager_decodes_tasks_on_demand(snapshot_path):
+    # Arrange
+    manager = LazyTaskManager(snapshot_path)
+
+    # Act
+    manager.load()
+    task = manager.get_task_by_id(2)
+
+    # Assert
+    assert task.title == "Task 2"
+    assert list(manager._tasks) == [2]
+    assert [task.id for task in manager.iter_tasks()] == [1, 2, 3]
+    assert list(manager._tasks) == [2]
+    with pytest.raises(ValueError):
+        manager.get_task_by_id(4)
+    manager.close()
+
+def test_lazy_task_manager_patches_completion_in_place(snapshot_path):
+    # Arrange
+    manager = LazyTaskManager(snapshot_path)
+    manager.load()
+    size = snapshot_path.stat().st_size
+
+    # Act
+    manager.complete_task(3)
+    manager.save()
+    manager.close()
+
+    # Assert
+    assert manager._rewrite is False
+    assert snapshot_path.stat().st_size == size
+    loaded = TaskManager()
+    loaded.load_from_file(snapshot_path)
+    assert [task.completed for task in loaded.task_list] == [False, False, True]
+
+def test_lazy_task_manager_rewrites_after_create_and_delete(snapshot_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=2)).isoformat()
+    manager = LazyTaskManager(snapshot_path)
+    manager.load()
+
+    # Act
+    manager.delete_task(1)
+    manager.change_task(2, "title", "New Title")
+    created = manager.create_task("Task 4", "Description 4", due_date)
+    manager.save()
+    manager.close()
+
+    # Assert
+    assert created.id == 4
+    loaded = TaskManager()
+    loaded.load_from_file(snapshot_path)
+    assert [(task.id, task.title) for task in loaded.task_list] == [(2, "New Title"), (3, "Task 3"), (4, "Task 4")]
+
+class CountingStorage(Storage):
+    def __init__(self):
+        self.saves = 0
+
+    def load(self, manager):
+        pass
+
+    def save(self, manager):
+        self.saves += 1
+
+def test_save_skips_unchanged_task_manager(sample_task):
+    # Arrange
+    storage = CountingStorage()
+    manager = TaskManager(storage)
+    manager.load()
+
+    # Act
+    manager.save()
+    manager.add_task(sample_task)
+    manager.save()
+    manager.save()
+    sample_task.change_title("New Title")
+    manager.save()
+
+    # Assert
+    assert storage.saves == 2
+    assert not manager.dirty
+
+def test_changes_to_one_task_manager_do_not_make_another_dirty(sample_task):
+    # Arrange
+    first = TaskManager(CountingStorage())
+    second = TaskManager(CountingStorage())
+    first.add_task(sample_task)
+    first.mark_clean()
+
+    # Act
+    first.change_task(sample_task.id, "title", "New Title")
+    changed_through_manager = first.dirty
+    first.mark_clean()
+    sample_task.change_description("New Description")
+
+    # Assert
+    assert changed_through_manager
+    assert first.dirty
+    assert not second.dirty
+
+def test_every_load_publishes_a_single_reload(task_manager, sample_task, tmp_path):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    task_manager.add_task(sample_task)
+    task_manager.save_to_file(file_path)
+    loaded = TaskManager(JsonStorage(str(file_path)))
+    changes = []
+    loaded.subscribe(changes.append)
+
+    # Act
+    loaded.load_from_file(file_path)
+    loaded.load()
+
+    # Assert
+    assert [change["op"] for change in changes] == ["reload", "reload"]
+    assert loaded.get_task_by_id(sample_task.id).title == sample_task.title
+
+@pytest.mark.parametrize("make_manager", [
+    lambda tmp_path: TaskManager(JsonStorage(str(tmp_path / "tasks.json"))),
+    lambda tmp_path: ColumnarTaskManager(JsonStorage(str(tmp_path / "tasks.json"))),
+    lambda tmp_path: ShardedTaskManager(str(tmp_path / "tasks.shards"), shards=2),
+], ids=["list", "columnar", "sharded"])
+def test_save_keeps_a_change_made_through_a_task_method(make_manager, tmp_path):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager = make_manager(tmp_path)
+    manager.load()
+    manager.create_task("Old Title", "Description", due_date)
+    manager.save()
+    manager = make_manager(tmp_path)
+    manager.load()
+
+    # Act
+    manager.get_task_by_id(1).change_title("New Title")
+    manager.save()
+    reloaded = make_manager(tmp_path)
+    reloaded.load()
+
+    # Assert
+    assert reloaded.get_task_by_id(1).title == "New Title"
+
+def test_save_to_file_keeps_previous_file_when_writing_fails(task_manager, sample_task, tmp_path):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    task_manager.add_task(sample_task)
+    task_manager.save_to_file(file_path)
+    saved = file_path.read_text()
+    task_manager.add_task(Task(2, object(), "Description", datetime.datetime.now(), datetime.datetime.now(), False))
+
+    # Act
+    with pytest.raises(TypeError):
+        task_manager.save_to_file(file_path)
+
+    # Assert
+    assert file_path.read_text() == saved
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["tasks.json", "tasks.json.meta"]
+
+def test_group_commit_holds_back_saves(sample_task):
+    # Arrange
+    storage = CountingStorage()
+    manager = TaskManager(storage, GroupCommit(max_pending=3, max_delay=60))
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+
+    # Act
+    saves = []
+    for i in range(4):
+        manager.create_task(f"Task {i}", "Description", due_date)
+        manager.save()
+        saves.append(storage.saves)
+    manager.close()
+
+    # Assert
+    assert saves == [0, 0, 1, 1]
+    assert storage.saves == 2
+
+def test_task_version_is_bumped_by_changes_and_saved(task_manager, sample_task, tmp_path):
+    # Arrange
+    file_path = tmp_path / "tasks.json"
+    task_manager.add_task(sample_task)
+
+    # Act
+    task_manager.change_task(1, "title", "New Title")
+    task_manager.complete_task(1)
+    task_manager.save_to_file(file_path)
+    loaded = TaskManager()
+    loaded.load_from_file(file_path)
+
+    # Assert
+    assert loaded.get_task_by_id(1).version == 2
+
+def test_shared_storage_merges_changes_to_different_tasks(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "tasks.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    setup = open_task_manager("json", file_path)
+    setup.create_tasks([("Task 1", "Description", due_date), ("Task 2", "Description", due_date)])
+    setup.save()
+    first = open_task_manager("json", file_path)
+    second = open_task_manager("json", file_path)
+
+    # Act
+    first.complete_task(1)
+    created_first = first.create_task("Task 3", "Description", due_date)
+    second.change_task(2, "title", "Changed")
+    created_second = second.create_task("Task 4", "Description", due_date)
+    first.save()
+    second.save()
+    merged = open_task_manager("json", file_path)
+
+    # Assert
+    assert created_first.id != created_second.id
+    assert merged.get_task_by_id(1).completed
+    assert merged.get_task_by_id(2).title == "Changed"
+    assert sorted(task.title for task in merged.iter_tasks()) == ["Changed", "Task 1", "Task 3", "Task 4"]
+    assert second.get_task_by_id(1).completed
+
+def test_shared_storage_merge_replays_deletes_onto_the_saved_tasks(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "tasks.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    setup = TaskManager(SharedStorage(file_path))
+    setup.load()
+    setup.create_tasks([("Task 1", "Description", due_date), ("Task 2", "Description", due_date)])
+    setup.save()
+    storage = SharedStorage(file_path)
+    manager = TaskManager(storage)
+    manager.load()
+    other = TaskManager(SharedStorage(file_path))
+    other.load()
+    manager.delete_task(1)
+    other.change_task(2, "title", "Changed")
+    other.save()
+
+    # Act
+    storage._merge(manager)
+
+    # Assert
+    assert [(task.id, task.title) for task in manager.iter_tasks()] == [(2, "Changed")]
+
+def test_shared_storage_detects_conflicting_changes(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "tasks.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    setup = open_task_manager("json", file_path)
+    setup.create_task("Task 1", "Description", due_date)
+    setup.save()
+    first = open_task_manager("json", file_path)
+    second = open_task_manager("json", file_path)
+    first.change_task(1, "title", "First")
+    second.change_task(1, "title", "Second")
+    first.save()
+
+    # Act
+    with pytest.raises(ConflictError) as error:
+        second.save()
+    second.load()
+    second.change_task(1, "description", "Redone")
+    second.save()
+
+    # Assert
+    assert error.value.ids == [1]
+    task = open_task_manager("json", file_path).get_task_by_id(1)
+    assert (task.title, task.description, task.version) == ("First", "Redone", 2)
+
+def change_shared_database(file_path, worker, operations):
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for operation in range(operations):
+        while True:
+            manager = open_task_manager("json", file_path)
+            try:
+                manager.create_task(f"Worker {worker} {operation}", "Description", due_date)
+                manager.change_task(1, "description", f"Changed by {worker}")
+                manager.save()
+                break
+            except ConflictError:
+                pass
+            finally:
+                manager.close()
+
+def test_shared_storage_loses_no_updates_across_processes(tmp_path):
+    # Arrange
+    file_path = str(tmp_path / "tasks.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    setup = open_task_manager("json", file_path)
+    setup.create_task("Shared", "Description", due_date)
+    setup.save()
+
+    # Act
+    with ProcessPoolExecutor(4) as executor:
+        list(executor.map(change_shared_database, [file_path] * 4, range(4), [5] * 4))
+
+    # Assert
+    manager = open_task_manager("json", file_path)
+    assert len(list(manager.iter_tasks())) == 1 + 4 * 5
+    assert manager.get_task_by_id(1).version == 4 * 5
+
+def test_read_write_lock_lets_readers_share_and_excludes_writers():
+    # Arrange
+    lock = ReadWriteLock()
+    readers_inside = threading.Barrier(3, timeout=5)
+    events = []
+
+    def read():
+        with lock.read():
+            readers_inside.wait()
+            events.append("read")
+
+    def write():
+        with lock.write():
+            events.append("write")
+
+    # Act
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    with lock.read():
+        with lock.read():
+            readers_inside.wait()
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(0.1)
+        blocked = writer.is_alive()
+    writer.join(5)
+    for reader in readers:
+        reader.join(5)
+
+    # Assert
+    assert blocked
+    assert events == ["read", "read", "write"]
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+def test_thread_safe_task_manager_concurrent_deletes_and_lookups():
+    # Arrange
+    manager = ThreadSafeTaskManager()
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager.create_tasks([(f"Task {i}", "Description", due_date) for i in range(2000)])
+    deleted = []
+    wrong = []
+
+    def delete(start):
+        for id in range(1, 2001):
+            try:
+                deleted.append(manager.delete_task((id + start) % 2000 + 1).id)
+            except ValueError:
+                pass
+
+    def look_up():
+        for id in range(1, 2001):
+            try:
+                if manager.get_task_by_id(id).id != id:
+                    wrong.append(id)
+            except ValueError:
+                pass
+
+    # Act
+    threads = [threading.Thread(target=delete, args=(start,)) for start in (0, 500, 1000, 1500)]
+    threads.append(threading.Thread(target=look_up))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert sorted(deleted) == list(range(1, 2001))
+    assert wrong == []
+    assert list(manager.iter_tasks()) == []
+
+def test_thread_safe_task_manager_pages_while_tasks_are_deleted():
+    # Arrange
+    manager = ThreadSafeTaskManager()
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    manager.create_tasks([(f"Task {i}", "Description", due_date) for i in range(2000)])
+    errors = []
+    unordered = []
+    first_page = manager.page_tasks(limit=10)
+
+    def delete():
+        for id in range(2000, 0, -1):
+            manager.delete_task(id)
+
+    def page(sort):
+        try:
+            for _ in range(20):
+                cursor = None
+                while page := list(manager.page_tasks(sort, cursor, limit=100)):
+                    keys = [(task.due_date, task.id) if sort == "due" else task.id for task in page]
+                    if keys != sorted(set(keys)):
+                        unordered.append(keys)
+                    cursor = task_cursor(page[-1], sort)
+        except Exception as error:
+            errors.append(error)
+
+    # Act
+    threads = [threading.Thread(target=delete), threading.Thread(target=page, args=("id",)), threading.Thread(target=page, args=("due",))]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # Assert
+    assert errors == []
+    assert unordered == []
+    assert [task.id for task in first_page] == list(range(1, 11))
+    assert list(manager.page_tasks()) == []
+
+def test_instrumented_task_manager_records_operations(task_manager, sample_task, tmp_path):
+    # Arrange
+    filename = str(tmp_path / "database.json")
+    task_manager.add_task(sample_task)
+    uninstrumented = task_manager.stats()
+
+    # Act
+    instrumentation = task_manager.instrument()
+    for _ in range(3):
+        task_manager.get_task_by_id(1)
+    task_manager.save_to_file(filename)
+    stats = task_manager.stats()
+    sqlite_manager = open_task_manager("sqlite", str(tmp_path / "tasks.sqlite3"), instrument=True)
+    sqlite_manager.save()
+    sqlite_stats = sqlite_manager.stats()
+    sqlite_manager.close()
+
+    # Assert
+    assert uninstrumented == {}
+    assert task_manager.instrument() is instrumentation
+    assert stats["get_task_by_id"]["count"] == 3
+    assert stats["get_task_by_id"]["p99_us"] >= stats["get_task_by_id"]["p50_us"] > 0
+    assert stats["get_task_by_id"]["bytes_read"] == stats["get_task_by_id"]["bytes_written"] == 0
+    if instrumentation.counts_bytes:
+        # the data file, and the .meta file next to it
+        assert stats["save_to_file"]["bytes_written"] > os.path.getsize(filename)
+        assert "written" in instrumentation.report()
+    assert sqlite_stats["save"]["bytes_written"] == 0
+    assert "add_task" not in stats
+    assert "get_task_by_id" in instrumentation.report()
+
+def test_web_api_metrics(task_manager, sample_task):
+    # Arrange
+    task_manager.add_task(sample_task)
+    task_server = TaskServer(task_manager, save_delay=60)
+    disabled = task_server._respond("GET", "/metrics", b"")
+
+    # Act
+    task_manager.instrument()
+    task_server._respond("GET", "/tasks/1", b"")
+    status, payload = task_server._respond("GET", "/metrics", b"")
+
+    # Assert
+    assert disabled[0] == 404
+    assert status == 200
+    assert payload["operations"]["get_task_by_id"]["count"] == 1
+    assert payload["operations"]["http.GET"]["count"] == 1
+
+@pytest.mark.parametrize("manager_type", ["memory", "sqlite"])
+def test_change_feed_follows_every_change(manager_type, tmp_path):
+    # Arrange
+    if manager_type == "sqlite":
+        task_manager = SqliteTaskManager(str(tmp_path / "tasks.db"))
+    else:
+        task_manager = TaskManager()
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    received = []
+    unsubscribe = task_manager.subscribe(received.append)
+
+    # Act
+    task_manager.create_task("Task 1", "Description 1", due_date)
+    task_manager.create_task("Task 2", "Description 2", due_date)
+    seen = task_manager.revision
+    task_manager.complete_task(1)
+    task_manager.delete_task(2)
+    unsubscribe()
+    task_manager.create_task("Task 3", "Description 3", due_date)
+    changes = task_manager.changes_since(seen)
+
+    # Assert
+    assert [change["op"] for change in received] == ["create", "create", "complete", "delete"]
+    assert task_manager.revision == 5
+    assert [(change["revision"], change["op"], change["id"]) for change in changes] == [(3, "complete", 1), (4, "delete", 2), (5, "create", 3)]
+    assert changes[0]["task"]["completed"] is True
+    assert changes[1]["task"] is None
+    assert task_manager.changes_since(5) == []
+
+def test_change_feed_forgets_the_oldest_changes():
+    # Arrange
+    feed = ChangeFeed(capacity=3)
+    task = Task(1, "Task 1", "Description 1", datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2), False)
+
+    # Act
+    for _ in range(5):
+        feed.publish("change", task)
+
+    # Assert
+    assert [change["revision"] for change in feed.since(2)] == [3, 4, 5]
+    with pytest.raises(StaleRevisionError):
+        feed.since(1)
+    with pytest.raises(StaleRevisionError):
+        feed.since(6)
+    assert feed.wait(4, timeout=0) is True
+    assert feed.wait(5, timeout=0) is False
+
+def test_web_api_long_polls_for_changes(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    task_server = TaskServer(task_manager, save_delay=60)
+    task_manager.save = lambda: None
+
+    async def scenario():
+        server = await task_server.start(port=0)
+        address = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(http_request("GET", "/changes?since=0&timeout=5"))
+        await asyncio.sleep(0.05)
+        other_reader, other_writer = await asyncio.open_connection(*address)
+        other_writer.write(http_request("POST", "/tasks", {"title": "Task 1", "description": "Description 1", "due_date": due_date}, close=True))
+        await read_http_response(other_reader)
+        polled = await asyncio.wait_for(read_http_response(reader), 1)
+        writer.write(http_request("GET", "/changes?since=1&timeout=0.05") + http_request("GET", "/changes?since=7", close=True))
+        responses = [polled, await read_http_response(reader), await read_http_response(reader)]
+        writer.close()
+        other_writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    # Act
+    (status, polled), (_, empty), (stale, _) = asyncio.run(scenario())
+
+    # Assert
+    assert status == 200
+    assert polled["revision"] == 1
+    assert [(change["op"], change["task"]["title"]) for change in polled["changes"]] == [("create", "Task 1")]
+    assert empty == {"revision": 1, "changes": []}
+    assert stale == 410
+
+def test_reminder_scheduler_follows_task_changes(task_manager):
+    # Arrange
+    now = datetime.datetime.now()
+    for day in (1, 2, 3, 4):
+        task_manager.create_task(f"Task {day}", "Description", (now + datetime.timedelta(days=day)).isoformat())
+    fired = []
+    scheduler = ReminderScheduler(task_manager, datetime.timedelta(hours=1), [lambda id, due_date: fired.append(id)])
+
+    # Act
+    task_manager.change_task(1, "due_date", now + datetime.timedelta(days=5))
+    task_manager.complete_task(2)
+    task_manager.delete_task(3)
+    task_manager.create_task("Task 5", "Description", (now + datetime.timedelta(hours=12)).isoformat())
+    pending = len(scheduler)
+    next_reminder = scheduler.next_reminder()
+    early = scheduler.fire_due(now + datetime.timedelta(hours=6))
+    task_manager.change_task(5, "title", "Renamed")
+    scheduler.fire_due(now + datetime.timedelta(days=10))
+    scheduler.close()
+
+    # Assert
+    assert pending == 3
+    assert next_reminder == task_manager.get_task_by_id(5).due_date - datetime.timedelta(hours=1)
+    assert early == []
+    assert fired == [5, 4, 1]
+    assert len(scheduler) == 0
+
+def test_reminder_scheduler_thread_wakes_for_an_earlier_task(task_manager):
+    # Arrange
+    reminded = threading.Event()
+    scheduler = task_manager.reminders(datetime.timedelta(hours=1), [lambda id, due_date: reminded.set()])
+    task_manager.create_task("Later", "Description", (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat())
+    scheduler.start()
+
+    # Act
+    task_manager.create_task("Soon", "Description", (datetime.datetime.now() + datetime.timedelta(minutes=30)).isoformat())
+    woken = reminded.wait(5)
+    scheduler.close()
+
+    # Assert
+    assert woken
+    assert len(scheduler) == 1
+
+def test_reminder_scheduler_thread_survives_a_raising_callback(task_manager, caplog):
+    # Arrange
+    reminded = []
+    events = [threading.Event(), threading.Event()]
+
+    def fail(id, due_date):
+        raise RuntimeError("Cannot notify")
+
+    def remember(id, due_date):
+        events[len(reminded)].set()
+        reminded.append(id)
+
+    scheduler = task_manager.reminders(datetime.timedelta(hours=1), [fail, remember])
+    scheduler.start()
+
+    # Act
+    task_manager.create_task("Soon", "Description", (datetime.datetime.now() + datetime.timedelta(minutes=30)).isoformat())
+    first_woken = events[0].wait(5)
+    task_manager.create_task("Sooner", "Description", (datetime.datetime.now() + datetime.timedelta(minutes=20)).isoformat())
+    second_woken = events[1].wait(5)
+    scheduler.close()
+
+    # Assert
+    assert first_woken and second_woken
+    assert reminded == [1, 2]
+    assert "Cannot notify" in caplog.text
+
+@pytest.mark.parametrize("scheme", ["id", "month"])
+def test_sharded_task_manager_saves_only_dirty_shards(scheme, tmp_path):
+    # Arrange
+    filename = str(tmp_path / "database.shards")
+    now = datetime.datetime.now()
+    task_manager = ShardedTaskManager(filename, shards=4, scheme=scheme)
+    task_manager.load()
+    for week in range(1, 13):
+        task_manager.create_task(f"Task {week}", "Shared words", (now + datetime.timedelta(weeks=week)).isoformat())
+    task_manager.save()
+    saved = {path.name: path.stat().st_mtime_ns for path in tmp_path.glob("*.json")}
+
+    # Act
+    reopened = ShardedTaskManager(filename)
+    reopened.load()
+    reopened.complete_task(5)
+    reopened.change_task(6, "due_date", now + datetime.timedelta(weeks=30))
+    reopened.save()
+    changed = sorted(path.name for path in tmp_path.glob("*.json") if saved.get(path.name) != path.stat().st_mtime_ns)
+    created = reopened.create_task("Task 13", "Description", (now + datetime.timedelta(days=1)).isoformat())
+
+    # Assert
+    assert reopened.scheme == scheme
+    expected = {f"database.shards.id4-{id % 4}.json" for id in (5, 6)} if scheme == "id" else {
+        f"database.shards.{moment:%Y-%m}.json" for moment in (now + datetime.timedelta(weeks=5), now + datetime.timedelta(weeks=6), now + datetime.timedelta(weeks=30))
+    }
+    assert changed == sorted(expected)
+    assert created.id == 13
+    assert [task.id for task in reopened.search("shared")] == list(range(1, 13))
+    assert [task.id for task in reopened.next_due(3, now)] == [13, 1, 2]
+    assert [task.id for task in reopened.overdue(now + datetime.timedelta(weeks=4, days=1))] == [13, 1, 2, 3, 4]
+    assert [task.id for task in read_all_pages(reopened, "due", 5)] == [13, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12, 6]
+    assert [task.id for task in read_all_pages(reopened, "id", 5)] == list(range(1, 14))
+
+def test_sharded_task_manager_rebalances_between_layouts(tmp_path):
+    # Arrange
+    filename = str(tmp_path / "database.shards")
+    task_manager = ShardedTaskManager(filename, shards=2)
+    task_manager.load()
+    for day in range(1, 41):
+        task_manager.create_task(f"Task {day}", "Description", (datetime.datetime.now() + datetime.timedelta(days=day)).isoformat())
+    task_manager.delete_task(40)
+    task_manager.save()
+
+    # Act
+    moved = task_manager.rebalance(scheme="month")
+    reopened = ShardedTaskManager(filename)
+    reopened.load()
+    scheme = reopened.scheme
+    tasks = sorted(reopened.iter_tasks(), key=lambda task: task.id)
+    again = reopened.rebalance(3)
+    created = reopened.create_task("Task 41", "Description", (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat())
+
+    # Assert
+    assert moved == 39
+    assert scheme == "month"
+    assert [task.id for task in tasks] == list(range(1, 40))
+    assert again == 39
+    assert not any(tmp_path.glob("database.shards.id2-*")) and not any(tmp_path.glob("database.shards.????-??.json"))
+    assert len(list(tmp_path.glob("database.shards.id3-*.json"))) == 3
+    assert created.id == 41
+
+def test_cli_help_does_not_import_task_models():
+    # Arrange
+    code = "import sys; from task_manager.cli import build_parser; build_parser(); print(sorted(m for m in sys.modules if m.startswith('task_manager') or m in ('json', 'socket')))"
+
+    # Act
+    imported = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    # Assert
+    assert imported.strip() == "['task_manager', 'task_manager.cli', 'task_manager.paths']"
+
+def test_cli_show_streams_the_task_from_a_json_database(task_manager, sample_task, tmp_path, capsys):
+    # Arrange
+    filename = str(tmp_path / "database.json")
+    task_manager.add_task(sample_task)
+    task_manager.save_to_file(filename)
+
+    # Act
+    main(["--database", filename, "--no-daemon", "show", "1"])
+    shown = capsys.readouterr().out
+    with pytest.raises(ValueError):
+        main(["--database", filename, "--no-daemon", "show", "2"])
+
+    # Assert
+    assert shown == f"{sample_task}\n"
+
+def read_all_pages(manager, sort, limit, **filters):
+    tasks, cursor = [], None
+    while True:
+        page = list(manager.page_tasks(sort, cursor, limit, **filters))
+        tasks += page
+        if len(page) < limit:
+            return tasks
+        cursor = task_cursor(page[-1], sort)
+
+@pytest.mark.parametrize("factory", [
+    lambda tmp_path: TaskManager(),
+    lambda tmp_path: SqliteTaskManager(tmp_path / "tasks.sqlite3"),
+    lambda tmp_path: LazyTaskManager(str(tmp_path / "tasks.bin")),
+], ids=["memory", "sqlite", "lazy"])
+def test_page_tasks_walks_every_task_once(factory, tmp_path):
+    # Arrange
+    now = datetime.datetime.now()
+    manager = factory(tmp_path)
+    for id in range(1, 60):
+        manager.add_task(Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(hours=(id * 37) % 11), id % 4 == 0))
+    for id in (5, 6, 30):
+        manager.delete_task(id)
+    start, end = now + datetime.timedelta(hours=2), now + datetime.timedelta(hours=9)
+
+    # Act
+    by_id = read_all_pages(manager, "id", 7)
+    by_due = read_all_pages(manager, "due", 7, due_after=start, due_before=end, completed=False)
+
+    # Assert
+    assert [task.id for task in by_id] == [id for id in range(1, 60) if id not in (5, 6, 30)]
+    assert [(task.due_date, task.id) for task in by_due] == sorted(
+        (task.due_date, task.id) for task in by_id if start <= task.due_date < end and not task.completed
+    )
+    with pytest.raises(ValueError):
+        manager.page_tasks("title")
+    with pytest.raises(ValueError):
+        manager.page_tasks("due", cursor="12")
+
+def test_cli_list_formats_and_pages(task_manager, tmp_path, capsys):
+    # Arrange
+    filename = str(tmp_path / "database.json")
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for number in range(5):
+        task_manager.create_task(f"Task {number}", "Description", due_date)
+    task_manager.save_to_file(filename)
+    command = ["--database", filename, "--no-daemon", "list"]
+
+    # Act
+    main(command + ["--format", "count"])
+    count = capsys.readouterr().out
+    main(command + ["--format", "ndjson", "--limit", "2", "--cursor", "1"])
+    page = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    main(command + ["--format", "table", "--cursor", page[-1]["next_cursor"]])
+    table = capsys.readouterr().out.splitlines()
+    main(command + ["--format", "ndjson", "--limit", "2", "--cursor", "3"])
+    last_page = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    # Assert
+    assert count == "5\n"
+    assert [task["id"] for task in page[:-1]] == [2, 3]
+    assert page[-1] == {"next_cursor": "3"}
+    assert [line.split()[0] for line in table[1:]] == ["4", "5"]
+    assert [task["id"] for task in last_page] == [4, 5]
+
+def test_web_api_pages_without_a_cursor_after_the_last_page(task_manager):
+    # Arrange
+    due_date = (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()
+    for number in range(4):
+        task_manager.create_task(f"Task {number}", "Description", due_date)
+    task_server = TaskServer(task_manager, save_delay=60)
+
+    # Act
+    _, first = task_server.handle("GET", "/tasks?limit=2", None)
+    _, last = task_server.handle("GET", f"/tasks?limit=2&cursor={first['next_cursor']}", None)
+
+    # Assert
+    assert [task["id"] for task in first["tasks"]] == [1, 2]
+    assert [task["id"] for task in last["tasks"]] == [3, 4]
+    assert last["next_cursor"] is None
+
+def test_task_query_counts_groups_and_sorts(task_manager):
+    # Arrange
+    now = datetime.datetime(2030, 1, 10, 12)
+    for id in range(1, 9):
+        task_manager.add_task(Task(id, f"Task {id}", "Description", now - datetime.timedelta(hours=id % 3), now + datetime.timedelta(days=id % 4 - 2), id % 3 == 0))
+
+    # Act
+    query = task_manager.query(now)
+
+    # Assert
+    assert query.summary() == {"total": 8, "completed": 2, "open": 6, "overdue": 4}
+    assert query.count(completed=False, due_before=now) == 4
+    assert query.group_by("due_day", overdue=True) == {datetime.date(2030, 1, 8): 2, datetime.date(2030, 1, 9): 2}
+    assert query.histogram(start=datetime.datetime(2030, 1, 8), completed=False) == [
+        (datetime.datetime(2030, 1, 8), 2), (datetime.datetime(2030, 1, 9), 2), (datetime.datetime(2030, 1, 10), 1), (datetime.datetime(2030, 1, 11), 1),
+    ]
+    assert query.sort_by("due_date", "-created_at") == [4, 8, 1, 5, 6, 2, 3, 7]
+    assert query.sort_by("-completed", "id", limit=3) == [3, 6, 1]
+    with pytest.raises(ValueError):
+        query.sort_by("title")
+
+def test_task_query_numpy_matches_python():
+    # Arrange
+    pytest.importorskip("numpy")
+    from task_manager.query import TaskQuery
+    now = datetime.datetime(2030, 1, 1)
+    tasks = [Task(id, "Task", "Description", now - datetime.timedelta(hours=id % 7), now + datetime.timedelta(hours=(id * 37) % 101 - 50), id % 4 == 0) for id in range(1, 300)]
+
+    # Act
+    queries = [TaskQuery(tasks, now, vectorized) for vectorized in (False, True)]
+    results = [
+        (query.summary(), query.group_by("due_day"), query.group_by("overdue"), query.histogram(datetime.timedelta(hours=6), overdue=True), query.sort_by("completed", "-due_date", "created_at"))
+        for query in queries
+    ]
+
+    # Assert
+    assert results[0] == results[1]
+
+@pytest.mark.parametrize("format", ["json", "ndjson", "csv"])
+def test_bulk_export_and_import_round_trip(format, tmp_path):
+    # Arrange
+    filename = str(tmp_path / f"tasks.{format}")
+    now = datetime.datetime(2030, 1, 1)
+    source = TaskManager()
+    source.add_tasks([Task(id, f'Task "{id}", é\nsecond line', "a},\r\n{b", now, now + datetime.timedelta(hours=id), id % 3 == 0, id % 5) for id in range(1, 301)])
+    columnar = ColumnarTaskManager()
+    columnar.add_task(Task(1000, "Existing", "Description", now, now, False))
+    changes = []
+    columnar.subscribe(changes.append)
+
+    # Act
+    exported = source.export_bulk(filename, workers=2, chunk_size=70)
+    imported = TaskManager()
+    count = imported.import_bulk(filename, workers=2, chunk_size=500)
+    columnar_count = columnar.import_bulk(filename, workers=1, chunk_size=2000)
+    with pytest.raises(ValueError):
+        imported.import_bulk(filename, workers=1)
+
+    # Assert
+    expected = [task.to_dict() for task in source.iter_tasks()]
+    assert exported == count == columnar_count == 300
+    assert [task.to_dict() for task in imported.iter_tasks()] == expected
+    assert [task.to_dict() for task in columnar.iter_tasks()][1:] == expected
+    assert columnar.get_task_by_id(150).title == 'Task "150", é\nsecond line'
+    assert [change["op"] for change in changes] == ["reload"]
+    assert len(imported.task_list) == 300
+
+def test_cli_imports_and_exports_tasks(tmp_path, capsys):
+    # Arrange
+    filename = str(tmp_path / "database.json")
+    source = str(tmp_path / "tasks.csv")
+    now = datetime.datetime(2030, 1, 1)
+    task_manager = TaskManager()
+    task_manager.add_tasks([Task(id, f"Task {id}", "Description", now, now + datetime.timedelta(days=id), False) for id in range(1, 11)])
+    task_manager.export_bulk(source, workers=1)
+    command = ["--database", filename, "--no-daemon"]
+
+    # Act
+    main(command + ["import", source, "--workers", "1"])
+    imported = capsys.readouterr().out.splitlines()[-1]
+    main(command + ["export", "--format", "ndjson", "--workers", "1"])
+    exported = capsys.readouterr()
+    created = TaskManager()
+    created.load_from_file(filename)
+
+    # Assert
+    assert imported.startswith(f"Imported 10 tasks from {source} in ") and imported.endswith(" tasks/s)")
+    assert [json.loads(line)["id"] for line in exported.out.splitlines()] == list(range(1, 11))
+    assert exported.err.startswith("Exported 10 tasks to standard output in ")
+    assert created.get_task_by_id(7).due_date == now + datetime.timedelta(days=7)
+    assert created.create_task("Task 11", "Description", (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()).id == 11